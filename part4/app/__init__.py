@@ -1,15 +1,10 @@
 from flask import Flask, send_from_directory
 from flask_restx import Api
 from flask_cors import CORS  # Ajoutez cette importation en haut du fichier avec les autres importations
-from app.persistence.repository import SQLAlchemyRepository  # Import the new repository class
-from app.extensions import db, bcrypt, jwt  # Use extensions for database and authentication
-from app.api.v1.users import api as users_ns
-from app.api.v1.amenities import api as amenities_ns
-from app.api.v1.places import api as places_ns
-from app.api.v1.reviews import api as reviews_ns
-from app.api.v1.auth import api as auth_ns
-from app.api.v1.protector import api as protected_ns
-import os
+from app.extensions import apply_sqlite_pragmas, db, bcrypt, jwt, hasher, metrics, migrate, query_stats, repository_cache, response_cache  # Use extensions for database and authentication
+from app.commands import hbnb_cli
+from app.logs import configure_logging
+from app.routing import SQLiteReplicator
 
 
 def create_app(config_class="config.DevelopmentConfig"):
@@ -32,18 +27,28 @@ def create_app(config_class="config.DevelopmentConfig"):
     
     # Load the configuration
     app.config.from_object(config_class)
+    configure_logging(app.config)
 
-    # Secret key for JWT (already present in your code)
-    app.config['JWT_SECRET_KEY'] = 'your-secret-key'
-    
     # Initialize extensions
     db.init_app(app)
     bcrypt.init_app(app)
+    hasher.init_app(app)
+    repository_cache.init_app(app)
+    response_cache.init_app(app)
+    query_stats.init_app(app)
     jwt.init_app(app)
+    metrics.init_app(app)  # After jwt: counts the tokens it rejects
+    migrate.init_app(app, db)  # `flask db ...`, the migrations are in part4/migrations
 
     with app.app_context():
-        # Database tables will be created later (next task)
-        db.create_all()
+        for engine in db.engines.values():
+            apply_sqlite_pragmas(engine, app.config.get('SQLITE_PRAGMAS'))
+        # The tables are created and migrated by `flask hbnb init-db`, not at each start
+        if app.config.get('SQLITE_REPLICA_SYNC'):
+            replicator = SQLiteReplicator(db.engine, [db.engines[key] for key in app.config['READ_REPLICA_BINDS']],
+                                          auto=True)
+            replicator.sync()
+            app.extensions['sqlite_replicator'] = replicator
 
     # Initialize Flask-RESTX API
     api = Api(
@@ -63,15 +68,11 @@ def create_app(config_class="config.DevelopmentConfig"):
         security='Bearer'
     )
 
-    # Register the namespaces (already present in your code)
-    api.add_namespace(users_ns, path='/api/v1/users')
-    api.add_namespace(amenities_ns, path='/api/v1/amenities')
-    api.add_namespace(places_ns, path='/api/v1/places')
-    api.add_namespace(reviews_ns, path='/api/v1/reviews')
-    api.add_namespace(auth_ns, path='/api/v1/auth')
-    api.add_namespace(protected_ns, path='/api/v1/protector')
+    # Register the namespaces, imported now rather than with the app package
+    from app.api.v1 import register_namespaces
+    register_namespaces(api)
 
-    # Initialize JWT again (already present in your code)
-    jwt.init_app(app)
+    # Register the `flask hbnb ...` maintenance commands
+    app.cli.add_command(hbnb_cli)
 
     return app
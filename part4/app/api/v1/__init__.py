@@ -1,4 +1,22 @@
-from app.services.facade import HBnBFacade
+from importlib import import_module
+from app.services import facade  # The facade instance shared by all routes
 
-# Create a single instance of the facade to be shared across all routes
-facade = HBnBFacade()
+# Namespaces of the API: (module of app.api.v1, URL prefix). They are
+# imported by register_namespaces(), when an app is created, so importing
+# the app package or running a CLI command doesn't load every resource.
+NAMESPACES = (
+    ('users', '/api/v1/users'),
+    ('amenities', '/api/v1/amenities'),
+    ('places', '/api/v1/places'),
+    ('reviews', '/api/v1/reviews'),
+    ('auth', '/api/v1/auth'),
+    ('protector', '/api/v1/protector'),
+    ('search', '/api/v1/search'),
+    ('export', '/api/v1/export'),
+)
+
+
+def register_namespaces(api):
+    """Import the namespaces of the API and add them to a Flask-RESTX Api"""
+    for module, path in NAMESPACES:
+        api.add_namespace(import_module(f'app.api.v1.{module}').api, path=path)
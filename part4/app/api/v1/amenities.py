@@ -1,6 +1,10 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt
 from app.api.v1 import facade  # Import the shared facade instance
+from app.api.v1.pagination import get_page_args, page_headers, page_params
+from app.api.v1.bulk import bulk_response, get_bulk_items
+from app.api.v1.conditional import cached_collection, entity_validators, not_modified, validator_headers
+from app.instrumentation import query_budget
 
 api = Namespace('amenities', description='Amenity operations')
 
@@ -34,23 +38,60 @@ class AmenityList(Resource):
         except ValueError as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params=page_params)
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(304, 'Not modified since the ETag sent in If-None-Match')
+    @api.response(400, 'Invalid pagination parameters')
+    @cached_collection('amenities')
+    @query_budget(2)
     def get(self):
         """Retrieve a list of all amenities"""
-        amenities = facade.get_all_amenities()
-        return [{'id': amenity.id, 'name': amenity.name} for amenity in amenities], 200
+        try:
+            limit, after = get_page_args()
+            if limit is None:
+                amenities, next_cursor = facade.get_all_amenities(), None
+            else:
+                amenities, next_cursor = facade.get_amenities_page(limit, after)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return [{'id': amenity.id, 'name': amenity.name} for amenity in amenities], 200, page_headers(next_cursor)
+
+
+@api.route('/bulk')
+class AmenityBulk(Resource):
+    @jwt_required()
+    @api.expect([amenity_model])
+    @api.response(201, 'All amenities created')
+    @api.response(207, 'Some amenities created, see the per-item results')
+    @api.response(400, 'No amenity created')
+    @api.response(403, 'Admin privileges required')
+    def post(self):
+        """Register many amenities in one transaction (Admin only)"""
+        if not is_admin_user():
+            return {'error': 'Admin privileges required'}, 403
+        try:
+            items = get_bulk_items()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return bulk_response(facade.create_amenities_bulk(items))
 
 
 @api.route('/<amenity_id>')
 class AmenityResource(Resource):
     @api.response(200, 'Amenity details retrieved successfully')
+    @api.response(304, 'Not modified since the ETag or date sent by the client')
     @api.response(404, 'Amenity not found')
+    @query_budget(1)
     def get(self, amenity_id):
         """Get amenity details by ID"""
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             return {'error': 'Amenity not found'}, 404
-        return {'id': amenity.id, 'name': amenity.name}, 200
+        etag, last_modified = entity_validators(amenity)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+        return {'id': amenity.id, 'name': amenity.name}, 200, validator_headers(etag, last_modified)
 
     @jwt_required()
     @api.expect(amenity_model)
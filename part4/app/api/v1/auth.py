@@ -1,6 +1,7 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import create_access_token
 from app.services import facade
+from app.instrumentation import query_budget
 
 api = Namespace('auth', description='Authentication operations')
 
@@ -13,27 +14,15 @@ login_model = api.model('Login', {
 @api.route('/login')
 class Login(Resource):
     @api.expect(login_model)
+    @query_budget(1)
     def post(self):
         """Authenticate user and return a JWT token"""
         credentials = api.payload
-        
-        print(f"Tentative de connexion avec email: {credentials['email']}")
-        
-        # Step 1: Retrieve the user based on the provided email
-        user = facade.get_user_by_email(credentials['email'])
-        
-        if user:
-            print(f"Utilisateur trouvé: {user.email}")
-            print(f"Méthodes disponibles : {dir(user)}")
-            # Trouvez la méthode qui commence par 'check_' ou 'verify_'
-            print(f"Tentative de vérification du mot de passe")
-            password_correct = user.verify_password(credentials['password'])
-            print(f"Mot de passe correct: {password_correct}")
-        else:
-            print(f"Aucun utilisateur trouvé avec cet email")
-            
-        # Step 2: Check if the user exists and the password is correct
-        if not user or not user.verify_password(credentials['password']):
+
+        # Steps 1 and 2: retrieve the user by email and check the password
+        # (a single bcrypt verification, run in the hashing pool)
+        user = facade.authenticate(credentials['email'], credentials['password'])
+        if not user:
             return {'error': 'Invalid credentials'}, 401
 
         # Step 3: Create a JWT token with the user's id as identity
@@ -0,0 +1,26 @@
+from flask import current_app, request
+
+
+def get_bulk_items():
+    """
+    Read the JSON array of items posted to a /bulk endpoint.
+
+    Raises ValueError if the body is not an array or has too many items
+    (BULK_MAX_ITEMS, 10000 by default: split bigger imports into several requests).
+    """
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        raise ValueError("The request body must be a JSON array of items")
+    max_items = current_app.config.get('BULK_MAX_ITEMS', 10000)
+    if len(items) > max_items:
+        raise ValueError(f"At most {max_items} items can be sent at once")
+    return items
+
+
+def bulk_response(results):
+    """Summarize per-item results: 201 if every item was created, 207 if only some were, 400 if none"""
+    created = sum(1 for result in results if 'id' in result)
+    body = {'created': created, 'failed': len(results) - created, 'results': results}
+    if created == len(results):
+        return body, 201
+    return body, 207 if created else 400
@@ -0,0 +1,100 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import Response, request
+from flask_restx.representations import output_json
+from werkzeug.http import http_date, quote_etag
+from app.api.v1 import facade
+from app.extensions import response_cache
+
+
+def entity_validators(obj):
+    """
+    Build the (etag, last_modified) validators of a single object from its
+    id and updated_at, without touching any of its relationships.
+    """
+    updated_at = obj.updated_at or obj.created_at
+    etag = f"{obj.__tablename__}-{obj.id}-{updated_at:%Y%m%d%H%M%S%f}" if updated_at else None
+    last_modified = updated_at.replace(tzinfo=timezone.utc) if updated_at else None
+    return etag, last_modified
+
+
+def collection_etag(names, versions, full_path):
+    """
+    Build the ETag of a collection response from the versions of the tables it is read from.
+    The path and query string ('/path?query', as Flask's request.full_path) are part of it:
+    each filter or page is its own resource.
+    """
+    raw = f"{':'.join(f'{name}={version}' for name, version in zip(names, versions))}:{full_path}"
+    return f"{names[0]}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]}"
+
+
+def validator_headers(etag, last_modified=None):
+    """Response headers letting clients revalidate their copy instead of downloading it again"""
+    headers = {'Cache-Control': 'no-cache'}
+    if etag:
+        headers['ETag'] = quote_etag(etag)
+    if last_modified:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def is_fresh(etag, last_modified, if_none_match, if_modified_since):
+    """
+    True if the client's copy, described by the parsed If-None-Match (ETags)
+    and If-Modified-Since (datetime) request headers, is still current.
+    If-None-Match wins when both are sent (RFC 9110).
+    """
+    if if_none_match:
+        return etag is not None and if_none_match.contains_weak(etag)
+    if if_modified_since and last_modified:
+        # HTTP dates have a one second resolution
+        return last_modified.replace(microsecond=0) <= if_modified_since
+    return False
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Check the If-None-Match / If-Modified-Since request headers.
+
+    Returns a 304 response if the client's copy is still current, None otherwise.
+    """
+    if not is_fresh(etag, last_modified, request.if_none_match, request.if_modified_since):
+        return None
+    return Response(status=304, headers=validator_headers(etag, last_modified))
+
+
+def cached_collection(*names):
+    """
+    Decorate a collection GET so that, while the versions of its tables are
+    unchanged, it answers 304 to clients holding the current ETag and serves
+    everyone else the response rendered the first time, from memory.
+
+    Name every table the response depends on, including the ones only read
+    to decide between a 200 and an error (e.g. the place of its reviews).
+    The decorated method returns (body, status[, headers]) as usual; only 200
+    responses are cached.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            etag = collection_etag(names, [facade.get_collection_version(name) for name in names], request.full_path)
+            cached = not_modified(etag)
+            if cached:
+                return cached
+            hit = response_cache.get(etag)
+            if hit is not None:
+                data, headers = hit
+                return Response(data, 200, headers, mimetype='application/json')
+
+            body, status, *headers = method(*args, **kwargs)
+            headers = dict(headers[0] if headers else {})
+            if status != 200:
+                return body, status, headers
+            headers.update(validator_headers(etag))
+            response = output_json(body, status, headers)
+            response.mimetype = 'application/json'
+            response_cache.set(etag, (response.get_data(), headers))
+            return response
+        return wrapper
+    return decorator
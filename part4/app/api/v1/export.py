@@ -0,0 +1,30 @@
+from flask import Response, current_app, request, stream_with_context
+from flask_restx import Namespace, Resource
+from flask_jwt_extended import jwt_required, get_jwt
+from app.api.v1 import facade  # Import the shared facade instance
+
+api = Namespace('export', description='Dataset export (Admin only)')
+
+
+@api.route('')
+class Export(Resource):
+    @jwt_required()
+    @api.doc(params={
+        'entities': 'Comma separated tables to export: users, amenities, places, '
+                    'place_amenity_association, reviews (default: all)'
+    })
+    @api.response(200, 'JSON Lines stream, one {"entity": ..., "data": {...}} object per row')
+    @api.response(400, 'Unknown entity')
+    @api.response(403, 'Admin privileges required')
+    def get(self):
+        """Stream the dataset as newline-delimited JSON (Admin only)"""
+        if not get_jwt().get('is_admin', False):
+            return {'error': 'Admin privileges required'}, 403
+        entities = [name for name in request.args.get('entities', '').split(',') if name]
+        try:
+            lines = facade.export_dataset(entities, current_app.config.get('EXPORT_BATCH_SIZE', 1000))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        # The request context (and its database session) stays open while the body is sent
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson',
+                        headers={'Content-Disposition': 'attachment; filename=hbnb-export.jsonl'})
@@ -0,0 +1,51 @@
+from urllib.parse import urlencode
+from flask import current_app, request
+from app.persistence.repository import decode_cursor
+
+# Query string parameters shared by every paginated collection endpoint
+page_params = {
+    'limit': 'Maximum number of items to return (enables cursor pagination)',
+    'after': 'Opaque cursor returned in the X-Next-Cursor header of the previous page'
+}
+
+
+def get_page_args():
+    """
+    Read the ?limit=&after= pagination parameters from the current request.
+
+    Returns (None, None) when neither is given so endpoints keep returning the
+    whole collection to existing clients. Raises ValueError on invalid input.
+    """
+    return parse_page_args(request.args, current_app.config)
+
+
+def parse_page_args(args, config):
+    """Validate limit/after read from a query string mapping (shared with the ASGI app)"""
+    limit = args.get('limit')
+    after = args.get('after')
+    if limit is None and after is None:
+        return None, None
+
+    max_size = config.get('MAX_PAGE_SIZE', 100)
+    if limit is None:
+        limit = config.get('DEFAULT_PAGE_SIZE', 20)
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be an integer")
+    if not 1 <= limit <= max_size:
+        raise ValueError(f"limit must be between 1 and {max_size}")
+    if after is not None:
+        decode_cursor(after)  # Reject malformed cursors before querying
+    return limit, after
+
+
+def page_headers(next_cursor):
+    """Build the response headers pointing to the next page, if there is one"""
+    if not next_cursor:
+        return {}
+    args = request.args.to_dict()
+    args['after'] = next_cursor
+    next_url = f"{request.base_url}?{urlencode(args)}"
+    return {'X-Next-Cursor': next_cursor, 'Link': f'<{next_url}>; rel="next"'}
@@ -1,7 +1,12 @@
 import logging
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from app.api.v1 import facade  # Import the shared facade instance
+from app.api.v1.pagination import get_page_args, page_headers, page_params
+from app.api.v1.bulk import bulk_response, get_bulk_items
+from app.api.v1.conditional import cached_collection, entity_validators, not_modified, validator_headers
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from app.instrumentation import query_budget
 
 logger = logging.getLogger(__name__)
 api = Namespace('places', description='Place operations')
@@ -28,6 +33,110 @@ place_update_model = api.model('PlaceUpdate', {
     'amenities': fields.List(fields.String, description="List of amenities ID's")
 })
 
+# Query string filters accepted by the place listing
+place_list_params = dict(page_params, **{
+    'min_rating': 'Only places whose average rating is at least this value (1-5)',
+    'sort': "Set to 'rating' to list the best rated places first (not combinable with limit/after)",
+    'bbox': 'Only places inside min_lng,min_lat,max_lng,max_lat',
+    'near': ("'latitude,longitude': list places around this point, nearest first "
+             "(not combinable with after, sort or bbox)"),
+    'radius_km': 'Search radius used with near, in kilometres (default 10)',
+    'min_price': 'Only places with a price per night of at least this value',
+    'max_price': 'Only places with a price per night of at most this value',
+    'amenities': 'Comma separated amenity IDs, places must offer all of them',
+    'owner_id': 'Only places owned by this user'
+})
+
+
+def place_to_dict(place):
+    """Serialize a place (owner read from the column, amenities expected to be loaded)"""
+    average_rating = place.average_rating
+    return {
+        'id': place.id,
+        'title': place.title,
+        'description': place.description,
+        'price': place.price,
+        'latitude': place.latitude,
+        'longitude': place.longitude,
+        'owner_id': place.owner_id,
+        'amenities': [amenity.id for amenity in place.amenities],
+        'review_count': place.review_count,
+        'average_rating': round(average_rating, 2) if average_rating is not None else None
+    }
+
+
+def parse_coordinates(args, name, count):
+    """Parse a comma separated list of numbers from a query string mapping"""
+    try:
+        values = [float(value) for value in args[name].split(',')]
+    except ValueError:
+        values = []
+    if len(values) != count:
+        raise ValueError(f"{name} must be {count} comma separated numbers")
+    return values
+
+
+def parse_place_filters(args):
+    """Read the listing filters from a query string mapping, raising ValueError on invalid input"""
+    filters = {}
+    if 'bbox' in args:
+        west, south, east, north = parse_coordinates(args, 'bbox', 4)
+        if not (-90 <= south <= north <= 90) or not (-180 <= west <= 180 and -180 <= east <= 180):
+            raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+        filters['bbox'] = (south, west, north, east)
+    for name in ('min_price', 'max_price'):
+        if name in args:
+            try:
+                filters[name] = float(args[name])
+            except ValueError:
+                raise ValueError(f"{name} must be a number")
+            if filters[name] < 0:
+                raise ValueError(f"{name} must be a non-negative number")
+    if 'owner_id' in args:
+        filters['owner_id'] = args['owner_id']
+    if 'amenities' in args:
+        try:
+            filters['amenities'] = [int(amenity_id) for amenity_id in args['amenities'].split(',')]
+        except ValueError:
+            raise ValueError("amenities must be a comma separated list of amenity IDs")
+    min_rating = args.get('min_rating')
+    if min_rating is not None:
+        try:
+            filters['min_rating'] = float(min_rating)
+        except ValueError:
+            raise ValueError("min_rating must be a number")
+        if not 1 <= filters['min_rating'] <= 5:
+            raise ValueError("min_rating must be between 1 and 5")
+    return filters
+
+
+def parse_place_listing(args, limit, after):
+    """
+    Read the filters, sort and near search of a place listing from a query
+    string mapping (shared with the ASGI app), raising ValueError on invalid
+    or conflicting parameters.
+
+    :return: A tuple (filters, sort, near); near is (latitude, longitude, radius_km) or None.
+    """
+    filters = parse_place_filters(args)
+    sort = args.get('sort')
+    if sort not in (None, 'rating'):
+        raise ValueError("sort must be 'rating'")
+    near = None
+    if 'near' in args:
+        if after is not None or sort or 'bbox' in filters:
+            raise ValueError("near cannot be combined with after, sort or bbox")
+        latitude, longitude = parse_coordinates(args, 'near', 2)
+        try:
+            radius_km = float(args.get('radius_km', 10))
+        except ValueError:
+            raise ValueError("radius_km must be a number")
+        near = (latitude, longitude, radius_km)
+    elif sort and limit is not None:
+        raise ValueError("sort cannot be combined with limit/after")
+    return filters, sort, near
+
+
 @api.route('/')
 class PlaceList(Resource):
     @api.expect(place_model, validate=True)
@@ -56,54 +165,73 @@ class PlaceList(Resource):
             # Create place using the facade
             new_place = facade.create_place(place_data)
 
-            return {
-                'id': new_place.id,
-                'title': new_place.title,
-                'description': new_place.description,
-                'price': new_place.price,
-                'latitude': new_place.latitude,
-                'longitude': new_place.longitude,
-                'owner_id': new_place.owner.id,
-                'amenities': [amenity.id for amenity in new_place.amenities]
-            }, 201
+            return place_to_dict(new_place), 201
         except ValueError as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params=place_list_params)
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(304, 'Not modified since the ETag sent in If-None-Match')
+    @api.response(400, 'Invalid filter or pagination parameters')
+    @cached_collection('places')
+    @query_budget(2)
     def get(self):
         """Retrieve a list of all places"""
-        places = facade.get_all_places()
-        return [{
-            'id': place.id,
-            'title': place.title,
-            'description': place.description,
-            'price': place.price,
-            'latitude': place.latitude,
-            'longitude': place.longitude,
-            'owner_id': place.owner.id,
-            'amenities': [amenity.id for amenity in place.amenities]
-        } for place in places], 200
+        try:
+            limit, after = get_page_args()
+            filters, sort, near = parse_place_listing(request.args, limit, after)
+            if near:
+                results = facade.get_places_near(*near, limit=limit, **filters)
+                return [dict(place_to_dict(place), distance_km=round(distance, 3))
+                        for place, distance in results], 200
+            if limit is None:
+                places, next_cursor = facade.get_all_places(sort=sort, **filters), None
+            else:
+                places, next_cursor = facade.get_places_page(limit, after, **filters)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return [place_to_dict(place) for place in places], 200, page_headers(next_cursor)
+
+@api.route('/bulk')
+class PlaceBulk(Resource):
+    @jwt_required()
+    @api.expect([place_model])
+    @api.response(201, 'All places created')
+    @api.response(207, 'Some places created, see the per-item results')
+    @api.response(400, 'No place created')
+    def post(self):
+        """Register many places in one transaction (admins may set owner_id per place)"""
+        is_admin = get_jwt().get('is_admin', False)
+        try:
+            items = get_bulk_items()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        # Same rule as for a single place: only admins choose the owner
+        owner_id = None if is_admin else get_jwt_identity()
+        if is_admin:
+            items = [dict({'owner_id': get_jwt_identity()}, **item) if isinstance(item, dict) else item
+                     for item in items]
+        return bulk_response(facade.create_places_bulk(items, owner_id=owner_id))
+
 
 @api.route('/<place_id>')
 class PlaceResource(Resource):
     @api.response(200, 'Place details retrieved successfully')
+    @api.response(304, 'Not modified since the ETag or date sent by the client')
     @api.response(404, 'Place not found')
+    @query_budget(2)
     def get(self, place_id):
         """Get place details by ID"""
         place = facade.get_place(place_id)
         if not place:
             return {'error': 'Place not found'}, 404
 
-        return {
-            'id': place.id,
-            'title': place.title,
-            'description': place.description,
-            'price': place.price,
-            'latitude': place.latitude,
-            'longitude': place.longitude,
-            'owner_id': place.owner.id,
-            'amenities': [amenity.id for amenity in place.amenities]
-        }, 200
+        # Answered from id/updated_at, before the amenities are loaded
+        etag, last_modified = entity_validators(place)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+        return place_to_dict(place), 200, validator_headers(etag, last_modified)
 
     @jwt_required()  # Require authentication to update a place
     @api.expect(place_update_model)
@@ -124,31 +252,22 @@ class PlaceResource(Resource):
                 return {'error': "Place not found"}, 404
             
             # Ownership check: Admins can bypass this restriction
-            if not is_admin and str(place.owner.id) != current_user_id:  # Utilisez directement l'ID
+            if not is_admin and str(place.owner_id) != current_user_id:  # Utilisez directement l'ID
                 return {'error': "Unauthorized action"}, 403
 
             update_data = api.payload
-            logger.debug(f"Updating place {place_id} with data: {update_data}")
+            logger.debug("Updating place %s with data: %s", place_id, update_data)
 
             # Update the place
             updated_place = facade.update_place(place_id, update_data)
             
-            return {
-                'id': updated_place.id,
-                'title': updated_place.title,
-                'description': updated_place.description,
-                'price': updated_place.price,
-                'latitude': updated_place.latitude,
-                'longitude': updated_place.longitude,
-                'owner_id': updated_place.owner.id,
-                'amenities': [amenity.id for amenity in updated_place.amenities]
-            }, 200
+            return place_to_dict(updated_place), 200
 
         except ValueError as e:
-            logger.error(f"Validation error while updating place: {str(e)}")
+            logger.error("Validation error while updating place: %s", e)
             return {'error': str(e)}, 400
         except Exception as e:
-            logger.error(f"Unexpected error while updating place: {str(e)}")
+            logger.error("Unexpected error while updating place: %s", e)
             return {'error': "Internal server error"}, 500
 
     @jwt_required()  # Require authentication to delete a place
@@ -168,10 +287,10 @@ class PlaceResource(Resource):
                 return {'error': "Place not found"}, 404
             
             # Ownership check: Admins can bypass this restriction
-            if not is_admin and str(place.owner.id) != current_user_id:  # Utilisez directement l'ID
+            if not is_admin and str(place.owner_id) != current_user_id:  # Utilisez directement l'ID
                 return {'error': "Unauthorized action"}, 403
 
-            logger.debug(f"Deleting place {place_id}")
+            logger.debug("Deleting place %s", place_id)
 
             # Delete the place
             facade.delete_place(place_id)
@@ -179,5 +298,5 @@ class PlaceResource(Resource):
             return {'message': "Place deleted successfully"}, 200
         
         except Exception as e:
-            logger.error(f"Unexpected error while deleting a place: {str(e)}")
+            logger.error("Unexpected error while deleting a place: %s", e)
             return {'error': "Internal server error"}, 500
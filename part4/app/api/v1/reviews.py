@@ -1,9 +1,12 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.services.facade import HBnBFacade
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from app.services import facade  # The shared facade instance
+from app.api.v1.pagination import get_page_args, page_headers, page_params
+from app.api.v1.bulk import bulk_response, get_bulk_items
+from app.api.v1.conditional import cached_collection, entity_validators, not_modified, validator_headers
+from app.instrumentation import query_budget
 
 api = Namespace('reviews', description='Review operations')
-facade = HBnBFacade()
 
 # Define the review model for input validation and documentation
 review_model = api.model('Review', {
@@ -33,12 +36,13 @@ class ReviewList(Resource):
         try:
             # Validate that the user is not reviewing their own place
             place = facade.get_place(review_data['place_id'])
-            if str(place.owner.id) == current_user_id:  # Comparaison directe avec l'ID
+            if not place:
+                return {'error': "Place not found"}, 400
+            if str(place.owner_id) == current_user_id:  # Comparaison directe avec l'ID
                 return {'error': "You cannot review your own place"}, 403
 
-            # Validate that the user has not already reviewed this place
-            if facade.has_already_reviewed(current_user_id, review_data['place_id']):  # Passage direct de l'ID
-                return {'error': "You have already reviewed this place"}, 400
+            # Duplicate reviews are rejected by the unique (user_id, place_id)
+            # constraint when the review is inserted, see facade.create_review
 
             # Add the user_id to the review data
             review_data['user_id'] = current_user_id  # Assignation directe de l'ID
@@ -55,32 +59,71 @@ class ReviewList(Resource):
         except ValueError as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params=page_params)
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(304, 'Not modified since the ETag sent in If-None-Match')
+    @api.response(400, 'Invalid pagination parameters')
+    @cached_collection('reviews')
+    @query_budget(2)
     def get(self):
         """Retrieve a list of all reviews"""
-        reviews = facade.get_all_reviews()
+        try:
+            limit, after = get_page_args()
+            if limit is None:
+                reviews, next_cursor = facade.get_all_reviews(), None
+            else:
+                reviews, next_cursor = facade.get_reviews_page(limit, after)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         return [{'id': review.id,
                  'text': review.text,
                  'rating': review.rating,
-                 'user_id': review.user.id,
-                 'place_id': review.place.id} for review in reviews], 200
+                 'user_id': review.user_id,
+                 'place_id': review.place_id} for review in reviews], 200, page_headers(next_cursor)
+
+@api.route('/bulk')
+class ReviewBulk(Resource):
+    @jwt_required()
+    @api.expect([review_model])
+    @api.response(201, 'All reviews created')
+    @api.response(207, 'Some reviews created, see the per-item results')
+    @api.response(400, 'No review created')
+    def post(self):
+        """Register many reviews in one transaction (admins may set user_id per review)"""
+        is_admin = get_jwt().get('is_admin', False)
+        try:
+            items = get_bulk_items()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        user_id = None if is_admin else get_jwt_identity()
+        if is_admin:
+            items = [dict({'user_id': get_jwt_identity()}, **item) if isinstance(item, dict) else item
+                     for item in items]
+        return bulk_response(facade.create_reviews_bulk(items, user_id=user_id))
+
 
 @api.route('/<review_id>')
 class ReviewResource(Resource):
     @api.response(200, 'Review details retrieved successfully')
+    @api.response(304, 'Not modified since the ETag or date sent by the client')
     @api.response(404, 'Review not found')
+    @query_budget(1)
     def get(self, review_id):
         """Get review details by ID"""
         review = facade.get_review(review_id)
         if not review:
             return {'error': 'Review not found'}, 404
+        etag, last_modified = entity_validators(review)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
         return {
             'id': review.id,
             'text': review.text,
             'rating': review.rating,
-            'user_id': review.user.id,
-            'place_id': review.place.id
-        }, 200
+            'user_id': review.user_id,
+            'place_id': review.place_id
+        }, 200, validator_headers(etag, last_modified)
 
     @jwt_required()  # Require authentication to update a review
     @api.expect(review_update_model)
@@ -141,15 +184,27 @@ class ReviewResource(Resource):
 
 @api.route('/places/<place_id>/reviews')
 class PlaceReviewList(Resource):
+    @api.doc(params=page_params)
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(304, 'Not modified since the ETag sent in If-None-Match')
+    @api.response(400, 'Invalid pagination parameters')
     @api.response(404, 'Place not found')
+    @cached_collection('reviews', 'places')  # A deleted place answers 404
+    @query_budget(4)  # Table versions, place (404 check) and reviews
     def get(self, place_id):
         """Get all reviews for a specific place"""
         try:
-            reviews = facade.get_reviews_by_place(place_id)
+            limit, after = get_page_args()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        try:
+            if limit is None:
+                reviews, next_cursor = facade.get_reviews_by_place(place_id), None
+            else:
+                reviews, next_cursor = facade.get_reviews_by_place_page(place_id, limit, after)
             return [{'id': review.id,
                      'text': review.text,
                      'rating': review.rating,
-                     'user_id': review.user.id} for review in reviews], 200
+                     'user_id': review.user_id} for review in reviews], 200, page_headers(next_cursor)
         except ValueError as e:
             return {'error': str(e)}, 404
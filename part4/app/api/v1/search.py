@@ -0,0 +1,43 @@
+from flask import current_app, request
+from flask_restx import Namespace, Resource
+from app.api.v1 import facade  # Import the shared facade instance
+from app.api.v1.pagination import page_headers, parse_page_args
+from app.persistence.repository import decode_cursor, encode_cursor
+from app.instrumentation import query_budget
+
+api = Namespace('search', description='Full-text search over places and reviews')
+
+
+def parse_search_args(args, config):
+    """
+    Read q, type, limit and after from a query string mapping (shared with
+    the ASGI app). Results are ranked, so the cursor holds the offset of the
+    next page. Returns (q, type, limit, offset), raises ValueError.
+    """
+    limit, after = parse_page_args(args, config)
+    offset = decode_cursor(after) if after is not None else 0
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid pagination cursor")
+    return args.get('q', ''), args.get('type'), limit or 20, offset
+
+
+@api.route('/')
+class Search(Resource):
+    @api.doc(params={
+        'q': 'Words to search for, the end of each word may be a prefix',
+        'type': "Restrict the results to 'place' or 'review'",
+        'limit': 'Maximum number of results to return (default 20)',
+        'after': 'Opaque cursor returned in the X-Next-Cursor header of the previous page'
+    })
+    @api.response(200, 'Search results, best matches first')
+    @api.response(400, 'Invalid search parameters')
+    @query_budget(1)
+    def get(self):
+        """Search places and reviews"""
+        try:
+            query, kind, limit, offset = parse_search_args(request.args, current_app.config)
+            results = facade.search(query, kind, limit + 1, offset)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        next_cursor = encode_cursor(offset + limit) if len(results) > limit else None
+        return results[:limit], 200, page_headers(next_cursor)
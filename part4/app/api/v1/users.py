@@ -1,7 +1,11 @@
+import logging
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from app.services.facade import HBnBFacade  # Import the shared facade instance
-facade = HBnBFacade()  # Créez une nouvelle instance
+from app.services import facade  # The shared facade instance
+from app.api.v1.pagination import get_page_args, page_headers, page_params
+from app.api.v1.conditional import cached_collection, entity_validators, not_modified, validator_headers
+from app.instrumentation import query_budget
+logger = logging.getLogger(__name__)
 
 api = Namespace('users', description='User operations')
 
@@ -27,20 +31,32 @@ def is_admin_user():
         claims = get_jwt()  # Récupérer tous les claims
         return bool(claims.get('is_admin', False))  # Vérifier le claim is_admin
     except Exception as e:
-        print(f"Erreur lors de la vérification admin: {e}")
+        logger.warning("Erreur lors de la vérification admin: %s", e)
         return False
 
 
 @api.route('/')
 class UserList(Resource):
+    @api.doc(params=page_params)
     @api.response(200, 'List of users retrieved successfully')
+    @api.response(304, 'Not modified since the ETag sent in If-None-Match')
+    @api.response(400, 'Invalid pagination parameters')
+    @cached_collection('users')
+    @query_budget(2)
     def get(self):
         """Get list of all users"""
-        users = facade.get_all_users()
+        try:
+            limit, after = get_page_args()
+            if limit is None:
+                users, next_cursor = facade.get_all_users(), None
+            else:
+                users, next_cursor = facade.get_users_page(limit, after)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         return [{'id': user.id,
                  'first_name': user.first_name,
                  'last_name': user.last_name,
-                 'email': user.email} for user in users], 200
+                 'email': user.email} for user in users], 200, page_headers(next_cursor)
 
     @api.expect(user_model, validate=True)
     @jwt_required()  # Require authentication to create a new user
@@ -50,63 +66,52 @@ class UserList(Resource):
     def post(self):
         """Register a new user (Admin only)"""
         try:
-            # Débogage des claims JWT
-            claims = get_jwt()
-            print(f"DEBUG - JWT claims: {claims}")
-            
             # Utiliser la fonction is_admin_user existante
-            admin_status = is_admin_user()
-            print(f"DEBUG - Admin status: {admin_status}")
-            
-            if not admin_status:
+            if not is_admin_user():
                 return {'error': 'Admin privileges required'}, 403
 
-            from app import bcrypt  # Import différé pour éviter les imports circulaires
             user_data = api.payload
-            print(f"DEBUG - User data: {user_data}")
 
             # Check if email is already in use
             existing_user = facade.get_user_by_email(user_data['email'])
             if existing_user:
                 return {'error': 'Email already registered'}, 400
 
-            # Hash the password before storing it
-            hashed_password = bcrypt.generate_password_hash(user_data['password']).decode('utf-8')
-            user_data['password'] = hashed_password
-
-            # Create the new user
+            # Create the new user (the password is hashed once, by the User model)
             new_user = facade.create_user(user_data)
 
             # Return only the user's ID and a success message (exclude password)
             return {'id': new_user.id, 'message': 'User successfully created'}, 201
+        except ValueError as e:
+            return {'error': str(e)}, 400
         except Exception as e:
-            # Afficher plus d'informations sur l'erreur
-            import traceback
-            print(f"DEBUG - Exception dans post: {e}")
-            traceback.print_exc()
-            
-            # Puis continuer avec la gestion d'erreur existante
-            if isinstance(e, ValueError):
-                return {'error': str(e)}, 400
-            else:
-                return {'error': f"Unexpected error: {str(e)}"}, 500
+            # La trace complète va dans les logs, pas dans la réponse
+            logger.exception("Unexpected error while creating a user")
+            return {'error': f"Unexpected error: {str(e)}"}, 500
 
 
 @api.route('/<id>')
 class UserResource(Resource):
     @api.response(200, 'User details retrieved successfully')
+    @api.response(304, 'Not modified since the ETag or date sent by the client')
     @api.response(404, 'User not found')
+    @query_budget(1)
     def get(self, id):
         """Get user details by ID"""
         user = facade.get_user(id)
         if not user:
             return {'error': 'User not found'}, 404
 
+        etag, last_modified = entity_validators(user)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+
         # Exclude the password from the response
         return {'id': user.id,
                 'first_name': user.first_name,
                 'last_name': user.last_name,
-                'email': user.email}, 200
+                'email': user.email}, 200, validator_headers(etag, last_modified)
 
     @jwt_required()  # Require authentication to update a user's details
     @api.expect(user_update_model, validate=True)
@@ -123,7 +128,6 @@ class UserResource(Resource):
         if not is_admin and str(current_user_id) != id:
             return {'error': "Unauthorized action"}, 403
 
-        from app import bcrypt  # Import différé pour éviter les imports circulaires
         update_data = api.payload
 
         # Prevent modification of email and password by regular users
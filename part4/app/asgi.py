@@ -0,0 +1,581 @@
+"""
+ASGI serving mode: the users, places, reviews, amenities, auth and search
+endpoints of the API on Starlette, with SQLAlchemy's asyncio extension.
+
+A request waiting on the database awaits instead of holding a worker
+thread, so one process serves thousands of concurrent clients (run with
+`uvicorn asgi:app`, see asgi.py next to run.py). Routes, JSON bodies, status
+codes, JWTs and ETags are the same as the Flask app's, and both can serve
+the same database side by side. The validation, search, ETag and pagination
+helpers are the Flask API's own (app/api/v1), the facade is its async twin.
+
+Not served here, use the Flask app: bulk creation (/amenities/bulk,
+/places/bulk, /reviews/bulk) and /export, which stream whole datasets
+through the sync session in one transaction; /protector/protected (a JWT
+demo), /metrics, and the Swagger UI and static files.
+
+Needs starlette, aiosqlite (or the async driver of the database) and an
+ASGI server such as uvicorn.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+import jwt as pyjwt
+from flask import Config as Settings
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.endpoints import HTTPEndpoint
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from werkzeug.http import parse_date, parse_etags
+from app.api.v1.conditional import collection_etag, entity_validators, is_fresh, validator_headers
+from app.api.v1.pagination import parse_page_args
+from app.api.v1.places import parse_place_listing, place_to_dict
+from app.api.v1.search import parse_search_args
+from app.extensions import apply_sqlite_pragmas, hasher, repository_cache, response_cache
+from app.persistence.repository import encode_cursor
+from app.logs import configure_logging
+from app.services.async_facade import AsyncHBnBFacade
+
+logger = logging.getLogger(__name__)
+
+# Same place as the Flask app's instance folder, where relative SQLite paths point
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INSTANCE_PATH = os.path.join(PACKAGE_ROOT, 'instance')
+
+# Async driver of each database, replacing the sync one of SQLALCHEMY_DATABASE_URI
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'mysql': 'mysql+aiomysql',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_database_uri(uri):
+    """Turn SQLALCHEMY_DATABASE_URI into the URL of the same database with an async driver"""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for {backend} databases")
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == 'sqlite' and url.database and url.database != ':memory:' and not os.path.isabs(url.database):
+        os.makedirs(INSTANCE_PATH, exist_ok=True)
+        url = url.set(database=os.path.join(INSTANCE_PATH, url.database))
+    return url
+
+
+def load_settings(config_class):
+    settings = Settings(PACKAGE_ROOT)
+    settings.from_object(config_class)
+    return settings
+
+
+class PayloadError(Exception):
+    """Invalid request body, answered with a 400 and the given JSON body"""
+
+    def __init__(self, body):
+        super().__init__(body)
+        self.body = body
+
+
+async def payload_error(request, exc):
+    return JSONResponse(exc.body, 400)
+
+
+async def get_payload(request, required=()):
+    """Read the JSON body, checking the required fields like flask-restx's validate=True"""
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise PayloadError({'message': "Failed to decode JSON object"})
+    if not isinstance(payload, dict):
+        raise PayloadError({'message': "Input payload validation failed"})
+    missing = [field for field in required if field not in payload]
+    if missing:
+        raise PayloadError({'errors': {field: f"'{field}' is a required property" for field in missing},
+                            'message': "Input payload validation failed"})
+    return payload
+
+
+def get_page_args(request):
+    return parse_page_args(request.query_params, request.app.state.settings)
+
+
+def page_headers(request, next_cursor):
+    """Build the response headers pointing to the next page, if there is one"""
+    if not next_cursor:
+        return {}
+    next_url = request.url.include_query_params(after=next_cursor)
+    return {'X-Next-Cursor': next_cursor, 'Link': f'<{next_url}>; rel="next"'}
+
+
+def not_modified(request, etag, last_modified=None):
+    """conditional.not_modified: a 304 response if the client's copy is still current, None otherwise"""
+    if not is_fresh(etag, last_modified, parse_etags(request.headers.get('If-None-Match')),
+                    parse_date(request.headers.get('If-Modified-Since'))):
+        return None
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+def entity_response(request, body, obj):
+    """The 200 response of a single object with its validators, or a 304"""
+    etag, last_modified = entity_validators(obj)
+    return not_modified(request, etag, last_modified) or JSONResponse(body, 200,
+                                                                      validator_headers(etag, last_modified))
+
+
+def cached_collection(*names):
+    """
+    conditional.cached_collection for the methods below with_facade: the
+    same ETags as the Flask app's, 304s while the versions of the tables are
+    unchanged, and the 200 responses kept in response_cache.
+    """
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(self, request, facade):
+            versions = [await facade.get_collection_version(name) for name in names]
+            etag = collection_etag(names, versions, f'{request.url.path}?{request.url.query}')
+            cached = not_modified(request, etag)
+            if cached:
+                return cached
+            hit = response_cache.get(etag)
+            if hit is not None:
+                data, headers = hit
+                return Response(data, 200, headers, media_type='application/json')
+
+            response = await method(self, request, facade)
+            if response.status_code != 200:
+                return response
+            response.headers.update(validator_headers(etag))
+            response_cache.set(etag, (response.body, {name: value for name, value in response.headers.items()
+                                                      if name not in ('content-length', 'content-type')}))
+            return response
+        return wrapper
+    return decorator
+
+
+def create_access_token(settings, identity, additional_claims):
+    """Issue a token with the claims flask-jwt-extended puts in its access tokens"""
+    now = datetime.now(timezone.utc)
+    claims = {'fresh': False, 'iat': now, 'jti': str(uuid.uuid4()), 'type': 'access', 'sub': identity,
+              'nbf': now, 'exp': now + settings.get('JWT_ACCESS_TOKEN_EXPIRES', timedelta(minutes=15))}
+    claims.update(additional_claims)
+    return pyjwt.encode(claims, settings['JWT_SECRET_KEY'], algorithm='HS256')
+
+
+def with_facade(method):
+    """Open the request's AsyncSession and pass the method a facade bound to it"""
+    @wraps(method)
+    async def wrapper(self, request):
+        async with request.app.state.sessions() as session:
+            return await method(self, request, AsyncHBnBFacade(session, request.app.state.write_lock))
+    return wrapper
+
+
+def jwt_required(method):
+    """Async flask_jwt_extended.jwt_required(): the claims end up in request.state.jwt"""
+    @wraps(method)
+    async def wrapper(self, request, *args):
+        header = request.headers.get('Authorization')
+        if not header:
+            return JSONResponse({'msg': "Missing Authorization Header"}, 401)
+        scheme, _, token = header.partition(' ')
+        if scheme != 'Bearer' or not token:
+            return JSONResponse({'msg': "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"}, 422)
+        try:
+            claims = pyjwt.decode(token, request.app.state.settings['JWT_SECRET_KEY'], algorithms=['HS256'])
+        except pyjwt.ExpiredSignatureError:
+            return JSONResponse({'msg': "Token has expired"}, 401)
+        except pyjwt.InvalidTokenError as e:
+            return JSONResponse({'msg': str(e)}, 422)
+        if claims.get('type') != 'access':
+            return JSONResponse({'msg': "Only non-refresh tokens are allowed"}, 422)
+        request.state.jwt = claims
+        return await method(self, request, *args)
+    return wrapper
+
+
+def get_jwt_identity(request):
+    return request.state.jwt['sub']
+
+
+def is_admin_user(request):
+    return bool(request.state.jwt.get('is_admin', False))
+
+
+def user_to_dict(user):
+    return {'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email}
+
+
+def amenity_to_dict(amenity):
+    return {'id': amenity.id, 'name': amenity.name}
+
+
+def review_to_dict(review):
+    return {'id': review.id, 'text': review.text, 'rating': review.rating,
+            'user_id': review.user_id, 'place_id': review.place_id}
+
+
+class Login(HTTPEndpoint):
+    @with_facade
+    async def post(self, request, facade):
+        credentials = await get_payload(request)
+        user = await facade.authenticate(credentials['email'], credentials['password'])
+        if not user:
+            return JSONResponse({'error': 'Invalid credentials'}, 401)
+        access_token = create_access_token(request.app.state.settings, str(user.id), {'is_admin': user.is_admin})
+        return JSONResponse({'access_token': access_token}, 200)
+
+
+class UserList(HTTPEndpoint):
+    @with_facade
+    @cached_collection('users')
+    async def get(self, request, facade):
+        try:
+            limit, after = get_page_args(request)
+            if limit is None:
+                users, next_cursor = await facade.get_all_users(), None
+            else:
+                users, next_cursor = await facade.get_users_page(limit, after)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        return JSONResponse([user_to_dict(user) for user in users], 200, page_headers(request, next_cursor))
+
+    @with_facade
+    @jwt_required
+    async def post(self, request, facade):
+        if not is_admin_user(request):
+            return JSONResponse({'error': 'Admin privileges required'}, 403)
+        user_data = await get_payload(request, ('first_name', 'last_name', 'email', 'password'))
+        try:
+            if await facade.get_user_by_email(user_data['email']):
+                return JSONResponse({'error': 'Email already registered'}, 400)
+            new_user = await facade.create_user(user_data)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        return JSONResponse({'id': new_user.id, 'message': 'User successfully created'}, 201)
+
+
+class UserResource(HTTPEndpoint):
+    @with_facade
+    async def get(self, request, facade):
+        user = await facade.get_user(request.path_params['id'])
+        if not user:
+            return JSONResponse({'error': 'User not found'}, 404)
+        return entity_response(request, user_to_dict(user), user)
+
+    @with_facade
+    @jwt_required
+    async def put(self, request, facade):
+        user_id = request.path_params['id']
+        is_admin = is_admin_user(request)
+        if not is_admin and get_jwt_identity(request) != user_id:
+            return JSONResponse({'error': "Unauthorized action"}, 403)
+        update_data = await get_payload(request)
+        if not is_admin and ('email' in update_data or 'password' in update_data):
+            return JSONResponse({'error': "You cannot modify email or password"}, 400)
+        try:
+            updated_user = await facade.update_user(user_id, update_data)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        if not updated_user:
+            return JSONResponse({'error': "User not found"}, 404)
+        return JSONResponse(user_to_dict(updated_user), 200)
+
+    @with_facade
+    @jwt_required
+    async def delete(self, request, facade):
+        if not is_admin_user(request):
+            return JSONResponse({'error': "Admin privileges required"}, 403)
+        try:
+            deleted = await facade.delete_user(request.path_params['id'])
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        if not deleted:
+            return JSONResponse({'error': "User not found"}, 404)
+        return JSONResponse({'message': "User successfully deleted"}, 200)
+
+
+class AmenityList(HTTPEndpoint):
+    @with_facade
+    @cached_collection('amenities')
+    async def get(self, request, facade):
+        try:
+            limit, after = get_page_args(request)
+            if limit is None:
+                amenities, next_cursor = await facade.get_all_amenities(), None
+            else:
+                amenities, next_cursor = await facade.get_amenities_page(limit, after)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        return JSONResponse([amenity_to_dict(amenity) for amenity in amenities], 200,
+                            page_headers(request, next_cursor))
+
+    @with_facade
+    @jwt_required
+    async def post(self, request, facade):
+        if not is_admin_user(request):
+            return JSONResponse({'error': 'Admin privileges required'}, 403)
+        try:
+            new_amenity = await facade.create_amenity(await get_payload(request))
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        return JSONResponse(amenity_to_dict(new_amenity), 201)
+
+
+class AmenityResource(HTTPEndpoint):
+    @with_facade
+    async def get(self, request, facade):
+        amenity = await facade.get_amenity(request.path_params['amenity_id'])
+        if not amenity:
+            return JSONResponse({'error': 'Amenity not found'}, 404)
+        return entity_response(request, amenity_to_dict(amenity), amenity)
+
+    @with_facade
+    @jwt_required
+    async def put(self, request, facade):
+        if not is_admin_user(request):
+            return JSONResponse({'error': 'Admin privileges required'}, 403)
+        try:
+            updated_amenity = await facade.update_amenity(request.path_params['amenity_id'],
+                                                          await get_payload(request))
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        if not updated_amenity:
+            return JSONResponse({'error': 'Amenity not found'}, 404)
+        return JSONResponse(amenity_to_dict(updated_amenity), 200)
+
+
+class PlaceList(HTTPEndpoint):
+    @with_facade
+    @cached_collection('places')
+    async def get(self, request, facade):
+        try:
+            limit, after = get_page_args(request)
+            filters, sort, near = parse_place_listing(request.query_params, limit, after)
+            if near:
+                results = await facade.get_places_near(*near, limit=limit, **filters)
+                return JSONResponse([dict(place_to_dict(place), distance_km=round(distance, 3))
+                                     for place, distance in results], 200)
+            if limit is None:
+                places, next_cursor = await facade.get_all_places(sort=sort, **filters), None
+            else:
+                places, next_cursor = await facade.get_places_page(limit, after, **filters)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        return JSONResponse([place_to_dict(place) for place in places], 200, page_headers(request, next_cursor))
+
+    @with_facade
+    @jwt_required
+    async def post(self, request, facade):
+        place_data = await get_payload(request, ('title', 'price', 'latitude', 'longitude', 'owner_id',
+                                                 'amenities'))
+        # Only admins choose the owner, the others always own what they create
+        if 'owner_id' in place_data and is_admin_user(request):
+            if not await facade.get_user(place_data['owner_id']):
+                return JSONResponse({'error': f"User with ID {place_data['owner_id']} not found"}, 400)
+        else:
+            place_data['owner_id'] = get_jwt_identity(request)
+        try:
+            new_place = await facade.create_place(place_data)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        return JSONResponse(place_to_dict(new_place), 201)
+
+
+class PlaceResource(HTTPEndpoint):
+    @with_facade
+    async def get(self, request, facade):
+        place = await facade.get_place(request.path_params['place_id'])
+        if not place:
+            return JSONResponse({'error': 'Place not found'}, 404)
+        return entity_response(request, place_to_dict(place), place)
+
+    @with_facade
+    @jwt_required
+    async def put(self, request, facade):
+        place_id = request.path_params['place_id']
+        place = await facade.get_place(place_id)
+        if not place:
+            return JSONResponse({'error': "Place not found"}, 404)
+        if not is_admin_user(request) and str(place.owner_id) != get_jwt_identity(request):
+            return JSONResponse({'error': "Unauthorized action"}, 403)
+        try:
+            updated_place = await facade.update_place(place_id, await get_payload(request))
+        except ValueError as e:
+            logger.error("Validation error while updating place: %s", e)
+            return JSONResponse({'error': str(e)}, 400)
+        return JSONResponse(place_to_dict(updated_place), 200)
+
+    @with_facade
+    @jwt_required
+    async def delete(self, request, facade):
+        place_id = request.path_params['place_id']
+        place = await facade.get_place(place_id)
+        if not place:
+            return JSONResponse({'error': "Place not found"}, 404)
+        if not is_admin_user(request) and str(place.owner_id) != get_jwt_identity(request):
+            return JSONResponse({'error': "Unauthorized action"}, 403)
+        try:
+            await facade.delete_place(place_id)
+        except Exception as e:
+            logger.error("Unexpected error while deleting a place: %s", e)
+            return JSONResponse({'error': "Internal server error"}, 500)
+        return JSONResponse({'message': "Place deleted successfully"}, 200)
+
+
+class ReviewList(HTTPEndpoint):
+    @with_facade
+    @cached_collection('reviews')
+    async def get(self, request, facade):
+        try:
+            limit, after = get_page_args(request)
+            if limit is None:
+                reviews, next_cursor = await facade.get_all_reviews(), None
+            else:
+                reviews, next_cursor = await facade.get_reviews_page(limit, after)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        return JSONResponse([review_to_dict(review) for review in reviews], 200, page_headers(request, next_cursor))
+
+    @with_facade
+    @jwt_required
+    async def post(self, request, facade):
+        review_data = await get_payload(request, ('text', 'rating', 'place_id'))
+        try:
+            place = await facade.get_place(review_data['place_id'])
+            if not place:
+                return JSONResponse({'error': "Place not found"}, 400)
+            if str(place.owner_id) == get_jwt_identity(request):
+                return JSONResponse({'error': "You cannot review your own place"}, 403)
+            review_data['user_id'] = get_jwt_identity(request)
+            new_review = await facade.create_review(review_data)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        return JSONResponse(review_to_dict(new_review), 201)
+
+
+class ReviewResource(HTTPEndpoint):
+    @with_facade
+    async def get(self, request, facade):
+        review = await facade.get_review(request.path_params['review_id'])
+        if not review:
+            return JSONResponse({'error': 'Review not found'}, 404)
+        return entity_response(request, review_to_dict(review), review)
+
+    @with_facade
+    @jwt_required
+    async def put(self, request, facade):
+        review_id = request.path_params['review_id']
+        review = await facade.get_review(review_id)
+        if not review:
+            return JSONResponse({'error': "Review not found"}, 404)
+        if str(review.user_id) != get_jwt_identity(request):
+            return JSONResponse({'error': "Unauthorized action"}, 403)
+        try:
+            updated_review = await facade.update_review(review_id, await get_payload(request))
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        return JSONResponse(review_to_dict(updated_review), 200)
+
+    @with_facade
+    @jwt_required
+    async def delete(self, request, facade):
+        review_id = request.path_params['review_id']
+        review = await facade.get_review(review_id)
+        if not review:
+            return JSONResponse({'error': "Review not found"}, 404)
+        if str(review.user_id) != get_jwt_identity(request):
+            return JSONResponse({'error': "Unauthorized action"}, 403)
+        await facade.delete_review(review_id)
+        return JSONResponse({'message': "Review deleted successfully"}, 200)
+
+
+class PlaceReviewList(HTTPEndpoint):
+    @with_facade
+    @cached_collection('reviews', 'places')
+    async def get(self, request, facade):
+        try:
+            limit, after = get_page_args(request)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        place_id = request.path_params['place_id']
+        try:
+            if limit is None:
+                reviews, next_cursor = await facade.get_reviews_by_place(place_id), None
+            else:
+                reviews, next_cursor = await facade.get_reviews_by_place_page(place_id, limit, after)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 404)
+        return JSONResponse([{'id': review.id, 'text': review.text, 'rating': review.rating,
+                              'user_id': review.user_id} for review in reviews], 200,
+                            page_headers(request, next_cursor))
+
+
+class Search(HTTPEndpoint):
+    @with_facade
+    async def get(self, request, facade):
+        try:
+            query, kind, limit, offset = parse_search_args(request.query_params, request.app.state.settings)
+            results = await facade.search(query, kind, limit + 1, offset)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        next_cursor = encode_cursor(offset + limit) if len(results) > limit else None
+        return JSONResponse(results[:limit], 200, page_headers(request, next_cursor))
+
+
+routes = [
+    Route('/api/v1/auth/login', Login),
+    Route('/api/v1/users/', UserList),
+    Route('/api/v1/users/{id}', UserResource),
+    Route('/api/v1/amenities/', AmenityList),
+    Route('/api/v1/amenities/{amenity_id}', AmenityResource),
+    Route('/api/v1/places/', PlaceList),
+    Route('/api/v1/places/{place_id}', PlaceResource),
+    Route('/api/v1/reviews/', ReviewList),
+    Route('/api/v1/reviews/{review_id}', ReviewResource),
+    Route('/api/v1/reviews/places/{place_id}/reviews', PlaceReviewList),
+    Route('/api/v1/search/', Search),
+]
+
+
+def create_asgi_app(config_class="config.DevelopmentConfig"):
+    """Create the ASGI application, configured like create_app"""
+    settings = load_settings(config_class)
+    configure_logging(settings)
+    hasher.configure(settings)
+    repository_cache.configure(settings)
+    response_cache.configure(settings)
+
+    engine = create_async_engine(async_database_uri(settings['SQLALCHEMY_DATABASE_URI']),
+                                 **settings.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    apply_sqlite_pragmas(engine.sync_engine, settings.get('SQLITE_PRAGMAS'))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Like create_app, no DDL at startup: the tables come from `flask hbnb init-db`
+        yield
+        await engine.dispose()
+
+    app = Starlette(
+        debug=settings.get('DEBUG', False),
+        routes=routes,
+        middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['GET', 'POST', 'OPTIONS'],
+                               allow_headers=['Content-Type', 'Authorization'])],
+        exception_handlers={PayloadError: payload_error},
+        lifespan=lifespan,
+    )
+    app.state.settings = settings
+    app.state.engine = engine
+    # Objects stay usable after commit: reloading them would need an await
+    app.state.sessions = async_sessionmaker(engine, expire_on_commit=False)
+    # SQLite has a single writer: queue write transactions here rather than in busy_timeout
+    app.state.write_lock = asyncio.Lock() if engine.dialect.name == 'sqlite' else None
+    return app
@@ -0,0 +1,294 @@
+import pickle
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.metrics import CACHE_LOOKUPS
+
+
+class CacheBackend(ABC):
+    """Storage used by RepositoryCache: string keys, picklable values, per-entry TTL."""
+
+    @abstractmethod
+    def get(self, key):
+        """Return the value stored under key, or None if missing or expired."""
+        pass
+
+    @abstractmethod
+    def set(self, key, value):
+        """Store a value under key."""
+        pass
+
+    @abstractmethod
+    def delete(self, *keys):
+        """Remove the given keys."""
+        pass
+
+    @abstractmethod
+    def delete_prefix(self, prefix):
+        """Remove every key starting with prefix."""
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """Remove every key."""
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class LRUCache(CacheBackend):
+    """In-process cache, least recently used entries are evicted first."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache shared by every worker process, stored in Redis (or any server
+    speaking its protocol). Takes a redis-py compatible client.
+    """
+
+    def __init__(self, client, ttl=60, prefix='hbnb:cache:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else pickle.loads(raw)
+
+    def set(self, key, value):
+        self.client.setex(self.prefix + key, self.ttl, pickle.dumps(value))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def delete_prefix(self, prefix):
+        keys = list(self.client.scan_iter(match=self.prefix + prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        self.delete_prefix('')
+
+
+class RepositoryCache:
+    """
+    Read-through cache of rows fetched by ID, shared by the cached repositories.
+
+    Entries are invalidated when the repositories write, and when a session
+    commits changes to a cached row whatever code made them (ORM flushes and
+    ORM-enabled bulk UPDATE/DELETE statements). Configuration:
+
+    - REPOSITORY_CACHE_BACKEND: 'memory' (one process only: other processes
+      don't see its invalidations), 'redis' or None (default) to disable
+    - REPOSITORY_CACHE_SIZE: maximum entries of the in-process cache (default 1024)
+    - REPOSITORY_CACHE_TTL: seconds an entry stays valid (default 60)
+    - REPOSITORY_CACHE_REDIS_URL: server used by the 'redis' backend (needs redis-py)
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self._lock = Lock()
+        self.reset_stats()
+        self._listen()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.configure(app.config)
+        app.extensions['repository_cache'] = self
+
+    def configure(self, config):
+        """Pick the backend from a configuration mapping (the ASGI app has no Flask app to init)."""
+        name = config.get('REPOSITORY_CACHE_BACKEND')
+        ttl = config.get('REPOSITORY_CACHE_TTL', 60)
+        if name == 'memory':
+            self.backend = LRUCache(config.get('REPOSITORY_CACHE_SIZE', 1024), ttl)
+        elif name == 'redis':
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("REPOSITORY_CACHE_BACKEND = 'redis' requires the redis package")
+            self.backend = RedisCache(redis.Redis.from_url(config['REPOSITORY_CACHE_REDIS_URL']), ttl)
+        elif name is None:
+            self.backend = None
+        else:
+            raise ValueError("REPOSITORY_CACHE_BACKEND must be 'memory', 'redis' or None")
+        self.reset_stats()
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    @staticmethod
+    def key(model, obj_id):
+        return f"{model.__tablename__}:{obj_id}"
+
+    def get(self, model, obj_id):
+        value = self.backend.get(self.key(model, obj_id))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        CACHE_LOOKUPS.inc(cache='repository', result='miss' if value is None else 'hit')
+        return value
+
+    def set(self, model, obj_id, value):
+        self.backend.set(self.key(model, obj_id), value)
+
+    def invalidate(self, model, *obj_ids):
+        obj_ids = [obj_id for obj_id in obj_ids if obj_id is not None]
+        if self.enabled and obj_ids:
+            self.backend.delete(*[self.key(model, obj_id) for obj_id in obj_ids])
+            with self._lock:
+                self.invalidations += len(obj_ids)
+
+    def invalidate_model(self, model):
+        if self.enabled:
+            self.backend.delete_prefix(f"{model.__tablename__}:")
+            with self._lock:
+                self.invalidations += 1
+
+    def clear(self):
+        if self.enabled:
+            self.backend.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self):
+        """Counters for monitoring: hits, misses, invalidations, hit_ratio and size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': type(self.backend).__name__ if self.enabled else None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': self.hits / lookups if lookups else None,
+                'size': len(self.backend) if self.enabled else 0,
+            }
+
+    # Session hooks: rows changed in a transaction are evicted when it is
+    # flushed, and again when it ends since a concurrent request may have
+    # cached the old committed row in between.
+
+    def _pending(self, session):
+        return session.info.setdefault('repository_cache_pending', set())
+
+    def _after_flush(self, session, flush_context):
+        if not self.enabled:
+            return
+        changed = {(type(obj), obj.id) for obj in list(session.dirty) + list(session.deleted)
+                   if hasattr(obj, '__tablename__') and getattr(obj, 'id', None) is not None}
+        for model, obj_id in changed:
+            self.invalidate(model, obj_id)
+        self._pending(session).update(changed)
+
+    def _do_orm_execute(self, state):
+        if self.enabled and (state.is_update or state.is_delete):
+            for mapper in state.all_mappers:
+                self._pending(state.session).add((mapper.class_, None))
+                self.invalidate_model(mapper.class_)
+
+    def _after_transaction(self, session):
+        pending = session.info.pop('repository_cache_pending', None)
+        if not pending or not self.enabled:
+            return
+        for model, obj_id in pending:
+            if obj_id is None:
+                self.invalidate_model(model)
+            else:
+                self.invalidate(model, obj_id)
+
+    def _listen(self):
+        event.listen(Session, 'after_flush', self._after_flush)
+        event.listen(Session, 'do_orm_execute', self._do_orm_execute)
+        event.listen(Session, 'after_commit', self._after_transaction)
+        event.listen(Session, 'after_soft_rollback', lambda session, previous: self._after_transaction(session))
+
+
+class ResponseCache:
+    """
+    In-process cache of rendered collection responses, keyed by their ETag.
+
+    The ETag embeds the table version, so a write to the table makes the
+    next request miss: entries never need to be invalidated, only evicted.
+    Configuration:
+
+    - RESPONSE_CACHE_SIZE: maximum number of responses kept, 0 disables (default 256)
+    - RESPONSE_CACHE_TTL: seconds a response is kept (default 300)
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.configure(app.config)
+        app.extensions['response_cache'] = self
+
+    def configure(self, config):
+        """Read the settings from a configuration mapping (also used by the ASGI app)."""
+        size = config.get('RESPONSE_CACHE_SIZE', 256)
+        self.backend = LRUCache(size, config.get('RESPONSE_CACHE_TTL', 300)) if size else None
+
+    def get(self, etag):
+        if self.backend is None:
+            return None
+        response = self.backend.get(etag)
+        CACHE_LOOKUPS.inc(cache='response', result='miss' if response is None else 'hit')
+        return response
+
+    def set(self, etag, response):
+        if self.backend is not None:
+            self.backend.set(etag, response)
@@ -0,0 +1,115 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import inspect
+
+# Maintenance commands, available as `flask hbnb <command>`
+hbnb_cli = AppGroup('hbnb', help='HBnB maintenance commands.')
+
+
+@hbnb_cli.command('init-db')
+def init_db():
+    """Create the tables, or upgrade the database to the latest migration (safe to run at each deploy)."""
+    from app.extensions import db, migrate
+    from app.schema import create_all_revision
+    flask_migrate = migrate.load(current_app)
+    tables = inspect(db.engine).get_table_names()
+    if tables and 'alembic_version' not in tables:
+        # Created by db.create_all() before the migrations: stamped with the
+        # revision of the same schema, the next ones are applied below
+        revision = create_all_revision(db.engine, db.metadata)
+        if revision is None:
+            raise click.ClickException(
+                "The database has tables but no migration history, and they don't match a known "
+                "schema of the app: upgrade it by hand, then run `flask db stamp <revision>`")
+        flask_migrate.stamp(revision=revision)
+    flask_migrate.upgrade()
+    replicator = current_app.extensions.get('sqlite_replicator')
+    if replicator is not None:
+        replicator.sync()
+    click.echo("Database schema up to date")
+
+
+@hbnb_cli.command('check-indexes')
+def check_indexes():
+    """List the foreign keys without an index (fails if there are any)."""
+    from app.extensions import db
+    from app.schema import unindexed_foreign_keys
+    missing = unindexed_foreign_keys(db.engine)
+    for table, columns in missing:
+        click.echo(f"{table} ({', '.join(columns)}): foreign key without an index", err=True)
+    if missing:
+        raise click.ClickException(f"{len(missing)} foreign keys without an index")
+    click.echo("Every foreign key is indexed")
+
+
+@hbnb_cli.command('rebuild-ratings')
+def rebuild_ratings():
+    """Recompute the review count and rating sum of every place."""
+    from app.services import facade
+    count = facade.rebuild_rating_aggregates()
+    click.echo(f"Rebuilt rating aggregates for {count} places")
+
+
+@hbnb_cli.command('rebuild-geohashes')
+def rebuild_geohashes():
+    """Recompute the geohash used by the spatial search for every place."""
+    from app.services import facade
+    count = facade.rebuild_geohashes()
+    click.echo(f"Rebuilt geohashes for {count} places")
+
+
+@hbnb_cli.command('rebuild-search')
+def rebuild_search():
+    """Recreate the full-text search index from the places and reviews tables."""
+    from app.services import facade
+    count = facade.rebuild_search_index()
+    click.echo(f"Indexed {count} places and reviews")
+
+
+@hbnb_cli.command('export')
+@click.option('--entities', default='', help='Comma separated tables to export (default: all).')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Output file (default: stdout).')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows fetched per round trip.')
+def export(entities, output, batch_size):
+    """Export the dataset as JSON Lines, in constant memory."""
+    from app.services import facade
+    try:
+        lines = facade.export_dataset([name for name in entities.split(',') if name], batch_size)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--entities')
+    for line in lines:
+        output.write(line)
+
+
+@hbnb_cli.command('import')
+@click.argument('files', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--entity', default=None,
+              help='Table of the rows of CSV or bare JSON Lines files (default: from the file name).')
+@click.option('--batch-size', default=5000, show_default=True, help='Records committed per transaction.')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint of an interrupted import.')
+def import_(files, entity, batch_size, restart):
+    """
+    Import JSON Lines (as written by export) or CSV files.
+
+    Progress is saved in FILE.checkpoint after each committed batch: running
+    the same command again after a crash resumes where it stopped.
+    """
+    from app.services import facade
+    from app.services.importer import Checkpoint
+    for path in files:
+        checkpoint = Checkpoint(f"{path}.checkpoint", path)
+        if restart:
+            checkpoint.clear()
+        try:
+            stats = facade.import_dataset(
+                path, entity, batch_size, checkpoint,
+                on_error=lambda line, name, message: click.echo(f"{path}:{line}: {name}: {message}", err=True),
+                on_progress=lambda records, counters: click.echo(f"{path}: {records} records", err=True),
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        for name, counters in stats.items():
+            if any(counters.values()):
+                click.echo(f"{name}: {counters['inserted']} inserted, {counters['skipped']} already present, "
+                           f"{counters['rejected']} rejected")
@@ -1,7 +1,91 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
+from sqlalchemy import Column, Integer, String, event, insert, select, update
+from sqlalchemy.orm import Session
+from app.hashing import PasswordHasher
+from app.cache import RepositoryCache, ResponseCache
+from app.routing import RoutingSession
+from app.instrumentation import QueryStats
+from app.metrics import Metrics
+from app.schema import LazyMigrate
 
 jwt = JWTManager()
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
+hasher = PasswordHasher()
+repository_cache = RepositoryCache()
+response_cache = ResponseCache()
+query_stats = QueryStats()
+metrics = Metrics()
+migrate = LazyMigrate()
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run PRAGMA statements on each new connection of a SQLite engine (no-op for other databases)."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+# One change counter per table, incremented in the transaction that writes
+# to the table: list endpoints compare it instead of scanning the table to
+# know whether their cached response is still valid.
+table_versions = db.Table(
+    'table_versions',
+    Column('table_name', String(64), primary_key=True),
+    Column('version', Integer, nullable=False, default=0),
+)
+
+
+@event.listens_for(table_versions, 'after_create')
+def _seed_table_versions(target, connection, **kw):
+    names = [table.name for table in db.metadata.sorted_tables if table is not table_versions]
+    connection.execute(insert(table_versions), [{'table_name': name, 'version': 0} for name in names])
+
+
+def bump_table_versions(connection, *names):
+    """Increment the version of the given tables (for writes made with raw SQL)."""
+    for name in sorted(set(names)):  # Same lock order in every transaction
+        result = connection.execute(update(table_versions)
+                                    .where(table_versions.c.table_name == name)
+                                    .values(version=table_versions.c.version + 1))
+        if result.rowcount == 0:
+            connection.execute(insert(table_versions).values(table_name=name, version=1))
+
+
+def get_table_version(name):
+    """Current version of a table, 0 if it was never written to."""
+    version = db.session.execute(select(table_versions.c.version)
+                                 .where(table_versions.c.table_name == name)).scalar()
+    return version or 0
+
+
+def _mapped_tables(mapper):
+    return [table.name for table in mapper.tables]
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_flushed_tables(session, flush_context):
+    names = set()
+    for obj in list(session.new) + list(session.deleted):
+        names.update(_mapped_tables(db.inspect(obj).mapper))
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            names.update(_mapped_tables(db.inspect(obj).mapper))
+    if names:
+        bump_table_versions(session.connection(), *names)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_bulk_tables(state):
+    # Bulk INSERT/UPDATE/DELETE statements don't go through the flush
+    if state.is_insert or state.is_update or state.is_delete:
+        names = [name for mapper in state.all_mappers for name in _mapped_tables(mapper)]
+        if names:
+            bump_table_versions(state.session.connection(), *names)
@@ -0,0 +1,106 @@
+"""Geohash and great-circle helpers used by the place spatial search."""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 12
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate into a geohash string of the given precision."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            bounds[0] = middle
+        else:
+            bits <<= 1
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Return the (height, width) in degrees of a geohash cell."""
+    lat_bits = (5 * precision) // 2
+    lng_bits = 5 * precision - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _cells_for_box(south, west, north, east, precision):
+    height, width = cell_size(precision)
+    lats = _steps(south, north, height)
+    lngs = _steps(west, east, width)
+    return {geohash_encode(lat, lng, precision) for lat in lats for lng in lngs}
+
+
+def _steps(start, stop, step):
+    values = []
+    value = start
+    while value < stop:
+        values.append(value)
+        value += step
+    values.append(stop)
+    return values
+
+
+def split_antimeridian(south, west, north, east):
+    """Split a bounding box crossing the antimeridian (west > east) in two."""
+    if west <= east:
+        return [(south, west, north, east)]
+    return [(south, west, north, 180.0), (south, -180.0, north, east)]
+
+
+def covering_cells(south, west, north, east, max_cells=16):
+    """
+    Return the geohash prefixes covering a bounding box.
+
+    The finest precision that needs at most ``max_cells`` prefixes is used, so
+    the search is a handful of index range scans on the geohash column.
+    """
+    boxes = split_antimeridian(south, west, north, east)
+    best = {''}
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = cell_size(precision)
+        estimate = sum((math.ceil((n - s) / height) + 1) * (math.ceil((e - w) / width) + 1)
+                       for s, w, n, e in boxes)
+        if estimate > max_cells:
+            break
+        best = set().union(*(_cells_for_box(s, w, n, e, precision) for s, w, n, e in boxes))
+    return sorted(best)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return (south, west, north, east) enclosing a circle on the sphere."""
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = latitude - delta_lat, latitude + delta_lat
+    if south <= -90.0 or north >= 90.0:
+        return max(south, -90.0), -180.0, min(north, 90.0), 180.0
+    delta_lng = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) /
+                                                 math.cos(math.radians(latitude)))))
+    west, east = longitude - delta_lng, longitude + delta_lng
+    if delta_lng >= 180.0:
+        return south, -180.0, north, 180.0
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+    return south, west, north, east
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres between two coordinates."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,184 @@
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from threading import Lock
+import bcrypt as _bcrypt
+from app.metrics import PASSWORD_HASH_TIME
+
+try:
+    import argon2
+except ImportError:  # argon2-cffi is optional, only needed for PASSWORD_HASH_SCHEME = 'argon2id'
+    argon2 = None
+
+SCHEMES = ('bcrypt', 'argon2id')
+
+
+def _bcrypt_hash(password, rounds):
+    return _bcrypt.hashpw(password.encode('utf-8'), _bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _bcrypt_verify(hashed, password):
+    try:
+        return _bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:  # Not a bcrypt hash
+        return False
+
+
+def _argon2_hash(password, params):
+    return argon2.PasswordHasher(*params).hash(password)
+
+
+def _argon2_verify(hashed, password):
+    try:
+        return argon2.PasswordHasher().verify(hashed, password)
+    except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+        return False
+
+
+def _verify(hashed, password):
+    """Check a password against a bcrypt or argon2 hash, whichever it is."""
+    if hashed.startswith('$argon2'):
+        return argon2 is not None and _argon2_verify(hashed, password)
+    return _bcrypt_verify(hashed, password)
+
+
+def is_password_hash(value):
+    """Tell whether a string already is a bcrypt or argon2 hash (e.g. a password from an export)."""
+    return isinstance(value, str) and value.startswith(('$2a$', '$2b$', '$2y$', '$argon2'))
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords in a bounded process pool.
+
+    Each bcrypt call costs hundreds of milliseconds of CPU at production cost
+    factors; running them in a pool sized to the machine's cores keeps a burst
+    of logins from saturating every request thread. Configuration:
+
+    - PASSWORD_HASH_SCHEME: 'bcrypt' (default) or 'argon2id' (needs argon2-cffi)
+    - BCRYPT_LOG_ROUNDS: bcrypt cost factor (default 12)
+    - ARGON2_TIME_COST, ARGON2_MEMORY_COST (KiB), ARGON2_PARALLELISM: argon2id parameters
+    - PASSWORD_HASH_POOL_SIZE: worker processes, 0 hashes inline (default: CPU count)
+
+    Hashes made with another scheme or older parameters keep verifying;
+    needs_rehash() tells when one should be replaced with a current hash.
+    """
+
+    def __init__(self, app=None):
+        self.scheme = 'bcrypt'
+        self.rounds = 12
+        self.argon2_params = (3, 65536, 4)
+        self.pool_size = 0
+        self._executor = None
+        self._background = None
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.configure(app.config)
+        app.extensions['password_hasher'] = self
+
+    def configure(self, config):
+        """Read the settings from a configuration mapping (also used by the ASGI app, see app/asgi.py)."""
+        self.scheme = config.get('PASSWORD_HASH_SCHEME', 'bcrypt')
+        if self.scheme not in SCHEMES:
+            raise ValueError(f"PASSWORD_HASH_SCHEME must be one of {', '.join(SCHEMES)}")
+        if self.scheme == 'argon2id' and argon2 is None:
+            raise RuntimeError("PASSWORD_HASH_SCHEME = 'argon2id' requires the argon2-cffi package")
+        self.rounds = config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.argon2_params = (config.get('ARGON2_TIME_COST', 3),
+                              config.get('ARGON2_MEMORY_COST', 65536),
+                              config.get('ARGON2_PARALLELISM', 4))
+        pool_size = config.get('PASSWORD_HASH_POOL_SIZE')
+        self.pool_size = (os.cpu_count() or 1) if pool_size is None else pool_size
+
+    def _run(self, func, *args):
+        if not self.pool_size:
+            return func(*args)
+        return self._get_executor().submit(func, *args).result()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a multi-threaded server process is not safe
+                self._executor = ProcessPoolExecutor(self.pool_size, mp_context=multiprocessing.get_context('spawn'))
+                atexit.register(self.shutdown)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._background is not None:
+                self._background.shutdown(wait=True)
+                self._background = None
+
+    def _hash_function(self):
+        if self.scheme == 'argon2id':
+            return _argon2_hash, self.argon2_params
+        return _bcrypt_hash, self.rounds
+
+    def hash(self, password):
+        """Return the hash of a password with the configured scheme, computed in the pool."""
+        func, params = self._hash_function()
+        with PASSWORD_HASH_TIME.time(operation='hash', scheme=self.scheme):
+            return self._run(func, password, params)
+
+    def hash_many(self, passwords):
+        """
+        Return the hashes of many passwords, in order, spread over every
+        worker of the pool (a bulk import keeps all cores busy).
+        """
+        func, params = self._hash_function()
+        passwords = list(passwords)
+        if not self.pool_size or not passwords:
+            return [func(password, params) for password in passwords]
+        # A few chunks per worker: less IPC than one task per password, still balanced
+        chunksize = max(1, len(passwords) // (self.pool_size * 4))
+        return list(self._get_executor().map(func, passwords, repeat(params), chunksize=chunksize))
+
+    def verify(self, hashed, password):
+        """Check a password against a stored hash, computed in the pool."""
+        if not hashed or password is None:
+            return False
+        with PASSWORD_HASH_TIME.time(operation='verify', scheme=self.scheme):
+            return self._run(_verify, hashed, password)
+
+    def needs_rehash(self, hashed):
+        """
+        Tell whether a stored hash was made with another scheme or other
+        parameters than the configured ones. Only parses the hash, cheap.
+        """
+        if self.scheme == 'argon2id':
+            if not hashed.startswith('$argon2id$'):
+                return True
+            return argon2.PasswordHasher(*self.argon2_params).check_needs_rehash(hashed)
+        if not hashed.startswith('$2'):
+            return True
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def rehash_later(self, password, callback):
+        """
+        Hash a password again in the background and pass the new hash to
+        callback, so the request that triggered it does not pay for it.
+        """
+        with self._lock:
+            if self._background is None:
+                self._background = ThreadPoolExecutor(1, thread_name_prefix='password-rehash')
+                atexit.register(self.shutdown)
+            background = self._background
+        return background.submit(lambda: callback(self.hash(password)))
+
+    def wait(self):
+        """Block until the pending background rehashes are done."""
+        with self._lock:
+            background = self._background
+        if background is not None:
+            background.submit(lambda: None).result()
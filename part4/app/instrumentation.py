@@ -0,0 +1,106 @@
+import logging
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """An endpoint issued more SQL statements than its declared budget."""
+
+
+def query_budget(max_queries):
+    """
+    Declare how many SQL statements an endpoint may issue per request (at
+    most). Catches N+1 queries: a list endpoint's budget doesn't grow with
+    the number of rows. Goes on the methods of a Resource:
+
+        @query_budget(2)
+        def get(self): ...
+    """
+    def decorator(method):
+        method.query_budget = max_queries
+        return method
+    return decorator
+
+
+class QueryStats:
+    """
+    Counts the SQL statements and database time of each request.
+
+    Hooks before/after_cursor_execute of every engine of the app. With
+    SERVER_TIMING, responses carry a Server-Timing header (statements and
+    database time, total time) that browser dev tools display. Statements
+    slower than SLOW_QUERY_MS are logged with the endpoint that sent them.
+    Endpoints declared with @query_budget that go over it log a warning, or
+    raise QueryBudgetExceeded with QUERY_BUDGET_ENFORCE (on in tests).
+
+    Statements sent while a streamed response body is generated come after
+    the headers and are not counted.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        with app.app_context():
+            for engine in app.extensions['sqlalchemy'].engines.values():
+                self.instrument(engine)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.extensions['query_stats'] = self
+
+    def instrument(self, engine):
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @staticmethod
+    def _start():
+        # On g, reset here: tests may reuse one app context for several requests
+        g.query_stats = {'count': 0, 'duration': 0.0, 'started': time.perf_counter()}
+
+    def _finish(self, response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+        if current_app.config.get('SERVER_TIMING', True):
+            total = time.perf_counter() - stats['started']
+            response.headers.add('Server-Timing',
+                                 f'db;desc="{stats["count"]} queries";dur={stats["duration"] * 1000:.2f}')
+            response.headers.add('Server-Timing', f'total;dur={total * 1000:.2f}')
+
+        budget = self.budget()
+        if budget is not None and stats['count'] > budget:
+            message = f"{request.method} {request.endpoint} issued {stats['count']} SQL statements, budget is {budget}"
+            if current_app.config.get('QUERY_BUDGET_ENFORCE'):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    @staticmethod
+    def budget():
+        """The @query_budget of the method handling the current request, if any"""
+        view = current_app.view_functions.get(request.endpoint)
+        method = getattr(getattr(view, 'view_class', None), request.method.lower(), view)
+        return getattr(method, 'query_budget', None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop('query_started')
+    if not has_request_context():
+        return
+    stats = g.get('query_stats')
+    if stats is not None:
+        stats['count'] += 1
+        stats['duration'] += elapsed
+    threshold = current_app.config.get('SLOW_QUERY_MS')
+    if threshold is not None and elapsed * 1000 >= threshold:
+        logger.warning("Slow query (%.1f ms) in %s %s: %s", elapsed * 1000, request.method, request.endpoint,
+                       statement)
@@ -0,0 +1,147 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import has_request_context, request
+
+# Attributes every LogRecord has: the others come from extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+_handlers = []
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, the request
+    being handled (method, path, endpoint) and the extra={...} fields.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_info = getattr(record, 'request', None)
+        if request_info:
+            entry['request'] = request_info
+        entry.update((key, value) for key, value in vars(record).items()
+                     if key not in _RECORD_ATTRIBUTES and key != 'request')
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the request being handled to each record: the listener thread has no request context."""
+
+    def filter(self, record):
+        if has_request_context() and not hasattr(record, 'request'):
+            record.request = {'method': request.method, 'path': request.path, 'endpoint': request.endpoint}
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of the DEBUG records of some loggers (and their
+    children): the repositories log every lookup. INFO and above are kept.
+
+    :param rates: {logger name: fraction of its DEBUG records kept}
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates)
+        self._by_logger = {}
+
+    def rate(self, name):
+        rate = self._by_logger.get(name)
+        if rate is None:
+            # Most specific logger name wins: 'app.persistence' covers 'app.persistence.repository'
+            matches = [prefix for prefix in self.rates if name == prefix or name.startswith(prefix + '.')]
+            rate = self._by_logger[name] = self.rates[max(matches, key=len)] if matches else 1.0
+        return rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self.rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class SnapshotQueueHandler(QueueHandler):
+    """
+    Put a copy of each record on the queue with its message rendered in the
+    calling thread, as the arguments were when logging was called: the
+    caller may change them right after (a dict, an ORM object...). Only the
+    records that passed the level and the filters (sampling) get here; the
+    layout (text or JSON) and the write are left to the listener thread.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(config):
+    """
+    Set up the root logger from a configuration mapping:
+
+    - LOG_LEVEL: level of the root logger (default 'INFO')
+    - LOG_FORMAT: 'text' or 'json' (one object per line, default 'text')
+    - LOG_SAMPLE_RATES: {logger name: fraction of its DEBUG records kept}
+    - LOG_QUEUE: write records from a background thread, so a slow stderr or
+      disk never blocks a request (default True)
+
+    Calling it again (another app in the same process) replaces the handlers
+    it installed, other handlers of the root logger are left alone.
+    """
+    global _listener
+    log_format = config.get('LOG_FORMAT', 'text')
+    if log_format not in ('text', 'json'):
+        raise ValueError("LOG_FORMAT must be 'text' or 'json'")
+    root = logging.getLogger()
+    for handler in _handlers:
+        root.removeHandler(handler)
+    _handlers.clear()
+    stop_logging()
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+    handler = output
+    if config.get('LOG_QUEUE', True):
+        handler = SnapshotQueueHandler(queue.SimpleQueue())
+        _listener = QueueListener(handler.queue, output)
+        _listener.start()
+    if config.get('LOG_SAMPLE_RATES'):
+        handler.addFilter(SamplingFilter(config['LOG_SAMPLE_RATES']))
+    if log_format == 'json':
+        handler.addFilter(RequestContextFilter())
+    root.addHandler(handler)
+    _handlers.append(handler)
+    root.setLevel(config.get('LOG_LEVEL', 'INFO'))
+    # Flask gives the app's logger ('app', like the package) the DEBUG level
+    # in debug mode unless it has one: LOG_LEVEL applies to it as well
+    logging.getLogger('app').setLevel(config.get('LOG_LEVEL', 'INFO'))
+
+
+def stop_logging():
+    """Write the records still queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,428 @@
+import glob
+import mmap
+import os
+import struct
+import time
+import weakref
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+from flask import Response, g, request
+from sqlalchemy import event, exc
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HASH_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class MetricsStore(ABC):
+    """Where the metric values of a process live: one float per sample key."""
+
+    @abstractmethod
+    def add(self, key, amount, live=False):
+        """Add amount to a sample. live: the value of a gauge, dropped when its process dies."""
+        pass
+
+    @abstractmethod
+    def collect(self):
+        """Return {sample key: value} summed over every process sharing the store."""
+        pass
+
+
+class MemoryStore(MetricsStore):
+    """Values of the current process only (development server, one worker)."""
+
+    def __init__(self):
+        self._values = defaultdict(float)
+        self._lock = Lock()
+
+    def add(self, key, amount, live=False):
+        with self._lock:
+            self._values[key] += amount
+
+    def collect(self):
+        with self._lock:
+            return dict(self._values)
+
+
+class MmapFile:
+    """
+    Sample values of one process in a memory-mapped file, read by the others.
+
+    Layout: the number of bytes used (uint32, padded to 8), then entries of
+    key length (uint32), UTF-8 key padded to 8 bytes, value (float64). Only
+    the owning process writes; an entry is complete before the used size
+    covers it, so readers never see half of one.
+    """
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._positions = {key: position for key, _, position in self._entries(self._map)}
+        self._used = struct.unpack_from('i', self._map, 0)[0] or 8
+
+    @staticmethod
+    def _entries(data):
+        used = struct.unpack_from('i', data, 0)[0]
+        position = 8
+        while position < used:
+            length = struct.unpack_from('i', data, position)[0]
+            key = bytes(data[position + 4:position + 4 + length]).decode('utf-8')
+            position += 4 + length + (-(4 + length) % 8)
+            yield key, struct.unpack_from('d', data, position)[0], position
+            position += 8
+
+    @classmethod
+    def read(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        return {key: value for key, value, _ in cls._entries(data)} if len(data) >= 8 else {}
+
+    def add(self, key, amount):
+        position = self._positions.get(key)
+        if position is None:
+            position = self._append(key)
+        struct.pack_into('d', self._map, position, struct.unpack_from('d', self._map, position)[0] + amount)
+
+    def _append(self, key):
+        raw = key.encode('utf-8')
+        header = 4 + len(raw) + (-(4 + len(raw)) % 8)
+        size = header + 8
+        while self._used + size > len(self._map):
+            self._map.close()
+            self._file.truncate(os.fstat(self._file.fileno()).st_size * 2)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        struct.pack_into(f'i{len(raw)}s', self._map, self._used, len(raw), raw)
+        position = self._used + header
+        struct.pack_into('d', self._map, position, 0.0)
+        self._used += size
+        struct.pack_into('i', self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class MmapStore(MetricsStore):
+    """
+    Values shared by the worker processes of a server (gunicorn -w N) through
+    a directory: each process writes to its own memory-mapped files, so
+    writes need no lock between processes, and collect() sums every file.
+
+    Counters and histograms of exited workers keep counting (files
+    counter_<pid>.db); gauges of exited workers are ignored (gauge_<pid>.db).
+    The directory must be emptied when the server starts.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = Lock()
+        self._files = {}
+        self._pid = os.getpid()
+
+    def _get_file(self, kind):
+        if self._pid != os.getpid():  # Forked worker: write to its own files
+            self._files, self._pid = {}, os.getpid()
+        mmap_file = self._files.get(kind)
+        if mmap_file is None:
+            mmap_file = MmapFile(os.path.join(self.directory, f"{kind}_{self._pid}.db"))
+            self._files[kind] = mmap_file
+        return mmap_file
+
+    def add(self, key, amount, live=False):
+        with self._lock:
+            self._get_file('gauge' if live else 'counter').add(key, amount)
+
+    def collect(self):
+        values = defaultdict(float)
+        for path in glob.glob(os.path.join(self.directory, '*.db')):
+            kind, _, pid = os.path.basename(path)[:-3].partition('_')
+            if kind == 'gauge' and not _process_alive(int(pid)):
+                continue
+            for key, value in MmapFile.read(path).items():
+                values[key] += value
+        return dict(values)
+
+    def mark_process_dead(self, pid):
+        """Drop the gauges of an exited worker (for gunicorn's child_exit hook)."""
+        path = os.path.join(self.directory, f"gauge_{pid}.db")
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    """The metrics of the application and the store their values go to."""
+
+    def __init__(self):
+        self.store = MemoryStore()
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format (version 0.0.4)."""
+        values = self.store.collect()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render(values))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _label_string(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        self._keys = {}
+        registry.register(self)
+
+    def _key(self, labels, suffix='', extra=None):
+        # Sample keys are cached: one dict lookup per update on the hot path
+        cache_key = (suffix, extra, tuple(labels.get(name, '') for name in self.labelnames))
+        key = self._keys.get(cache_key)
+        if key is None:
+            pairs = {name: labels.get(name, '') for name in self.labelnames}
+            if extra is not None:
+                pairs.update([extra])
+            key = self._keys[cache_key] = self.name + suffix + _label_string(pairs)
+        return key
+
+    def render(self, values):
+        prefix = self.name
+        return [f"{key} {value:g}" for key, value in sorted(values.items())
+                if key.partition('{')[0] == prefix]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.store.add(self._key(labels), amount)
+
+
+class Gauge(Metric):
+    """A gauge summed over the live worker processes (requests in progress, connections checked out)."""
+    type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        self.registry.store.add(self._key(labels), amount, live=True)
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        # Buckets are stored per interval and made cumulative when rendered
+        bucket = self.buckets[bisect_left(self.buckets, value)]
+        store = self.registry.store
+        store.add(self._key(labels, '_bucket', ('le', _format_bound(bucket))), 1)
+        store.add(self._key(labels, '_sum'), value)
+        store.add(self._key(labels, '_count'), 1)
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self, values):
+        series = defaultdict(dict)
+        for key, value in values.items():
+            name, _, rest = key.partition('{')
+            if name == self.name + '_bucket':
+                labels, _, bound = rest.rpartition('le="')
+                series[labels.rstrip(',')][bound[:-2]] = value
+        lines = []
+        for labels in sorted(series):
+            cumulative = 0
+            for bound in map(_format_bound, self.buckets):
+                cumulative += series[labels].get(bound, 0)
+                lines.append(f'{self.name}_bucket{{{labels + "," if labels else ""}le="{bound}"}} {cumulative:g}')
+            suffix = '{' + labels + '}' if labels else ''
+            lines.append(f"{self.name}_sum{suffix} {values.get(self.name + '_sum' + suffix, 0):g}")
+            lines.append(f"{self.name}_count{suffix} {values.get(self.name + '_count' + suffix, 0):g}")
+        return lines
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+HTTP_REQUESTS = Counter('hbnb_http_requests_total', "HTTP requests handled",
+                        ('method', 'route', 'status'))
+HTTP_LATENCY = Histogram('hbnb_http_request_duration_seconds', "Time to handle an HTTP request",
+                         ('method', 'route'))
+HTTP_IN_PROGRESS = Gauge('hbnb_http_requests_in_progress', "HTTP requests being handled")
+DB_POOL_WAIT = Histogram('hbnb_db_pool_checkout_seconds', "Time waiting for a database connection from the pool",
+                         ('engine',), buckets=POOL_WAIT_BUCKETS)
+DB_POOL_TIMEOUTS = Counter('hbnb_db_pool_timeouts_total', "Requests for a connection that timed out waiting",
+                           ('engine',))
+DB_POOL_CHECKED_OUT = Gauge('hbnb_db_pool_checked_out', "Database connections in use", ('engine',))
+PASSWORD_HASH_TIME = Histogram('hbnb_password_hash_seconds', "Time to hash or verify a password",
+                               ('operation', 'scheme'), buckets=HASH_BUCKETS)
+CACHE_LOOKUPS = Counter('hbnb_cache_lookups_total', "Cache lookups; the hit ratio is hit / (hit + miss)",
+                        ('cache', 'result'))
+JWT_FAILURES = Counter('hbnb_jwt_decode_failures_total', "Access tokens rejected when decoded",
+                       ('reason',))
+
+
+class Metrics:
+    """
+    Prometheus metrics of the app, served at METRICS_PATH.
+
+    Requests per route and status, request latency, requests in progress,
+    database pool waits and connections in use, password hashing time, cache
+    lookups and rejected access tokens. Configuration:
+
+    - METRICS_PATH: URL of the metrics (default '/metrics', None disables)
+    - METRICS_DIR: directory shared by the worker processes of a server
+      (default PROMETHEUS_MULTIPROC_DIR); unset, each process reports its own
+      values, which is only right with a single worker
+    """
+
+    def __init__(self, app=None):
+        self.registry = REGISTRY
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        path = app.config.get('METRICS_PATH', '/metrics')
+        if path is None:
+            return
+        directory = app.config.get('METRICS_DIR')
+        self.registry.store = MmapStore(directory) if directory else MemoryStore()
+        with app.app_context():
+            for name, engine in app.extensions['sqlalchemy'].engines.items():
+                self.instrument(engine, name or 'default')
+        jwt_manager = app.extensions.get('flask-jwt-extended')
+        if jwt_manager is not None:
+            self._count_jwt_failures(jwt_manager)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        app.add_url_rule(path, 'metrics', self.view)
+        app.extensions['metrics'] = self
+
+    def view(self):
+        return Response(self.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    @staticmethod
+    def _start():
+        g.metrics_started = time.perf_counter()
+        HTTP_IN_PROGRESS.inc()
+
+    @staticmethod
+    def _finish(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            # The URL rule, not the path: one series per route whatever the IDs
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, route=route)
+            HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+        return response
+
+    @staticmethod
+    def _teardown(error):
+        if g.pop('metrics_started', None) is not None:
+            HTTP_IN_PROGRESS.dec()
+
+    @staticmethod
+    def instrument(engine, name):
+        """Time the connection checkouts of an engine's pool and count the connections in use."""
+        if engine in _instrumented_engines:
+            return
+        _instrumented_engines[engine] = name
+        _time_pool_checkouts(engine)
+        # Pool listeners on the engine carry over to the pool dispose() creates
+        event.listen(engine, 'engine_disposed', _time_pool_checkouts)
+        event.listen(engine, 'checkout', lambda *args: DB_POOL_CHECKED_OUT.inc(engine=name))
+        event.listen(engine, 'checkin', lambda *args: DB_POOL_CHECKED_OUT.dec(engine=name))
+
+    @staticmethod
+    def _count_jwt_failures(jwt_manager):
+        from flask_jwt_extended.default_callbacks import (default_expired_token_callback,
+                                                          default_invalid_token_callback)
+
+        @jwt_manager.invalid_token_loader
+        def invalid_token(reason):
+            JWT_FAILURES.inc(reason='invalid')
+            return default_invalid_token_callback(reason)
+
+        @jwt_manager.expired_token_loader
+        def expired_token(jwt_header, jwt_data):
+            JWT_FAILURES.inc(reason='expired')
+            return default_expired_token_callback(jwt_header, jwt_data)
+
+
+_instrumented_engines = weakref.WeakKeyDictionary()
+
+
+def _time_pool_checkouts(engine):
+    # Pools have no event before a checkout: wrap connect() to time the wait
+    name = _instrumented_engines[engine]
+    pool = engine.pool
+    connect = type(pool).connect.__get__(pool)
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.inc(engine=name)
+            raise
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started, engine=name)
+    pool.connect = timed_connect
@@ -1,6 +1,8 @@
 from app import db
+from app.geo import geohash_encode
 from .base_model import BaseModel
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Table, case, event
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 
 # Table d'association pour la relation many-to-many entre Place et Amenity
@@ -8,7 +10,8 @@ place_amenity_association = Table(
     'place_amenity_association',
     db.metadata,
     Column('place_id', Integer, ForeignKey('places.id'), primary_key=True),
-    Column('amenity_id', Integer, ForeignKey('amenities.id'), primary_key=True)
+    # La clé primaire (place_id, amenity_id) ne sert pas les recherches par équipement
+    Column('amenity_id', Integer, ForeignKey('amenities.id'), primary_key=True, index=True)
 )
 
 class Place(BaseModel, db.Model):
@@ -17,11 +20,18 @@ class Place(BaseModel, db.Model):
     id = Column(Integer, primary_key=True)
     title = Column(String(100), nullable=False)
     description = Column(String, nullable=True)
-    price = Column(Float, default=0.0)
+    price = Column(Float, default=0.0, index=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
+    # Geohash de (latitude, longitude), indexé pour la recherche géographique
+    geohash = Column(String(12), index=True)
 
-    owner_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    # Agrégats des avis, maintenus par le facade à chaque création/modification/suppression
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+
+    # Indexé : lieux d'un utilisateur, et suppression d'un utilisateur sans parcourir la table
+    owner_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
     owner = relationship('User', back_populates='places', lazy=True)
 
     reviews = relationship('Review', back_populates='place', lazy=True)
@@ -42,9 +52,21 @@ class Place(BaseModel, db.Model):
 
         self.reviews = []
         self.amenities = []
+        self.review_count = 0
+        self.rating_sum = 0
 
         self.validate_attributes()
 
+    @hybrid_property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
+
+    @average_rating.expression
+    def average_rating(cls):
+        return case((cls.review_count > 0, cls.rating_sum * 1.0 / cls.review_count), else_=None)
+
     def validate_attributes(self):
         if not isinstance(self.title, str) or not self.title.strip():
             raise ValueError("Title must be a non-empty string")
@@ -64,4 +86,11 @@ class Place(BaseModel, db.Model):
         self.amenities.append(amenity)
 
     def __repr__(self):
-        return f"<Place id={self.id} title={self.title}>"
\ No newline at end of file
+        return f"<Place id={self.id} title={self.title}>"
+
+
+@event.listens_for(Place, 'before_insert')
+@event.listens_for(Place, 'before_update')
+def _set_geohash(mapper, connection, target):
+    """Keep the geohash column in sync with the coordinates on every flush."""
+    target.geohash = geohash_encode(target.latitude, target.longitude)
@@ -2,11 +2,17 @@ from app import db
 from .base_model import BaseModel
 from .place import Place
 from .user import User
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 class Review(BaseModel, db.Model):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        # Sert les avis d'un lieu, déjà dans l'ordre des id des pages (curseur), sans parcourir ni trier la table
+        Index('ix_reviews_place_id_id', 'place_id', 'id'),
+        # Un utilisateur ne peut noter un lieu qu'une seule fois (cf. setup.sql)
+        UniqueConstraint('user_id', 'place_id', name='uq_reviews_user_place'),
+    )
 
     id = Column(Integer, primary_key=True)
     text = Column(String, nullable=False)
@@ -1,4 +1,4 @@
-from app import db, bcrypt
+from app import db, hasher
 from .base_model import BaseModel
 import re
 from sqlalchemy import Column, Integer, String, Boolean
@@ -32,12 +32,12 @@ class User(BaseModel, db.Model):
     def hash_password(self, password):
         if not password.strip():
             raise ValueError("Mot de passe vide")
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password = hasher.hash(password)
 
     def verify_password(self, password):
         if not self.password:
             return False
-        return bcrypt.check_password_hash(self.password, password)
+        return hasher.verify(self.password, password)
 
     def validate(self):
         if not self.first_name or len(self.first_name) > 50:
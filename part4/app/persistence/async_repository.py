@@ -0,0 +1,138 @@
+import logging
+from sqlalchemy import select
+from app.persistence.repository import Repository, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+async def paginate_async(session, query, key_column, limit, after=None):
+    """
+    Fetch one keyset page of a select() ordered by an indexed column (async
+    version of repository.paginate, same cursors).
+
+    :param session: The AsyncSession to run the query with.
+    :param query: The select() to paginate.
+    :param key_column: Indexed, unique column used for ordering (usually the primary key).
+    :param limit: Maximum number of rows in the page.
+    :param after: Cursor returned with the previous page, or None for the first page.
+    :return: A tuple (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if after is not None:
+        query = query.where(key_column > decode_cursor(after))
+    rows = (await session.scalars(query.order_by(key_column).limit(limit + 1))).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], key_column.key))
+
+
+class AsyncSQLAlchemyRepository(Repository):
+    """
+    SQLAlchemy implementation of the repository on an AsyncSession, for the
+    ASGI app: every method is a coroutine and awaits its database I/O instead
+    of blocking a thread.
+
+    Relationships are lazy-loaded on access, which an AsyncSession can't do:
+    pass loader options (e.g. ``selectinload``) for the ones that are read.
+    """
+
+    def __init__(self, model, session):
+        """
+        Initialize the repository with a specific SQLAlchemy model.
+
+        :param model: The SQLAlchemy model class this repository manages.
+        :param session: The AsyncSession of the current request.
+        """
+        self.model = model
+        self.session = session
+
+    async def add(self, obj):
+        """
+        Add a new object to the database.
+
+        :param obj: The object to be added.
+        :return: The added object.
+        """
+        logger.debug("Adding item with ID %s to repository", getattr(obj, 'id', None))
+        self.session.add(obj)
+        await self.session.commit()
+        return obj
+
+    async def get(self, obj_id, *options):
+        """
+        Fetch an object by its ID.
+
+        :param obj_id: The ID of the object to fetch.
+        :param options: Optional loader options applied to the query.
+        :return: The fetched object or None if not found.
+        """
+        logger.debug("Fetching item with ID %s", obj_id)
+        return await self.session.get(self.model, obj_id, options=options)
+
+    async def get_all(self, *options):
+        """
+        Fetch all objects of this model, ordered by ID.
+
+        :param options: Optional loader options applied to the query.
+        :return: A list of all objects.
+        """
+        logger.debug("Fetching all items from repository")
+        return (await self.session.scalars(select(self.model).options(*options).order_by(self.model.id))).all()
+
+    async def get_page(self, limit, after=None, *options):
+        """
+        Fetch one page of objects of this model, ordered by ID.
+
+        :param limit: Maximum number of objects to return.
+        :param after: Cursor returned with the previous page, or None for the first page.
+        :param options: Optional loader options applied to the query.
+        :return: A tuple (objects, next_cursor).
+        """
+        logger.debug("Fetching page of %s items after cursor %s", limit, after)
+        return await paginate_async(self.session, select(self.model).options(*options), self.model.id, limit, after)
+
+    async def update(self, obj_id, data):
+        """
+        Update an existing object by its ID.
+
+        :param obj_id: The ID of the object to update.
+        :param data: A dictionary of attributes to update.
+        :return: The updated object or None if not found.
+        """
+        obj = await self.get(obj_id)
+        if obj:
+            for key, value in data.items():
+                setattr(obj, key, value)
+            await self.session.commit()
+            logger.debug("Updated item with ID %s", obj_id)
+            return obj
+        logger.debug("Failed to update: no item with ID %s", obj_id)
+        return None
+
+    async def delete(self, obj_id):
+        """
+        Delete an object by its ID.
+
+        :param obj_id: The ID of the object to delete.
+        :return: True if deleted successfully, False otherwise.
+        """
+        obj = await self.get(obj_id)
+        if obj:
+            await self.session.delete(obj)
+            await self.session.commit()
+            logger.debug("Deleted item with ID %s", obj_id)
+            return True
+        logger.debug("Failed to delete: no item with ID %s", obj_id)
+        return False
+
+    async def get_by_attribute(self, attr_name, attr_value):
+        """
+        Fetch an object by a specific attribute.
+
+        :param attr_name: The name of the attribute to filter by.
+        :param attr_value: The value of the attribute to filter by.
+        :return: The first matching object or None if not found.
+        """
+        logger.debug("Searching for item with %s=%s", attr_name, attr_value)
+        query = select(self.model).where(getattr(self.model, attr_name) == attr_value)
+        return (await self.session.scalars(query.limit(1))).first()
@@ -0,0 +1,90 @@
+# app/persistence/cached_repository.py
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from app.extensions import db, repository_cache
+
+
+class CachedRepository:
+    """
+    Read-through cache around a repository: get(id) is served from the
+    repository cache when possible, every other method goes to the wrapped
+    repository unchanged.
+
+    The cache stores the column values of a row, not the ORM object, and
+    attaches a rebuilt object to the current session on a hit, so lazy
+    relationships and later writes behave as if it had been loaded by a query.
+    """
+
+    def __init__(self, repository):
+        """
+        :param repository: The repository to wrap; must have a ``model`` attribute.
+        """
+        self.repository = repository
+        self.model = repository.model
+        self._mapper = inspect(self.model)
+        self._id_type = self._mapper.primary_key[0].type.python_type
+
+    def __getattr__(self, name):
+        return getattr(self.repository, name)
+
+    def get(self, obj_id):
+        """
+        Fetch an object by its ID, from the session, the cache or the database.
+
+        :param obj_id: The ID of the object to fetch.
+        :return: The fetched object or None if not found.
+        """
+        if not repository_cache.enabled:
+            return self.repository.get(obj_id)
+        try:
+            obj_id = self._id_type(obj_id)
+        except (TypeError, ValueError):
+            return self.repository.get(obj_id)
+
+        # Already loaded in this request: no cache lookup, no query
+        obj = db.session.identity_map.get(identity_key(self.model, obj_id))
+        if obj is not None:
+            return obj
+
+        values = repository_cache.get(self.model, obj_id)
+        if values is not None:
+            return self._attach(values)
+
+        # Filled from the primary: an entry read from a lagging replica would
+        # outlive the invalidation of the write it missed
+        with db.session().primary_reads():
+            obj = self.repository.get(obj_id)
+        if obj is not None:
+            repository_cache.set(self.model, obj_id, self._snapshot(obj))
+        return obj
+
+    get_by_id = get
+
+    def add(self, obj):
+        result = self.repository.add(obj)
+        repository_cache.invalidate(self.model, getattr(obj, 'id', None))
+        return result
+
+    def update(self, obj_id, data):
+        result = self.repository.update(obj_id, data)
+        repository_cache.invalidate(self.model, obj_id)
+        return result
+
+    def delete(self, obj_id):
+        result = self.repository.delete(obj_id)
+        repository_cache.invalidate(self.model, obj_id)
+        return result
+
+    def _snapshot(self, obj):
+        return {prop.key: getattr(obj, prop.key) for prop in self._mapper.column_attrs}
+
+    def _attach(self, values):
+        obj = self._mapper.class_manager.new_instance()
+        for key, value in values.items():
+            set_committed_value(obj, key, value)
+        make_transient_to_detached(obj)
+        db.session.add(obj)
+        return obj
@@ -0,0 +1,61 @@
+# app/persistence/dataset_repository.py
+
+from datetime import datetime
+from sqlalchemy import select
+from app import db
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place, place_amenity_association
+from app.models.review import Review
+
+# Tables of the dataset, in an order where every row's foreign keys point to
+# rows of an earlier table (the order used by export and import)
+ENTITY_TABLES = {
+    'users': User.__table__,
+    'amenities': Amenity.__table__,
+    'places': Place.__table__,
+    'place_amenity_association': place_amenity_association,
+    'reviews': Review.__table__,
+}
+
+
+def parse_entities(names):
+    """
+    Valide une liste d'entités (noms de ENTITY_TABLES), renvoyée dans l'ordre des clés étrangères.
+
+    Args:
+        names: liste de noms, ou None pour toutes les entités
+    """
+    if not names:
+        return list(ENTITY_TABLES)
+    unknown = sorted(set(names) - set(ENTITY_TABLES))
+    if unknown:
+        raise ValueError(f"Unknown entities: {', '.join(unknown)} "
+                         f"(expected some of {', '.join(ENTITY_TABLES)})")
+    return [name for name in ENTITY_TABLES if name in names]
+
+
+def _to_json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class DatasetRepository:
+    """Lecture et écriture de tables entières, ligne à ligne, sans objets ORM."""
+
+    def stream_rows(self, entity, batch_size=1000):
+        """
+        Parcourt toutes les lignes d'une table par ordre de clé primaire, avec un
+        curseur côté serveur (yield_per) : la mémoire utilisée ne dépend pas de
+        la taille de la table.
+
+        Yields:
+            dict: valeurs des colonnes de chaque ligne (dates au format ISO 8601)
+        """
+        table = ENTITY_TABLES[entity]
+        statement = select(table).order_by(*table.primary_key.columns)
+        result = db.session.execute(statement, execution_options={'yield_per': batch_size})
+        try:
+            for row in result.mappings():
+                yield {key: _to_json_value(value) for key, value in row.items()}
+        finally:
+            result.close()
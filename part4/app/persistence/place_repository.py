@@ -1,15 +1,96 @@
 # app/persistence/place_repository.py
 
-from app.models.place import Place
+from app.models.place import Place, place_amenity_association
+from app.models.review import Review
 from app import db
+from app.extensions import bump_table_versions, repository_cache
+from app.geo import bounding_box, covering_cells, geohash_encode, haversine_km, split_antimeridian
+from app.persistence.repository import SQLAlchemyRepository, chunked, paginate, replica_read
+from datetime import datetime
+from sqlalchemy import and_, bindparam, func, insert, or_, select, tuple_, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
-class PlaceRepository:
-    """Repository spécifique pour le modèle Place (sans relations)."""
+
+def places_with_all_amenities(amenity_ids):
+    """Sous-requête des IDs de lieux associés à toutes les aménités données."""
+    amenity_ids = set(amenity_ids)
+    association = place_amenity_association.c
+    return (select(association.place_id)
+            .where(association.amenity_id.in_(amenity_ids))
+            .group_by(association.place_id)
+            .having(func.count(association.amenity_id) == len(amenity_ids)))
+
+
+def bbox_clause(south, west, north, east):
+    """
+    Condition SQL d'appartenance à une zone : quelques parcours d'intervalle
+    sur l'index geohash, affinés par les coordonnées exactes.
+    """
+    cells = covering_cells(south, west, north, east)
+    in_cells = or_(*[and_(Place.geohash >= cell, Place.geohash < cell + '~') for cell in cells])
+    in_longitudes = or_(*[Place.longitude.between(w, e) for _, w, _, e in split_antimeridian(south, west, north, east)])
+    return and_(in_cells, Place.latitude.between(south, north), in_longitudes)
+
+
+def place_filter_clauses(min_rating=None, bbox=None, min_price=None, max_price=None, amenities=None, owner_id=None):
+    """
+    Conditions SQL des filtres de la liste des lieux (partagées avec l'application ASGI).
+
+    Args:
+        min_rating: note moyenne minimale
+        bbox: tuple (sud, ouest, nord, est) en degrés
+        min_price, max_price: bornes de prix (index places.price)
+        amenities: IDs d'aménités que le lieu doit toutes proposer
+        owner_id: ID du propriétaire
+    """
+    clauses = []
+    if min_rating is not None:
+        clauses.append(Place.average_rating >= min_rating)
+    if bbox is not None:
+        clauses.append(bbox_clause(*bbox))
+    if min_price is not None:
+        clauses.append(Place.price >= min_price)
+    if max_price is not None:
+        clauses.append(Place.price <= max_price)
+    if owner_id is not None:
+        clauses.append(Place.owner_id == owner_id)
+    if amenities:
+        clauses.append(Place.id.in_(places_with_all_amenities(amenities)))
+    return clauses
+
+
+def place_order(sort=None):
+    """Ordre de la liste des lieux : par ID, ou meilleure note moyenne d'abord (sort='rating')."""
+    if sort == 'rating':
+        return Place.average_rating.desc().nulls_last(), Place.id
+    return Place.id,
+
+
+def nearest(places, latitude, longitude, radius_km, limit=None):
+    """
+    Garde les lieux situés à moins de radius_km du point donné (ceux d'une
+    requête filtrée par bounding_box).
+
+    Returns:
+        list: tuples (lieu, distance en km), du plus proche au plus éloigné
+    """
+    results = []
+    for place in places:
+        distance = haversine_km(latitude, longitude, place.latitude, place.longitude)
+        if distance <= radius_km:
+            results.append((place, distance))
+    results.sort(key=lambda result: (result[1], result[0].id))
+    return results[:limit] if limit is not None else results
+
+
+class PlaceRepository(SQLAlchemyRepository):
+    """Repository spécifique pour le modèle Place (filtres de recherche et agrégats)."""
 
     def __init__(self):
-        self.model = Place
+        super().__init__(Place)
 
+    @replica_read
     def get_by_id(self, place_id):
         """Récupère un lieu (Place) par son ID."""
         return db.session.query(self.model).get(place_id)
@@ -54,3 +135,140 @@ class PlaceRepository:
 
         db.session.delete(place)
         db.session.commit()
+
+    def filtered_query(self, **filters):
+        """
+        Construit la requête de liste des lieux (aménités jointes) pour les filtres donnés.
+
+        Args:
+            filters: ceux de place_filter_clauses
+        """
+        return self.model.query.options(joinedload(self.model.amenities)).filter(*place_filter_clauses(**filters))
+
+    @replica_read
+    def get_near(self, latitude, longitude, radius_km, filters, limit=None):
+        """
+        Récupère les lieux situés à moins de radius_km du point donné.
+
+        Returns:
+            list: tuples (lieu, distance en km), du plus proche au plus éloigné
+        """
+        query = self.filtered_query(bbox=bounding_box(latitude, longitude, radius_km), **filters)
+        return nearest(query.all(), latitude, longitude, radius_km, limit)
+
+    def rebuild_geohashes(self, batch_size=1000):
+        """
+        Recalcule la colonne geohash de tous les lieux, par lots (lieux importés sans ORM).
+
+        Returns:
+            int: Nombre de lieux mis à jour
+        """
+        count, last_id = 0, None
+        while True:
+            query = select(self.model.id, self.model.latitude, self.model.longitude)
+            if last_id is not None:
+                query = query.where(self.model.id > last_id)
+            rows = db.session.execute(query.order_by(self.model.id).limit(batch_size)).all()
+            if not rows:
+                return count
+            db.session.execute(update(self.model), [
+                {'id': row.id, 'geohash': geohash_encode(row.latitude, row.longitude)} for row in rows
+            ])
+            db.session.commit()
+            count += len(rows)
+            last_id = rows[-1].id
+
+    @replica_read
+    def get_filtered(self, filters, sort=None):
+        """
+        Récupère tous les lieux correspondant aux filtres.
+
+        Args:
+            filters: dict des filtres acceptés par place_filter_clauses
+            sort: None (par ID) ou 'rating' (meilleure note moyenne d'abord)
+        """
+        return self.filtered_query(**filters).order_by(*place_order(sort)).all()
+
+    @replica_read
+    def get_filtered_page(self, filters, limit, after=None):
+        """
+        Récupère une page de lieux correspondant aux filtres.
+
+        Returns:
+            tuple: (lieux, curseur de la page suivante ou None)
+        """
+        return paginate(self.filtered_query(**filters), self.model.id, limit, after)
+
+    def rebuild_rating_aggregates(self):
+        """
+        Recalcule review_count et rating_sum de tous les lieux en une seule requête UPDATE.
+
+        Returns:
+            int: Nombre de lieux mis à jour
+        """
+        place_reviews = Review.place_id == self.model.id
+        result = db.session.execute(update(self.model).values(
+            review_count=select(func.count(Review.id)).where(place_reviews).scalar_subquery(),
+            rating_sum=select(func.coalesce(func.sum(Review.rating), 0)).where(place_reviews).scalar_subquery(),
+        ).execution_options(synchronize_session=False))
+        db.session.commit()
+        return result.rowcount
+
+    def get_owner_ids(self, place_ids):
+        """
+        Récupère le propriétaire de chaque lieu existant parmi place_ids (requêtes IN).
+
+        Returns:
+            dict: {place_id: owner_id}
+        """
+        owners = {}
+        for chunk in chunked(set(place_ids)):
+            owners.update(db.session.execute(
+                select(self.model.id, self.model.owner_id).where(self.model.id.in_(chunk))
+            ).all())
+        return owners
+
+    def get_existing_links(self, links):
+        """
+        Trouve les liens (place_id, amenity_id) existants parmi links (requêtes IN sur la clé primaire).
+
+        Returns:
+            set: Couples (place_id, amenity_id) existants
+        """
+        table = place_amenity_association
+        found = set()
+        for chunk in chunked(set(links)):
+            found.update(tuple(row) for row in db.session.execute(
+                select(table.c.place_id, table.c.amenity_id)
+                .where(tuple_(table.c.place_id, table.c.amenity_id).in_(chunk))
+            ))
+        return found
+
+    def add_amenity_links(self, links):
+        """Insère les liens (place_id, amenity_id) en un seul executemany, sans commit."""
+        if links:
+            db.session.execute(insert(place_amenity_association),
+                               [{'place_id': place_id, 'amenity_id': amenity_id} for place_id, amenity_id in links])
+
+    def add_rating_deltas(self, deltas):
+        """
+        Ajoute des avis aux agrégats des lieux en un seul executemany, sans commit.
+
+        Args:
+            deltas: {place_id: (nombre d'avis ajoutés, somme des notes ajoutées)}
+        """
+        if not deltas:
+            return
+        table = self.model.__table__
+        db.session.execute(
+            update(table).where(table.c.id == bindparam('place_id')).values(
+                review_count=table.c.review_count + bindparam('count'),
+                rating_sum=table.c.rating_sum + bindparam('total'),
+                updated_at=datetime.utcnow(),
+            ),
+            [{'place_id': place_id, 'count': count, 'total': total}
+             for place_id, (count, total) in deltas.items()]
+        )
+        # UPDATE sur la table (pas via l'ORM) : versions et cache à mettre à jour ici
+        bump_table_versions(db.session.connection(), table.name)
+        repository_cache.invalidate(self.model, *deltas)
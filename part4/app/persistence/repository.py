@@ -1,10 +1,124 @@
+import base64
+import binascii
+import json
 import logging
 from abc import ABC, abstractmethod
-from app.extensions import db  # Import SQLAlchemy instance for database operations
+from functools import wraps
+from sqlalchemy import insert, select
+from app.extensions import db, get_table_version  # Import SQLAlchemy instance for database operations
 
 logger = logging.getLogger(__name__)
 
 
+def encode_cursor(value):
+    """Encode the last key of a page into an opaque, URL-safe cursor."""
+    raw = json.dumps([value], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is invalid."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+    # encode_cursor writes [key], the key being an id or a string column (never a bool, a subclass of int)
+    if (not isinstance(payload, list) or len(payload) != 1 or not isinstance(payload[0], (int, str))
+            or isinstance(payload[0], bool)):
+        raise ValueError("Invalid pagination cursor")
+    return payload[0]
+
+
+def paginate(query, key_column, limit, after=None):
+    """
+    Fetch one keyset page of a query ordered by an indexed column.
+
+    Rows are selected with ``key_column > <last key>`` instead of an OFFSET, so
+    the cost of a page does not depend on how deep into the table it is.
+
+    :param query: The query to paginate.
+    :param key_column: Indexed, unique column used for ordering (usually the primary key).
+    :param limit: Maximum number of rows in the page.
+    :param after: Cursor returned with the previous page, or None for the first page.
+    :return: A tuple (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if after is not None:
+        query = query.filter(key_column > decode_cursor(after))
+    rows = query.order_by(key_column).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], key_column.key))
+
+
+def replica_read(method):
+    """
+    Decorate a repository read method: during GET requests, its queries may
+    be served by a read replica (see app.routing.RoutingSession).
+    """
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with db.session().replica_reads():
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def chunked(values, size=500):
+    """Split a list into lists of at most size items (keeps IN lists under the bind parameter limit)."""
+    values = list(values)
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+def existing_ids(model, ids):
+    """
+    Find which of the given IDs exist in a model's table.
+
+    :param model: The SQLAlchemy model to look in.
+    :param ids: The IDs to check.
+    :return: The set of IDs found, fetched with one IN (...) query per 500 IDs.
+    """
+    found = set()
+    for chunk in chunked(set(ids)):
+        found.update(db.session.execute(select(model.id).where(model.id.in_(chunk))).scalars())
+    return found
+
+
+def _insert_statement(model, dialect):
+    """The INSERT ... RETURNING of insert_rows for a dialect, None if it can't return IDs from an executemany."""
+    if dialect.name == 'sqlite':
+        # SQLite can't guarantee the order of RETURNING rows (sort_by_parameter_order
+        # falls back to one INSERT per row), but rowids are allocated in increasing
+        # order within a statement, writers are serialized and the batches run in
+        # order: insert_rows sorts the IDs to map them back to the rows.
+        return insert(model).returning(model.id)
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        # PostgreSQL: batched, the RETURNING rows come back in the order of the parameters
+        return insert(model).returning(model.id, sort_by_parameter_order=True)
+    return None  # MySQL: no RETURNING
+
+
+def insert_rows(model, rows):
+    """
+    Insert many rows of a model's table with a single executemany (see SQLAlchemyRepository.insert_many).
+
+    On databases without INSERT ... RETURNING (MySQL), the rows are inserted
+    one statement at a time in the caller's transaction, each ID taken from
+    the cursor: auto-increment IDs of a multi-row INSERT are not always
+    consecutive there (innodb_autoinc_lock_mode = 2, the default).
+
+    :return: The IDs of the new rows, in the order of rows.
+    """
+    if not rows:
+        return []
+    dialect = db.session.get_bind(mapper=model.__mapper__, clause=insert(model)).dialect
+    statement = _insert_statement(model, dialect)
+    if statement is None:
+        return [db.session.execute(insert(model.__table__), row).inserted_primary_key[0] for row in rows]
+    ids = db.session.execute(statement, rows).scalars().all()
+    return sorted(ids) if dialect.name == 'sqlite' else ids
+
+
 class Repository(ABC):
     """Abstract base class for repositories."""
 
@@ -46,18 +160,18 @@ class InMemoryRepository(Repository):
         self._storage = {}
 
     def add(self, obj):
-        logger.debug(f"Adding item with ID {obj.id} to repository")
+        logger.debug("Adding item with ID %s to repository", obj.id)
         self._storage[obj.id] = obj
-        logger.debug(f"Repository now contains {len(self._storage)} items")
+        logger.debug("Repository now contains %s items", len(self._storage))
         return obj
 
     def get(self, obj_id):
-        logger.debug(f"Fetching item with ID {obj_id}")
+        logger.debug("Fetching item with ID %s", obj_id)
         obj = self._storage.get(obj_id)
         if obj:
-            logger.debug(f"Found item with ID {obj_id}")
+            logger.debug("Found item with ID %s", obj_id)
         else:
-            logger.debug(f"No item found with ID {obj_id}")
+            logger.debug("No item found with ID %s", obj_id)
         return obj
 
     def get_all(self):
@@ -68,26 +182,26 @@ class InMemoryRepository(Repository):
             obj = self._storage[obj_id]
             for key, value in data.items():
                 setattr(obj, key, value)
-            logger.debug(f"Updated item with ID {obj_id}")
+            logger.debug("Updated item with ID %s", obj_id)
             return obj
-        logger.debug(f"Failed to update: no item with ID {obj_id}")
+        logger.debug("Failed to update: no item with ID %s", obj_id)
         return None
 
     def delete(self, obj_id):
         if obj_id in self._storage:
             del self._storage[obj_id]
-            logger.debug(f"Deleted item with ID {obj_id}")
+            logger.debug("Deleted item with ID %s", obj_id)
             return True
-        logger.debug(f"Failed to delete: no item with ID {obj_id}")
+        logger.debug("Failed to delete: no item with ID %s", obj_id)
         return False
 
     def get_by_attribute(self, attr_name, attr_value):
-        logger.debug(f"Searching for item with {attr_name}={attr_value}")
+        logger.debug("Searching for item with %s=%s", attr_name, attr_value)
         for obj in self._storage.values():
             if getattr(obj, attr_name, None) == attr_value:
-                logger.debug(f"Found item with {attr_name}={attr_value}")
+                logger.debug("Found item with %s=%s", attr_name, attr_value)
                 return obj
-        logger.debug(f"No item found with {attr_name}={attr_value}")
+        logger.debug("No item found with %s=%s", attr_name, attr_value)
         return None
 
 
@@ -109,11 +223,12 @@ class SQLAlchemyRepository(Repository):
         :param obj: The object to be added.
         :return: The added object.
         """
-        logger.debug(f"Adding item with ID {getattr(obj, 'id', None)} to repository")
+        logger.debug("Adding item with ID %s to repository", getattr(obj, 'id', None))
         db.session.add(obj)
         db.session.commit()
         return obj
 
+    @replica_read
     def get(self, obj_id):
         """
         Fetch an object by its ID.
@@ -121,17 +236,63 @@ class SQLAlchemyRepository(Repository):
         :param obj_id: The ID of the object to fetch.
         :return: The fetched object or None if not found.
         """
-        logger.debug(f"Fetching item with ID {obj_id}")
+        logger.debug("Fetching item with ID %s", obj_id)
         return self.model.query.get(obj_id)
 
-    def get_all(self):
+    @replica_read
+    def get_all(self, *options):
         """
         Fetch all objects of this model.
 
+        :param options: Optional loader options (e.g. ``joinedload``) applied
+            to the query so relationships are fetched in a fixed number of
+            statements instead of one per row.
         :return: A list of all objects.
         """
         logger.debug("Fetching all items from repository")
-        return self.model.query.all()
+        return self.model.query.options(*options).all()
+
+    @replica_read
+    def get_page(self, limit, after=None, *options):
+        """
+        Fetch one page of objects of this model, ordered by ID.
+
+        :param limit: Maximum number of objects to return.
+        :param after: Cursor returned with the previous page, or None for the first page.
+        :param options: Optional loader options applied to the query.
+        :return: A tuple (objects, next_cursor).
+        """
+        logger.debug("Fetching page of %s items after cursor %s", limit, after)
+        return paginate(self.model.query.options(*options), self.model.id, limit, after)
+
+    def get_existing_ids(self, ids):
+        """
+        Find which of the given IDs exist, without loading the objects.
+
+        :param ids: The IDs to check.
+        :return: The set of IDs found.
+        """
+        return existing_ids(self.model, ids)
+
+    def insert_many(self, rows):
+        """
+        Insert many rows with a single executemany (see insert_rows), without building ORM objects.
+        Mapper events don't run and nothing is committed: the caller owns the transaction.
+
+        :param rows: A list of dicts of column values.
+        :return: The IDs of the new rows, in the order of rows.
+        """
+        return insert_rows(self.model, rows)
+
+    @replica_read
+    def get_version(self):
+        """
+        Fetch the change counter of the table, incremented whenever a row is
+        added, updated or deleted; used to validate cached collection responses.
+
+        :return: The version number (a single primary key lookup).
+        """
+        return get_table_version(self.model.__tablename__)
 
     def update(self, obj_id, data):
         """
@@ -146,9 +307,9 @@ class SQLAlchemyRepository(Repository):
             for key, value in data.items():
                 setattr(obj, key, value)
             db.session.commit()
-            logger.debug(f"Updated item with ID {obj_id}")
+            logger.debug("Updated item with ID %s", obj_id)
             return obj
-        logger.debug(f"Failed to update: no item with ID {obj_id}")
+        logger.debug("Failed to update: no item with ID %s", obj_id)
         return None
 
     def delete(self, obj_id):
@@ -162,11 +323,12 @@ class SQLAlchemyRepository(Repository):
         if obj:
             db.session.delete(obj)
             db.session.commit()
-            logger.debug(f"Deleted item with ID {obj_id}")
+            logger.debug("Deleted item with ID %s", obj_id)
             return True
-        logger.debug(f"Failed to delete: no item with ID {obj_id}")
+        logger.debug("Failed to delete: no item with ID %s", obj_id)
         return False
 
+    @replica_read
     def get_by_attribute(self, attr_name, attr_value):
         """
         Fetch an object by a specific attribute.
@@ -175,6 +337,6 @@ class SQLAlchemyRepository(Repository):
         :param attr_value: The value of the attribute to filter by.
         :return: The first matching object or None if not found.
         """
-        logger.debug(f"Searching for item with {attr_name}={attr_value}")
+        logger.debug("Searching for item with %s=%s", attr_name, attr_value)
         # Use getattr to access the attribute of the model and filter by it
         return self.model.query.filter(getattr(self.model, attr_name) == attr_value).first()
@@ -2,17 +2,20 @@
 
 from app.models.review import Review
 from app import db
+from app.persistence.repository import SQLAlchemyRepository, chunked, paginate, replica_read
+from sqlalchemy import exists, select, tuple_
 from sqlalchemy.exc import IntegrityError
 
-class ReviewRepository:
+class ReviewRepository(SQLAlchemyRepository):
     """
     Repository spécifique pour le modèle Review,
-    sans relations (pas de foreign key).
+    avec les requêtes indexées par lieu.
     """
 
     def __init__(self):
-        self.model = Review
+        super().__init__(Review)
 
+    @replica_read
     def get_by_id(self, review_id):
         """Récupère un avis (Review) par son ID."""
         return db.session.query(self.model).get(review_id)
@@ -80,22 +83,49 @@ class ReviewRepository:
             user_id=user_id, 
             place_id=place_id
         ).first()
-        
-    def get_all(self):
+
+    def exists_for_user_and_place(self, user_id, place_id):
         """
-        Récupère tous les avis.
-        
-        Returns:
-            list: Liste de tous les avis
+        Vérifie en une seule requête EXISTS (servie par l'index unique
+        user_id/place_id) si l'utilisateur a déjà noté ce lieu.
         """
-        return db.session.query(self.model).all()
+        return db.session.query(exists().where(
+            self.model.user_id == user_id,
+            self.model.place_id == place_id
+        )).scalar()
 
+    @replica_read
     def get_by_place_id(self, place_id):
         """
-        Récupère tous les avis pour un lieu donné directement via SQL
+        Récupère tous les avis pour un lieu donné (WHERE place_id = ?, indexé).
+        """
+        return db.session.query(self.model).filter(
+            self.model.place_id == place_id
+        ).order_by(self.model.id).all()
+
+    @replica_read
+    def get_page_by_place_id(self, place_id, limit, after=None):
+        """
+        Récupère une page d'avis pour un lieu donné.
+
+        Returns:
+            tuple: (avis, curseur de la page suivante ou None)
+        """
+        query = db.session.query(self.model).filter(self.model.place_id == place_id)
+        return paginate(query, self.model.id, limit, after)
+
+    def get_existing_pairs(self, pairs):
+        """
+        Trouve les couples (user_id, place_id) déjà notés parmi pairs,
+        par requêtes IN servies par l'index unique user_id/place_id.
+
+        Returns:
+            set: Couples (user_id, place_id) existants
         """
-        reviews = db.session.query(self.model).filter(self.model.place_id == place_id).all()
-        print(f"Direct query for place_id={place_id} returned {len(reviews)} reviews")
-        for r in reviews:
-            print(f"Found: Review ID={r.id}, place_id={r.place_id}, user_id={r.user_id}")
-        return reviews
\ No newline at end of file
+        found = set()
+        for chunk in chunked(set(pairs)):
+            found.update(tuple(row) for row in db.session.execute(
+                select(self.model.user_id, self.model.place_id)
+                .where(tuple_(self.model.user_id, self.model.place_id).in_(chunk))
+            ))
+        return found
@@ -0,0 +1,239 @@
+import re
+import weakref
+from sqlalchemy import DDL, event, func, literal, null, or_, select, text, union_all
+from sqlalchemy.orm.attributes import get_history
+from app.extensions import db
+from app.models.place import Place
+from app.models.review import Review
+
+# Full-text index over place titles/descriptions and review texts (SQLite FTS5).
+# Each row's rowid encodes what it indexes: id * 2 for a place, id * 2 + 1 for
+# a review, so the ORM hooks below update it by rowid without scanning.
+SEARCH_TABLE = 'search_index'
+KINDS = ('place', 'review')
+
+_create_index = DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+    "USING fts5(title, body, tokenize='unicode61 remove_diacritics 2')"
+).execute_if(dialect='sqlite')
+_drop_index = DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}").execute_if(dialect='sqlite')
+event.listen(db.metadata, 'after_create', _create_index)
+event.listen(db.metadata, 'before_drop', _drop_index)
+
+# PostgreSQL: GIN indexes on the text search vectors of the tables, which
+# the search queries repeat as they are (the planner only uses an index on an
+# expression for the same expression). Titles weigh more than the texts.
+# 'simple' configuration: words are lowercased, not stemmed.
+PLACE_VECTOR = ("setweight(to_tsvector('simple', title), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(description, '')), 'B')")
+REVIEW_VECTOR = "setweight(to_tsvector('simple', text), 'B')"
+PG_INDEXES = (
+    (f'{SEARCH_TABLE}_places', 'places', PLACE_VECTOR),
+    (f'{SEARCH_TABLE}_reviews', 'reviews', REVIEW_VECTOR),
+)
+for _name, _table, _vector in PG_INDEXES:
+    event.listen(db.metadata, 'after_create', DDL(
+        f"CREATE INDEX IF NOT EXISTS {_name} ON {_table} USING gin (({_vector}))").execute_if(dialect='postgresql'))
+
+# Engines on which the index table is known to exist (checked once per engine)
+_indexed_engines = weakref.WeakKeyDictionary()
+
+
+def _index_available(connection):
+    if connection.dialect.name != 'sqlite':
+        return False
+    engine = connection.engine
+    if engine not in _indexed_engines:
+        _indexed_engines[engine] = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': SEARCH_TABLE}).first() is not None
+    return _indexed_engines[engine]
+
+
+@event.listens_for(db.metadata, 'after_create')
+@event.listens_for(db.metadata, 'after_drop')
+def _reset_index_check(target, connection, **kw):
+    _indexed_engines.pop(connection.engine, None)
+
+
+def _rowid(kind, obj_id):
+    return obj_id * 2 + KINDS.index(kind)
+
+
+def _write(connection, kind, obj_id, title, body):
+    rowid = _rowid(kind, obj_id)
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {'rowid': rowid})
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE} (rowid, title, body) VALUES (:rowid, :title, :body)"),
+                       {'rowid': rowid, 'title': title or '', 'body': body or ''})
+
+
+def _changed(target, *attrs):
+    return any(get_history(target, attr).has_changes() for attr in attrs)
+
+
+@event.listens_for(Place, 'after_insert')
+@event.listens_for(Place, 'after_update')
+def _index_place(mapper, connection, target):
+    if _index_available(connection) and _changed(target, 'title', 'description'):
+        _write(connection, 'place', target.id, target.title, target.description)
+
+
+@event.listens_for(Review, 'after_insert')
+@event.listens_for(Review, 'after_update')
+def _index_review(mapper, connection, target):
+    if _index_available(connection) and _changed(target, 'text'):
+        _write(connection, 'review', target.id, '', target.text)
+
+
+@event.listens_for(Place, 'after_delete')
+@event.listens_for(Review, 'after_delete')
+def _unindex(mapper, connection, target):
+    if _index_available(connection):
+        kind = 'place' if isinstance(target, Place) else 'review'
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"),
+                           {'rowid': _rowid(kind, target.id)})
+
+
+def search_words(query):
+    """The words of user input (16 at most), raising ValueError if there are none"""
+    words = re.findall(r'\w+', query or '')
+    if not words:
+        raise ValueError("q must contain at least one word")
+    return words[:16]
+
+
+def build_match_query(query):
+    """
+    Turn user input into an FTS5 MATCH expression: every word must match,
+    the last characters of each word may be a prefix ("pari" finds "Paris").
+    """
+    return ' '.join(f'"{word}"*' for word in search_words(query))
+
+
+def build_tsquery(query):
+    """The same as build_match_query, as a PostgreSQL tsquery ("pari" finds "Paris")"""
+    return ' & '.join(f"'{word}':*" for word in search_words(query))
+
+
+def search_statement(dialect, query, kind=None, limit=20, offset=0):
+    """
+    Build the search query of a database dialect (run by SearchRepository and
+    by the ASGI app's facade); its rows go through search_result.
+
+    SQLite: FTS5, ranked by BM25. PostgreSQL: ranked by ts_rank, served by
+    the GIN indexes of PG_INDEXES. The others: an unranked LIKE search,
+    places first then reviews, still paged in SQL.
+    """
+    if dialect == 'sqlite':
+        return _fts5_statement(query, kind, limit, offset)
+    if dialect == 'postgresql':
+        return _postgresql_statement(query, kind, limit, offset)
+    return _like_statement(query, kind, limit, offset)
+
+
+def search_result(row):
+    return {'type': row.kind, 'id': row.id, 'snippet': row.snippet, 'score': row.score}
+
+
+def _fts5_statement(query, kind, limit, offset):
+    sql = (f"SELECT CASE rowid % 2 WHEN 0 THEN 'place' ELSE 'review' END AS kind, rowid / 2 AS id, "
+           f"-bm25({SEARCH_TABLE}, 10.0, 1.0) AS score, "
+           f"snippet({SEARCH_TABLE}, -1, '[', ']', '...', 12) AS snippet "
+           f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match")
+    if kind is not None:
+        sql += f" AND (rowid % 2) = {KINDS.index(kind)}"
+    sql += " ORDER BY score DESC LIMIT :limit OFFSET :offset"
+    return text(sql).bindparams(match=build_match_query(query), limit=limit, offset=offset)
+
+
+def _postgresql_statement(query, kind, limit, offset):
+    branches = []
+    if kind in (None, 'place'):
+        branches.append(f"SELECT 'place' AS kind, id, ts_rank({PLACE_VECTOR}, query) AS score "
+                        f"FROM places, to_tsquery('simple', :tsquery) query WHERE {PLACE_VECTOR} @@ query")
+    if kind in (None, 'review'):
+        branches.append(f"SELECT 'review' AS kind, id, ts_rank({REVIEW_VECTOR}, query) AS score "
+                        f"FROM reviews, to_tsquery('simple', :tsquery) query WHERE {REVIEW_VECTOR} @@ query")
+    # Snippets are only made for the rows of the page
+    sql = ("SELECT page.kind, page.id, page.score, ts_headline('simple', "
+           "coalesce(places.title || ' ' || coalesce(places.description, ''), reviews.text), query, "
+           "'StartSel=[, StopSel=], MaxWords=12, MinWords=4') AS snippet "
+           f"FROM ({' UNION ALL '.join(branches)} "
+           "ORDER BY score DESC, kind, id LIMIT :limit OFFSET :offset) page "
+           "LEFT JOIN places ON page.kind = 'place' AND places.id = page.id "
+           "LEFT JOIN reviews ON page.kind = 'review' AND reviews.id = page.id, "
+           "to_tsquery('simple', :tsquery) query "
+           "ORDER BY page.score DESC, page.kind, page.id")
+    return text(sql).bindparams(tsquery=build_tsquery(query), limit=limit, offset=offset)
+
+
+def _like_statement(query, kind, limit, offset):
+    words = search_words(query)
+    branches = []
+    if kind in (None, 'place'):
+        branches.append(select(literal('place').label('kind'), Place.id.label('id'),
+                               Place.title.label('snippet'))
+                        .where(*[or_(Place.title.ilike(f'%{w}%'), Place.description.ilike(f'%{w}%'))
+                                 for w in words]))
+    if kind in (None, 'review'):
+        branches.append(select(literal('review').label('kind'), Review.id.label('id'),
+                               func.substr(Review.text, 1, 80).label('snippet'))
+                        .where(*[Review.text.ilike(f'%{w}%') for w in words]))
+    matches = union_all(*branches).subquery()
+    return (select(matches, null().label('score'))
+            .order_by(matches.c.kind, matches.c.id).limit(limit).offset(offset))
+
+
+class SearchRepository:
+    """Full-text search over places and reviews."""
+
+    def search(self, query, kind=None, limit=20, offset=0):
+        """
+        Search places and reviews, best matches first.
+
+        :param query: Words to look for.
+        :param kind: 'place' or 'review' to restrict the results, None for both.
+        :return: A list of dicts with type, id, snippet and score.
+        """
+        rows = db.session.execute(search_statement(db.engine.dialect.name, query, kind, limit, offset))
+        return [search_result(row) for row in rows]
+
+    def index_many(self, kind, rows):
+        """
+        Index rows inserted without the ORM (the mapper hooks don't see them).
+
+        :param kind: 'place' or 'review'.
+        :param rows: (id, title, body) tuples of new rows.
+        """
+        connection = db.session.connection()
+        if not rows or not _index_available(connection):
+            return
+        connection.execute(
+            text(f"INSERT INTO {SEARCH_TABLE} (rowid, title, body) VALUES (:rowid, :title, :body)"),
+            [{'rowid': _rowid(kind, obj_id), 'title': title or '', 'body': body or ''}
+             for obj_id, title, body in rows]
+        )
+
+    def rebuild(self):
+        """
+        Recreate the index from the places and reviews tables.
+
+        :return: The number of indexed rows.
+        """
+        connection = db.session.connection()
+        if connection.dialect.name != 'sqlite':
+            return 0
+        connection.execute(text(_create_index.statement))
+        _indexed_engines[connection.engine] = True
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+        connection.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, body) "
+            "SELECT id * 2, title, coalesce(description, '') FROM places"
+        ))
+        connection.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, body) SELECT id * 2 + 1, '', text FROM reviews"
+        ))
+        connection.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"))
+        count = connection.execute(text(f"SELECT count(*) FROM {SEARCH_TABLE}")).scalar()
+        db.session.commit()
+        return count
@@ -1,5 +1,8 @@
 from app.models.user import User
 from app import db
+from app.extensions import get_table_version
+from app.persistence.repository import chunked, existing_ids, insert_rows, paginate, replica_read
+from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
 
 class UserRepository:
@@ -8,6 +11,7 @@ class UserRepository:
     def __init__(self):
         self.model = User
 
+    @replica_read
     def get_by_id(self, user_id):
         """Récupère un utilisateur par son ID."""
         return db.session.query(self.model).get(user_id)
@@ -16,6 +20,22 @@ class UserRepository:
         """Récupère un utilisateur par son email."""
         return db.session.query(self.model).filter_by(email=email).first()
 
+    def replace_password_hash(self, user_id, old_hash, new_hash):
+        """
+        Remplace le hash du mot de passe, seulement s'il n'a pas changé entre temps
+        (un changement de mot de passe concurrent gagne toujours).
+
+        :return: True si le hash a été remplacé.
+        """
+        result = db.session.execute(
+            update(self.model)
+            .where(self.model.id == user_id, self.model.password == old_hash)
+            .values(password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
     def create(self, first_name, last_name, email, password, is_admin=False):
         """Crée un nouvel utilisateur."""
         try:
@@ -25,8 +45,7 @@ class UserRepository:
                 email=email,
                 password=password,
                 is_admin=is_admin,
-            )
-            user.hash_password(password)  # Hashage du mot de passe
+            )  # Le modèle hashe le mot de passe une seule fois
             db.session.add(user)
             db.session.commit()
             return user
@@ -41,7 +60,9 @@ class UserRepository:
             raise ValueError("Utilisateur introuvable.")
         
         for key, value in data.items():
-            if hasattr(user, key) and key != "id":
+            if key == "password":
+                user.hash_password(value)  # Ne jamais stocker le mot de passe en clair
+            elif hasattr(user, key) and key != "id":
                 setattr(user, key, value)
         
         db.session.commit()
@@ -56,10 +77,42 @@ class UserRepository:
         db.session.delete(user)
         db.session.commit()
 
+    @replica_read
     def get_all(self):
         """Get all users from the database"""
         return db.session.query(User).all()
 
+    @replica_read
+    def get_page(self, limit, after=None):
+        """Récupère une page d'utilisateurs triés par ID (pagination par curseur)."""
+        return paginate(db.session.query(User), User.id, limit, after)
+
+    def get_existing_ids(self, ids):
+        """Renvoie l'ensemble des IDs d'utilisateurs existants parmi ids (requêtes IN)."""
+        return existing_ids(User, ids)
+
+    def get_existing_emails(self, emails):
+        """Renvoie l'ensemble des emails déjà utilisés parmi emails (requêtes IN sur l'index unique)."""
+        found = set()
+        for chunk in chunked(set(emails)):
+            found.update(db.session.execute(select(User.email).where(User.email.in_(chunk))).scalars())
+        return found
+
+    def insert_many(self, rows):
+        """
+        Insère des utilisateurs en un seul executemany, sans objets ORM ni commit.
+        Les mots de passe doivent déjà être hashés.
+
+        Returns:
+            list: IDs des nouveaux utilisateurs, dans l'ordre de rows
+        """
+        return insert_rows(User, rows)
+
+    @replica_read
+    def get_version(self):
+        """Compteur de modifications de la table users (table_versions)."""
+        return get_table_version(User.__tablename__)
+
     def get(self, id):
         """Alias pour get_by_id pour maintenir la cohérence avec les autres repositories"""
         return self.get_by_id(id)
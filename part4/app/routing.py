@@ -0,0 +1,117 @@
+import random
+from contextlib import contextmanager
+from flask import current_app, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+# Requests whose reads may be served by a replica: they don't write, so a
+# replica lagging behind the primary can only make them return older data.
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class RoutingSession(Session):
+    """
+    Session sending the reads of the repositories to a read replica.
+
+    Queries go to a replica only inside replica_reads() blocks (the
+    repositories' read methods, see replica_read), during a GET or HEAD
+    request, and until the session writes: from its first INSERT, UPDATE,
+    DELETE or flush on, every query of the request goes to the primary, so
+    a request always reads its own writes. Each session sticks to one
+    replica, so all the reads of a request see the same state.
+
+    Configuration:
+
+    - SQLALCHEMY_BINDS: the replicas' database URIs, under bind keys
+    - READ_REPLICA_BINDS: the bind keys of the replicas (none by default: everything goes to the primary)
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._replica_reads = None
+
+    @contextmanager
+    def replica_reads(self):
+        """Allow the queries of the block to go to a replica (unless an enclosing block forbids it)."""
+        previous = self._replica_reads
+        if previous is None:
+            self._replica_reads = True
+        try:
+            yield
+        finally:
+            self._replica_reads = previous
+
+    @contextmanager
+    def primary_reads(self):
+        """Send the queries of the block to the primary, even inside replica_reads()."""
+        previous = self._replica_reads
+        self._replica_reads = False
+        try:
+            yield
+        finally:
+            self._replica_reads = previous
+
+    @property
+    def wrote(self):
+        """True once this session sent a write to the primary."""
+        return self.info.get('wrote', False)
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info['wrote'] = True
+            elif self._replica_reads and not self.wrote:
+                replica = self._replica()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica(self):
+        if not has_request_context() or request.method not in SAFE_METHODS:
+            return None
+        keys = current_app.config.get('READ_REPLICA_BINDS')
+        if not keys:
+            return None
+        if 'replica' not in self.info:
+            self.info['replica'] = random.choice(keys)
+        return self._db.engines[self.info['replica']]
+
+
+class SQLiteReplicator:
+    """
+    Stand-in for database replication, to run the read replicas locally on
+    SQLite files: sync() copies the primary database into every replica with
+    SQLite's online backup API. With SQLITE_REPLICA_SYNC = True, every commit
+    that wrote is copied at once; otherwise replicas lag until sync() is
+    called, like a replica falling behind.
+    """
+
+    def __init__(self, primary, replicas, auto=False):
+        """
+        :param primary: Engine of the primary database.
+        :param replicas: Engines of the replica databases.
+        :param auto: Sync after every commit that wrote.
+        """
+        self.primary = primary
+        self.replicas = replicas
+        self.auto = auto
+
+    def sync(self):
+        source = self.primary.raw_connection()
+        try:
+            for replica in self.replicas:
+                target = replica.raw_connection()
+                try:
+                    source.driver_connection.backup(target.driver_connection)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _replicate(session):
+    replicator = current_app.extensions.get('sqlite_replicator') if has_app_context() else None
+    if replicator is not None and replicator.auto and session.wrote:
+        replicator.sync()
@@ -0,0 +1,137 @@
+import os
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import inspect
+
+# Scripts of the Alembic migrations (part4/migrations)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+# Schemas that db.create_all() made before the migrations existed, newest
+# first: (revision that creates the same schema, columns of each table,
+# indexes). `flask hbnb init-db` stamps such databases with the revision,
+# then the following migrations bring them up to date.
+_INITIAL_COLUMNS = {
+    'users': {'id', 'first_name', 'last_name', 'email', 'password', 'is_admin', 'created_at', 'updated_at'},
+    'amenities': {'id', 'name', 'created_at', 'updated_at'},
+    'places': {'id', 'title', 'description', 'price', 'latitude', 'longitude', 'owner_id', 'created_at',
+               'updated_at'},
+    'place_amenity_association': {'place_id', 'amenity_id'},
+    'reviews': {'id', 'text', 'rating', 'place_id', 'user_id', 'created_at', 'updated_at'},
+}
+_SERIES_COLUMNS = dict(_INITIAL_COLUMNS, places=_INITIAL_COLUMNS['places'] | {'geohash', 'review_count', 'rating_sum'},
+                       table_versions={'table_name', 'version'})
+# The models had the reviews index on (place_id, created_at) then: 677353494d84 replaces it
+_SERIES_INDEXES = {'ix_places_price', 'ix_places_geohash', 'ix_reviews_place_id_created_at'}
+CREATE_ALL_SCHEMAS = (
+    ('accc6ea2a4f1', _SERIES_COLUMNS,
+     _SERIES_INDEXES | {'ix_places_owner_id', 'ix_place_amenity_association_amenity_id'}),
+    ('eeb726c19bb3', _SERIES_COLUMNS, _SERIES_INDEXES),
+    ('1b7e4c2d9a05', _INITIAL_COLUMNS, set()),
+)
+
+
+class _MigrateCommands(click.Group):
+    """
+    The `flask db` commands of Flask-Migrate, imported when the group is
+    used. Same options as Flask-Migrate's group, passed on to it.
+    """
+
+    def __init__(self, migrate):
+        super().__init__('db', callback=with_appcontext(self.setup), help="Database migrations (Flask-Migrate).",
+                         params=[click.Option(['-d', '--directory'], default=None,
+                                              help='Migration script directory (default is "migrations")'),
+                                 click.Option(['-x', '--x-arg'], multiple=True,
+                                              help='Additional arguments consumed by custom env.py scripts')])
+        self.migrate = migrate
+
+    def setup(self, directory, x_arg):
+        from flask_migrate.cli import db as commands
+        self.migrate.load(current_app)
+        commands.callback(directory=directory, x_arg=x_arg)
+
+    def list_commands(self, ctx):
+        from flask_migrate.cli import db as commands
+        return commands.list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        from flask_migrate.cli import db as commands
+        return commands.get_command(ctx, name)
+
+
+class LazyMigrate:
+    """
+    Flask-Migrate, set up when a migration runs rather than in create_app.
+
+    Importing Flask-Migrate and Alembic takes longer than the rest of
+    create_app, and the workers never migrate: init_app only registers the
+    `flask db ...` commands, and load() (called by them and by `flask hbnb
+    init-db`) sets up the real extension on first use.
+    """
+
+    def __init__(self, directory=MIGRATIONS_DIR):
+        self.db = None
+        self.directory = directory
+
+    def init_app(self, app, db):
+        self.db = db
+        app.cli.add_command(_MigrateCommands(self))
+
+    def load(self, app):
+        """Set up Flask-Migrate on app (once) and return the flask_migrate module."""
+        import flask_migrate
+        if 'migrate' not in app.extensions:
+            flask_migrate.Migrate(app, self.db, self.directory, render_as_batch=True)
+        return flask_migrate
+
+
+def _tables(inspector):
+    # Sans la table d'Alembic ni l'index plein texte et ses tables (hors des modèles)
+    from app.persistence.search_repository import SEARCH_TABLE
+    return [name for name in inspector.get_table_names()
+            if name != 'alembic_version' and not name.startswith(SEARCH_TABLE)]
+
+
+def create_all_revision(bind, metadata):
+    """
+    Revision to stamp a database created by db.create_all() with: 'head' if
+    it has the tables and indexes of the current models (metadata), else the
+    newest of CREATE_ALL_SCHEMAS it matches, None if it matches none of them.
+    """
+    inspector = inspect(bind)
+    columns = {table: {column['name'] for column in inspector.get_columns(table)} for table in _tables(inspector)}
+    indexes = {index['name'] for table in columns for index in inspector.get_indexes(table)}
+    current = ('head', {table.name: {column.name for column in table.columns} for table in metadata.sorted_tables},
+               {index.name for table in metadata.sorted_tables for index in table.indexes})
+    for revision, expected_columns, expected_indexes in (current,) + CREATE_ALL_SCHEMAS:
+        if columns == expected_columns and expected_indexes <= indexes:
+            return revision
+    return None
+
+
+def _covers(columns, index_columns):
+    """True if an index on index_columns can serve lookups on columns (its leading columns)"""
+    return set(index_columns[:len(columns)]) == set(columns)
+
+
+def unindexed_foreign_keys(bind):
+    """
+    Foreign keys of the database without an index starting with their
+    columns, as (table, columns) pairs.
+
+    Deleting or updating a referenced row, and joining from the referenced
+    table, looks the referencing rows up by these columns: without an index
+    each lookup scans the table. The primary key, unique constraints and
+    composite indexes count when the foreign key columns come first.
+    """
+    inspector = inspect(bind)
+    missing = []
+    for table in inspector.get_table_names():
+        indexed = [index['column_names'] for index in inspector.get_indexes(table)]
+        indexed += [unique['column_names'] for unique in inspector.get_unique_constraints(table)]
+        indexed.append(inspector.get_pk_constraint(table)['constrained_columns'])
+        for foreign_key in inspector.get_foreign_keys(table):
+            columns = foreign_key['constrained_columns']
+            if not any(_covers(columns, index_columns) for index_columns in indexed):
+                missing.append((table, tuple(columns)))
+    return missing
@@ -1,3 +1,4 @@
 from app.services.facade import HBnBFacade
 
+# The only instance of the facade: import it from here
 facade = HBnBFacade()
\ No newline at end of file
@@ -0,0 +1,322 @@
+import asyncio
+import logging
+from contextlib import nullcontext
+from datetime import datetime
+from functools import wraps
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from app.extensions import hasher, table_versions
+from app.geo import bounding_box
+from app.persistence.async_repository import AsyncSQLAlchemyRepository, paginate_async
+from app.persistence.place_repository import nearest, place_filter_clauses, place_order
+from app.persistence.search_repository import search_result, search_statement
+from app.services.facade import check_near, check_search_type
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+
+logger = logging.getLogger(__name__)
+
+
+def serialized(method):
+    """Run a write method of the facade holding its write lock"""
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        async with self.write_lock:
+            return await method(self, *args, **kwargs)
+    return wrapper
+
+
+class AsyncHBnBFacade:
+    """
+    Async counterpart of HBnBFacade for the ASGI app (app/asgi.py), limited
+    to the users, places, reviews, amenities, auth and search endpoints.
+
+    One instance per request, bound to the request's AsyncSession. It applies
+    the same rules and error messages as HBnBFacade; password hashing runs in
+    a thread so a login never blocks the event loop.
+
+    write_lock is held from the first write of a method to its commit. On
+    SQLite (a single writer at a time) the ASGI app passes an asyncio.Lock
+    shared by its requests: a write transaction waiting for its turn on the
+    event loop would otherwise keep the database locked, and the other
+    writers would time out in busy_timeout.
+    """
+
+    def __init__(self, session, write_lock=None):
+        self.session = session
+        self.write_lock = write_lock or nullcontext()
+        self.user_repo = AsyncSQLAlchemyRepository(User, session)
+        self.place_repo = AsyncSQLAlchemyRepository(Place, session)
+        self.amenity_repo = AsyncSQLAlchemyRepository(Amenity, session)
+        self.review_repo = AsyncSQLAlchemyRepository(Review, session)
+
+    # Users
+
+    async def create_user(self, user_data):
+        user_data = dict(user_data)
+        password = user_data.pop('password')
+        if not password.strip():
+            raise ValueError("Mot de passe vide")
+        user = User(**user_data)
+        user.password = await asyncio.to_thread(hasher.hash, password)
+        return await self._add(self.user_repo, user)
+
+    @serialized
+    async def _add(self, repo, obj):
+        return await repo.add(obj)
+
+    async def get_user(self, user_id):
+        return await self.user_repo.get(user_id)
+
+    async def get_user_by_email(self, email):
+        return await self.user_repo.get_by_attribute('email', email)
+
+    async def get_all_users(self):
+        return await self.user_repo.get_all()
+
+    async def get_users_page(self, limit, after=None):
+        return await self.user_repo.get_page(limit, after)
+
+    async def update_user(self, user_id, user_data):
+        user_data = {key: value for key, value in user_data.items() if hasattr(User, key) and key != 'id'}
+        if 'password' in user_data:
+            password = user_data['password']
+            if not password.strip():
+                raise ValueError("Mot de passe vide")
+            user_data['password'] = await asyncio.to_thread(hasher.hash, password)
+        return await self._update(self.user_repo, user_id, user_data)
+
+    @serialized
+    async def _update(self, repo, obj_id, data):
+        return await repo.update(obj_id, data)
+
+    @serialized
+    async def delete_user(self, user_id):
+        if not await self.get_user(user_id):
+            return False
+        try:
+            return await self.user_repo.delete(user_id)
+        except IntegrityError as e:
+            await self.session.rollback()
+            logger.error("Error deleting user: %s", e)
+            raise ValueError("User has reviews, or places with reviews")
+
+    async def authenticate(self, email, password):
+        """Return the user if the email/password pair is valid, None otherwise"""
+        user = await self.get_user_by_email(email)
+        if not user or not user.password:
+            return None
+        if not await asyncio.to_thread(hasher.verify, user.password, password):
+            return None
+        if hasher.needs_rehash(user.password):
+            await self._rehash_password(user.id, user.password, password)
+        return user
+
+    async def _rehash_password(self, user_id, old_hash, password):
+        """Upgrade a stale password hash, unless it changed in the meantime"""
+        await self._replace_password_hash(user_id, old_hash, await asyncio.to_thread(hasher.hash, password))
+
+    @serialized
+    async def _replace_password_hash(self, user_id, old_hash, new_hash):
+        await self.session.execute(update(User)
+                                   .where(User.id == user_id, User.password == old_hash)
+                                   .values(password=new_hash))
+        await self.session.commit()
+
+    # Amenities
+
+    async def create_amenity(self, amenity_data):
+        if len(amenity_data['name']) > 50:
+            raise ValueError("Amenity name must be 50 characters or less")
+        return await self._add(self.amenity_repo, Amenity(**amenity_data))
+
+    async def get_amenity(self, amenity_id):
+        return await self.amenity_repo.get(amenity_id)
+
+    async def get_all_amenities(self):
+        return await self.amenity_repo.get_all()
+
+    async def get_amenities_page(self, limit, after=None):
+        return await self.amenity_repo.get_page(limit, after)
+
+    async def update_amenity(self, amenity_id, amenity_data):
+        if 'name' in amenity_data and len(amenity_data['name']) > 50:
+            raise ValueError("Amenity name must be 50 characters or less")
+        return await self._update(self.amenity_repo, amenity_id, amenity_data)
+
+    # Places (amenities always loaded: place_to_dict lists them)
+
+    @serialized
+    async def create_place(self, place_data):
+        place_data = dict(place_data)
+        owner_id = place_data.pop('owner_id', None)
+        amenities_ids = place_data.pop('amenities', [])
+        if not owner_id:
+            raise ValueError("owner_id is required")
+        owner = await self.get_user(owner_id)
+        if not owner:
+            raise ValueError(f"User with id {owner_id} not found")
+
+        try:
+            place = Place(**place_data, owner=owner)
+            # The place isn't in the session yet: don't let the lookups flush it
+            with self.session.no_autoflush:
+                for amenity_id in amenities_ids:
+                    amenity = await self.get_amenity(amenity_id)
+                    if amenity:
+                        place.add_amenity(amenity)
+                    else:
+                        logger.warning("Amenity %s not found", amenity_id)
+            return await self.place_repo.add(place)
+        except Exception as e:
+            await self.session.rollback()
+            logger.error("Error creating place: %s", e)
+            raise ValueError(str(e))
+
+    async def get_place(self, place_id):
+        return await self.place_repo.get(place_id, selectinload(Place.amenities))
+
+    def _places_query(self, filters):
+        return select(Place).options(selectinload(Place.amenities)).where(*place_filter_clauses(**filters))
+
+    async def get_all_places(self, sort=None, **filters):
+        return (await self.session.scalars(self._places_query(filters).order_by(*place_order(sort)))).all()
+
+    async def get_places_page(self, limit, after=None, **filters):
+        return await paginate_async(self.session, self._places_query(filters), Place.id, limit, after)
+
+    async def get_places_near(self, latitude, longitude, radius_km, limit=None, **filters):
+        check_near(latitude, longitude, radius_km)
+        query = self._places_query(dict(filters, bbox=bounding_box(latitude, longitude, radius_km)))
+        return nearest((await self.session.scalars(query)).all(), latitude, longitude, radius_km, limit)
+
+    @serialized
+    async def update_place(self, place_id, place_data):
+        place = await self.get_place(place_id)
+        if not place:
+            return None
+
+        try:
+            if 'title' in place_data:
+                if len(place_data['title']) > 100:
+                    raise ValueError("Title must be 100 characters or less")
+                place.title = place_data['title']
+            if 'description' in place_data:
+                place.description = place_data['description']
+            if 'price' in place_data:
+                if place_data['price'] < 0:
+                    raise ValueError("Price must be a non-negative number")
+                place.price = float(place_data['price'])
+            if 'latitude' in place_data:
+                if not (-90 <= place_data['latitude'] <= 90):
+                    raise ValueError("Latitude must be between -90 and 90")
+                place.latitude = float(place_data['latitude'])
+            if 'longitude' in place_data:
+                if not (-180 <= place_data['longitude'] <= 180):
+                    raise ValueError("Longitude must be between -180 and 180")
+                place.longitude = float(place_data['longitude'])
+            if 'owner_id' in place_data:
+                owner = await self.get_user(place_data['owner_id'])
+                if not owner:
+                    raise ValueError(f"User with id {place_data['owner_id']} not found")
+                place.owner_id = owner.id
+            if 'amenities' in place_data:
+                # The association table has no timestamp: touch the place so its ETag changes
+                place.updated_at = datetime.utcnow()
+                place.amenities = []
+                for amenity_id in place_data['amenities']:
+                    amenity = await self.get_amenity(amenity_id)
+                    if amenity:
+                        place.add_amenity(amenity)
+            await self.session.commit()
+            return place
+        except Exception as e:
+            await self.session.rollback()
+            logger.error("Error updating place: %s", e)
+            raise ValueError(str(e))
+
+    @serialized
+    async def delete_place(self, place_id):
+        return await self.place_repo.delete(place_id)
+
+    # Reviews
+
+    @serialized
+    async def create_review(self, review_data):
+        if not (1 <= review_data['rating'] <= 5):
+            raise ValueError("Rating must be between 1 and 5")
+        user = await self.get_user(review_data['user_id'])
+        if not user:
+            raise ValueError("User not found")
+        place = await self.place_repo.get(review_data['place_id'])
+        if not place:
+            raise ValueError("Place not found")
+        review = Review(text=review_data['text'], rating=review_data['rating'], place=place, user=user)
+        # Same SQL increments as HBnBFacade.create_review, in the review's transaction
+        place.review_count = Place.review_count + 1
+        place.rating_sum = Place.rating_sum + review.rating
+        try:
+            return await self.review_repo.add(review)
+        except IntegrityError:
+            # The unique (user_id, place_id) constraint is the duplicate check
+            await self.session.rollback()
+            raise ValueError("You have already reviewed this place")
+
+    async def get_review(self, review_id):
+        return await self.review_repo.get(review_id)
+
+    async def get_all_reviews(self):
+        return await self.review_repo.get_all()
+
+    async def get_reviews_page(self, limit, after=None):
+        return await self.review_repo.get_page(limit, after)
+
+    async def get_reviews_by_place(self, place_id):
+        if not await self.place_repo.get(place_id):
+            raise ValueError("Place not found")
+        query = select(Review).where(Review.place_id == place_id).order_by(Review.id)
+        return (await self.session.scalars(query)).all()
+
+    async def get_reviews_by_place_page(self, place_id, limit, after=None):
+        if not await self.place_repo.get(place_id):
+            raise ValueError("Place not found")
+        return await paginate_async(self.session, select(Review).where(Review.place_id == place_id),
+                                    Review.id, limit, after)
+
+    @serialized
+    async def update_review(self, review_id, review_data):
+        review = await self.get_review(review_id)
+        if not review:
+            return None
+        if 'rating' in review_data and not (1 <= review_data['rating'] <= 5):
+            raise ValueError("Rating must be between 1 and 5")
+        if 'rating' in review_data and review_data['rating'] != review.rating:
+            await self.session.execute(update(Place).where(Place.id == review.place_id)
+                                       .values(rating_sum=Place.rating_sum + (review_data['rating'] - review.rating)))
+        return await self.review_repo.update(review_id, review_data)
+
+    @serialized
+    async def delete_review(self, review_id):
+        review = await self.get_review(review_id)
+        if not review:
+            return False
+        await self.session.execute(update(Place).where(Place.id == review.place_id)
+                                   .values(review_count=Place.review_count - 1,
+                                           rating_sum=Place.rating_sum - review.rating))
+        return await self.review_repo.delete(review_id)
+
+    # Search and table versions
+
+    async def search(self, query, kind=None, limit=20, offset=0):
+        check_search_type(kind)
+        rows = await self.session.execute(search_statement(self.session.bind.dialect.name, query, kind,
+                                                           limit, offset))
+        return [search_result(row) for row in rows]
+
+    async def get_collection_version(self, name):
+        version = await self.session.scalar(select(table_versions.c.version)
+                                            .where(table_versions.c.table_name == name))
+        return version or 0
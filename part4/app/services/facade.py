@@ -1,14 +1,82 @@
+import json
 import logging
+from datetime import datetime
+from types import SimpleNamespace
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
 from app.persistence.user_repository import UserRepository
+from app.persistence.place_repository import PlaceRepository
+from app.persistence.review_repository import ReviewRepository
+from app.persistence.search_repository import SearchRepository
 from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.cached_repository import CachedRepository
+from app.persistence.dataset_repository import DatasetRepository, ENTITY_TABLES, parse_entities
+from app.extensions import bump_table_versions, db, hasher
+from app.geo import geohash_encode
+from app.hashing import is_password_hash
+from app.services.importer import coerce_row, read_records
 from app.models.user import User
 from app.models.amenity import Amenity
 from app.models.place import Place
 from app.models.review import Review
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+
+def check_near(latitude, longitude, radius_km):
+    """Check the point and radius of a near search, raising ValueError if they are out of range"""
+    if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
+        raise ValueError("near must be a valid 'latitude,longitude' pair")
+    if not 0 < radius_km <= 1000:
+        raise ValueError("radius_km must be between 0 and 1000")
+
+
+def check_search_type(kind):
+    """Check the type a search is restricted to (None for both), raising ValueError if it is unknown"""
+    if kind not in (None, 'place', 'review'):
+        raise ValueError("type must be 'place' or 'review'")
+
+
+def check_record(record, required, optional=()):
+    """
+    Check the fields of one item of a bulk request.
+
+    :return: The record, with the missing optional fields set to None.
+    :raises ValueError: If a required field is missing or a field is unknown.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Each item must be an object")
+    missing = [field for field in required if field not in record]
+    if missing:
+        raise ValueError(f"Missing field(s): {', '.join(missing)}")
+    unknown = sorted(set(record) - set(required) - set(optional))
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return dict({field: None for field in optional}, **record)
+
+
+def to_id(value, name):
+    """Convert an ID sent as a number or a string of digits"""
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+
+
+# Fields accepted by import for each entity: (required, optional). The rating
+# aggregates and geohash of places are accepted (export writes them) but
+# always recomputed.
+IMPORT_FIELDS = {
+    'users': (('first_name', 'last_name', 'email', 'password'), ('id', 'is_admin', 'created_at', 'updated_at')),
+    'amenities': (('name',), ('id', 'created_at', 'updated_at')),
+    'places': (('title', 'price', 'latitude', 'longitude', 'owner_id'),
+               ('id', 'description', 'geohash', 'review_count', 'rating_sum', 'created_at', 'updated_at')),
+    'place_amenity_association': (('place_id', 'amenity_id'), ()),
+    'reviews': (('text', 'rating', 'place_id', 'user_id'), ('id', 'created_at', 'updated_at')),
+}
+
 class HBnBFacade:
     _instance = None
 
@@ -20,54 +88,95 @@ class HBnBFacade:
 
     def __init__(self):
         if not self._initialized:
-            # Use UserRepository for User and SQLAlchemyRepository for others
-            self.user_repo = UserRepository()
-            self.place_repo = SQLAlchemyRepository(Place)
-            self.amenity_repo = SQLAlchemyRepository(Amenity)
-            self.review_repo = SQLAlchemyRepository(Review)
+            # Use the specific repositories for User, Place and Review, SQLAlchemyRepository for others,
+            # behind the read-through cache for lookups by ID
+            self.user_repo = CachedRepository(UserRepository())
+            self.place_repo = CachedRepository(PlaceRepository())
+            self.amenity_repo = CachedRepository(SQLAlchemyRepository(Amenity))
+            self.review_repo = CachedRepository(ReviewRepository())
+            self.search_repo = SearchRepository()
+            self.dataset_repo = DatasetRepository()
             self._initialized = True
 
     def create_user(self, user_data):
-        logger.debug(f"Creating user with data: {user_data}")
+        logger.debug("Creating user with email: %s", user_data.get('email'))  # Not the password
         try:
             user = self.user_repo.create(**user_data)
-            logger.debug(f"User created with ID: {user.id}")
+            logger.debug("User created with ID: %s", user.id)
             return user
         except ValueError as e:
-            logger.error(f"Error creating user: {e}")
+            logger.error("Error creating user: %s", e)
             raise
 
     def get_user(self, user_id):
-        logger.debug(f"Looking for user with ID: {user_id}")
+        logger.debug("Looking for user with ID: %s", user_id)
         user = self.user_repo.get_by_id(user_id)
         if user:
-            logger.debug(f"Found user: {user.first_name} {user.last_name}")
+            logger.debug("Found user: %s %s", user.first_name, user.last_name)
         else:
             logger.debug("User not found")
         return user
 
     def get_user_by_email(self, email):
-        logger.debug(f"Looking for user with email: {email}")
+        logger.debug("Looking for user with email: %s", email)
         user = self.user_repo.get_by_email(email)
         if user:
-            logger.debug(f"Found user: {user.first_name} {user.last_name}")
+            logger.debug("Found user: %s %s", user.first_name, user.last_name)
         else:
             logger.debug("User not found")
         return user
 
+    def authenticate(self, email, password):
+        """Return the user if the email/password pair is valid, None otherwise"""
+        user = self.user_repo.get_by_email(email)
+        if not user or not user.verify_password(password):
+            return None
+        if hasher.needs_rehash(user.password):
+            self._rehash_password(user.id, user.password, password)
+        return user
+
+    def _rehash_password(self, user_id, old_hash, password):
+        """Upgrade a stale password hash in the background, after a successful login"""
+        app = current_app._get_current_object()
+
+        def store(new_hash):
+            with app.app_context():
+                try:
+                    self.user_repo.replace_password_hash(user_id, old_hash, new_hash)
+                finally:
+                    db.session.remove()
+
+        hasher.rehash_later(password, store)
+
     def get_all_users(self):
         """Retrieve all users from the repository"""
         return self.user_repo.get_all()
 
+    def get_users_page(self, limit, after=None):
+        """Retrieve one page of users and the cursor of the next page"""
+        return self.user_repo.get_page(limit, after)
+
     def update_user(self, user_id, user_data):
         """Update user with new data"""
         try:
             user = self.user_repo.update(user_id, user_data)
             return user
         except ValueError as e:
-            logger.error(f"Error updating user: {e}")
+            logger.error("Error updating user: %s", e)
             raise
 
+    def delete_user(self, user_id):
+        """Delete a user (and their places) by ID, False if there is none"""
+        if not self.get_user(user_id):
+            return False
+        try:
+            self.user_repo.delete(user_id)
+        except IntegrityError as e:
+            db.session.rollback()
+            logger.error("Error deleting user: %s", e)
+            raise ValueError("User has reviews, or places with reviews")
+        return True
+
     def create_amenity(self, amenity_data):
         """Create a new amenity"""
         if len(amenity_data['name']) > 50:
@@ -84,6 +193,10 @@ class HBnBFacade:
         """Get all amenities"""
         return self.amenity_repo.get_all()
 
+    def get_amenities_page(self, limit, after=None):
+        """Get one page of amenities and the cursor of the next page"""
+        return self.amenity_repo.get_page(limit, after)
+
     def update_amenity(self, amenity_id, amenity_data):
         """Update an amenity"""
         if 'name' in amenity_data and len(amenity_data['name']) > 50:
@@ -95,7 +208,7 @@ class HBnBFacade:
         return None
 
     def create_place(self, place_data):
-        logger.debug(f"Attempting to create place with data: {place_data}")
+        logger.debug("Attempting to create place with data: %s", place_data)
 
         # Extract owner_id and amenities from place_data
         owner_id = place_data.pop('owner_id', None)
@@ -121,22 +234,44 @@ class HBnBFacade:
                 if amenity:
                     place.add_amenity(amenity)
                 else:
-                    logger.warning(f"Amenity {amenity_id} not found")
+                    logger.warning("Amenity %s not found", amenity_id)
 
             self.place_repo.add(place)
-            logger.debug(f"Place added to repository with owner {owner.id}")
+            logger.debug("Place added to repository with owner %s", owner.id)
 
             return place
 
         except Exception as e:
-            logger.error(f"Error creating place: {str(e)}")
+            logger.error("Error creating place: %s", e)
             raise ValueError(str(e))
 
     def get_place(self, place_id):
         return self.place_repo.get(place_id)
 
-    def get_all_places(self):
-        return self.place_repo.get_all()
+    def get_all_places(self, sort=None, **filters):
+        """Get all places matching the filters, with their amenities joined in the same query"""
+        return self.place_repo.get_filtered(filters, sort=sort)
+
+    def get_places_page(self, limit, after=None, **filters):
+        """Get one page of places matching the filters and the cursor of the next page"""
+        return self.place_repo.get_filtered_page(filters, limit, after)
+
+    def get_places_near(self, latitude, longitude, radius_km, limit=None, **filters):
+        """Get (place, distance_km) pairs within radius_km of a point, nearest first"""
+        check_near(latitude, longitude, radius_km)
+        return self.place_repo.get_near(latitude, longitude, radius_km, filters, limit)
+
+    def rebuild_geohashes(self):
+        """Recompute the geohash column of every place (e.g. after a raw SQL import)"""
+        count = self.place_repo.rebuild_geohashes()
+        logger.info("Rebuilt geohashes for %s places", count)
+        return count
+
+    def rebuild_rating_aggregates(self):
+        """Recompute review_count/rating_sum of every place from the reviews table"""
+        count = self.place_repo.rebuild_rating_aggregates()
+        logger.info("Rebuilt rating aggregates for %s places", count)
+        return count
 
     def update_place(self, place_id, place_data):
         place = self.place_repo.get(place_id)
@@ -176,6 +311,8 @@ class HBnBFacade:
                     raise ValueError(f"User with id {place_data['owner_id']} not found")
 
             if 'amenities' in place_data:
+                # The association table has no timestamp: touch the place so its ETag changes
+                place.updated_at = datetime.utcnow()
                 place.amenities = []  # Reset amenities
                 for amenity_id in place_data['amenities']:
                     amenity = self.amenity_repo.get(amenity_id)
@@ -186,7 +323,7 @@ class HBnBFacade:
             from app import db
             db.session.commit()
             
-            logger.debug(f"Successfully updated place {place_id}")
+            logger.debug("Successfully updated place %s", place_id)
             return place
 
         except Exception as e:
@@ -194,7 +331,7 @@ class HBnBFacade:
             from app import db
             db.session.rollback()
             
-            logger.error(f"Error updating place: {str(e)}")
+            logger.error("Error updating place: %s", e)
             raise ValueError(str(e))
 
     def delete_place(self, place_id):
@@ -203,7 +340,7 @@ class HBnBFacade:
             # Vérifier si la place existe
             place = self.place_repo.get(place_id)
             if not place:
-                logger.error(f"Place with ID {place_id} not found")
+                logger.error("Place with ID %s not found", place_id)
                 return False
             
             # Supprimer la place
@@ -213,14 +350,14 @@ class HBnBFacade:
             from app import db
             db.session.commit()
             
-            logger.debug(f"Successfully deleted place {place_id}")
+            logger.debug("Successfully deleted place %s", place_id)
             return True
             
         except Exception as e:
             from app import db
             db.session.rollback()
             
-            logger.error(f"Error deleting place: {str(e)}")
+            logger.error("Error deleting place: %s", e)
             raise ValueError(str(e))
 
     def create_review(self, review_data):
@@ -238,7 +375,19 @@ class HBnBFacade:
             place=place,
             user=user
         )
-        self.review_repo.add(review)
+        # Updated in SQL so concurrent reviews can't lose an increment, and
+        # committed in the same transaction as the review itself
+        place.review_count = Place.review_count + 1
+        place.rating_sum = Place.rating_sum + review.rating
+        try:
+            self.review_repo.add(review)
+        except IntegrityError:
+            # The unique (user_id, place_id) constraint is the duplicate check
+            from app import db
+            db.session.rollback()
+            if self.has_already_reviewed(user.id, place.id):
+                raise ValueError("You have already reviewed this place")
+            raise ValueError("Could not create review")
         return review
 
     def get_review(self, review_id):
@@ -247,27 +396,30 @@ class HBnBFacade:
     def get_all_reviews(self):
         return self.review_repo.get_all()
 
+    def get_reviews_page(self, limit, after=None):
+        return self.review_repo.get_page(limit, after)
+
     def get_reviews_by_place(self, place_id):
         place = self.get_place(place_id)
         if not place:
             raise ValueError("Place not found")
-        
-        # Filtrer manuellement puisque la méthode n'existe pas dans SQLAlchemyRepository
-        all_reviews = self.review_repo.get_all()
-        filtered_reviews = [review for review in all_reviews if str(review.place_id) == str(place_id)]
-        
-        # Ajouter des logs pour le débogage
-        print(f"Found {len(filtered_reviews)} reviews for place_id {place_id}")
-        for review in filtered_reviews:
-            print(f"Review {review.id}: text={review.text}, rating={review.rating}")
-        
-        return filtered_reviews
+        return self.review_repo.get_by_place_id(place.id)
+
+    def get_reviews_by_place_page(self, place_id, limit, after=None):
+        """Get one page of reviews for a place and the cursor of the next page"""
+        place = self.get_place(place_id)
+        if not place:
+            raise ValueError("Place not found")
+        return self.review_repo.get_page_by_place_id(place.id, limit, after)
 
     def update_review(self, review_id, review_data):
         review = self.review_repo.get(review_id)
         if review:
             if 'rating' in review_data and not (1 <= review_data['rating'] <= 5):
                 raise ValueError("Rating must be between 1 and 5")
+            if 'rating' in review_data and review_data['rating'] != review.rating:
+                place = self.place_repo.get(review.place_id)
+                place.rating_sum = Place.rating_sum + (review_data['rating'] - review.rating)
             self.review_repo.update(review_id, review_data)
             return review
         return None
@@ -275,6 +427,9 @@ class HBnBFacade:
     def delete_review(self, review_id):
         review = self.review_repo.get(review_id)
         if review:
+            place = self.place_repo.get(review.place_id)
+            place.review_count = Place.review_count - 1
+            place.rating_sum = Place.rating_sum - review.rating
             self.review_repo.delete(review_id)
             return True
         return False
@@ -290,11 +445,431 @@ class HBnBFacade:
         Returns:
             bool: True if the user has already reviewed the place, False otherwise
         """
-        reviews = self.get_reviews_by_place(place_id)
-        for review in reviews:
-            if review.user.id == user_id:
-                return True
-        return False
+        return self.review_repo.exists_for_user_and_place(user_id, place_id)
+
+    def search(self, query, kind=None, limit=20, offset=0):
+        """Full-text search over places and reviews, best matches first"""
+        check_search_type(kind)
+        return self.search_repo.search(query, kind, limit, offset)
+
+    def rebuild_search_index(self):
+        """Reindex every place and review (e.g. after a raw SQL import)"""
+        count = self.search_repo.rebuild()
+        logger.info("Rebuilt search index with %s entries", count)
+        return count
+
+    # Bulk creation: every item is validated first (with the models'
+    # validation methods, no ORM object is built), foreign keys are resolved
+    # with IN (...) queries, then the valid items are inserted with
+    # executemany in a single transaction. Results are reported per item, in
+    # request order: {'index': i, 'id': ...} or {'index': i, 'error': ...}.
+
+    def create_amenities_bulk(self, records):
+        """Create many amenities in one transaction"""
+        results, rows = [None] * len(records), []
+        for index, record in enumerate(records):
+            try:
+                data = check_record(record, ('name',))
+                Amenity.validate(SimpleNamespace(**data))
+                rows.append((index, {'name': data['name']}))
+            except ValueError as e:
+                results[index] = {'index': index, 'error': str(e)}
+
+        return self._insert_bulk(self.amenity_repo, rows, results)
+
+    def create_places_bulk(self, records, owner_id=None):
+        """
+        Create many places (and their amenity links) in one transaction.
+
+        :param owner_id: Owner of every place; if None, each record must have an owner_id.
+        """
+        results, pending = [None] * len(records), []
+        for index, record in enumerate(records):
+            try:
+                data = check_record(record, ('title', 'price', 'latitude', 'longitude'),
+                                     ('description', 'owner_id', 'amenities'))
+                data['description'] = data['description'] or ''
+                Place.validate_attributes(SimpleNamespace(**data))
+                if len(data['title']) > 100:
+                    raise ValueError("Title must be 100 characters or less")
+                owner = owner_id if owner_id is not None else data['owner_id']
+                if owner is None:
+                    raise ValueError("owner_id is required")
+                amenity_ids = [to_id(amenity_id, 'amenities') for amenity_id in data['amenities'] or []]
+                row = {'title': data['title'], 'description': data['description'],
+                       'price': float(data['price']), 'latitude': float(data['latitude']),
+                       'longitude': float(data['longitude']), 'owner_id': to_id(owner, 'owner_id'),
+                       'geohash': geohash_encode(data['latitude'], data['longitude']),
+                       'review_count': 0, 'rating_sum': 0}
+                pending.append((index, row, set(amenity_ids)))
+            except ValueError as e:
+                results[index] = {'index': index, 'error': str(e)}
+
+        users = self.user_repo.get_existing_ids({row['owner_id'] for _, row, _ in pending})
+        amenities = self.amenity_repo.get_existing_ids(set().union(*[ids for _, _, ids in pending]))
+        rows, links = [], {}
+        for index, row, amenity_ids in pending:
+            missing = sorted(amenity_ids - amenities)
+            if row['owner_id'] not in users:
+                results[index] = {'index': index, 'error': f"User with id {row['owner_id']} not found"}
+            elif missing:
+                results[index] = {'index': index, 'error': f"Amenity {missing[0]} not found"}
+            else:
+                rows.append((index, row))
+                links[index] = amenity_ids
+
+        def link_amenities(inserted):
+            self.place_repo.add_amenity_links([(place_id, amenity_id) for index, place_id, row in inserted
+                                               for amenity_id in sorted(links[index])])
+            self.search_repo.index_many('place', [(place_id, row['title'], row['description'])
+                                                  for index, place_id, row in inserted])
+
+        return self._insert_bulk(self.place_repo, rows, results, link_amenities)
+
+    def create_reviews_bulk(self, records, user_id=None):
+        """
+        Create many reviews in one transaction and add them to the places' rating aggregates.
+
+        :param user_id: Author of every review; if None, each record must have a user_id.
+        """
+        results, pending = [None] * len(records), []
+        for index, record in enumerate(records):
+            try:
+                data = check_record(record, ('text', 'rating', 'place_id'), ('user_id',))
+                Review.validate_attributes(SimpleNamespace(place=None, user=None, **data))
+                author = user_id if user_id is not None else data['user_id']
+                if author is None:
+                    raise ValueError("user_id is required")
+                pending.append((index, {'text': data['text'], 'rating': data['rating'],
+                                        'place_id': to_id(data['place_id'], 'place_id'),
+                                        'user_id': to_id(author, 'user_id')}))
+            except ValueError as e:
+                results[index] = {'index': index, 'error': str(e)}
+
+        owners = self.place_repo.get_owner_ids({row['place_id'] for _, row in pending})
+        users = self.user_repo.get_existing_ids({row['user_id'] for _, row in pending})
+        reviewed = self.review_repo.get_existing_pairs(
+            {(row['user_id'], row['place_id']) for _, row in pending
+             if row['place_id'] in owners and row['user_id'] in users})
+        rows = []
+        for index, row in pending:
+            pair = (row['user_id'], row['place_id'])
+            if row['place_id'] not in owners:
+                error = "Place not found"
+            elif row['user_id'] not in users:
+                error = "User not found"
+            elif owners[row['place_id']] == row['user_id']:
+                error = "You cannot review your own place"
+            elif pair in reviewed:
+                error = "You have already reviewed this place"
+            else:
+                reviewed.add(pair)  # Also catches duplicates within the request
+                rows.append((index, row))
+                continue
+            results[index] = {'index': index, 'error': error}
+
+        def update_places(inserted):
+            deltas = {}
+            for index, review_id, row in inserted:
+                count, total = deltas.get(row['place_id'], (0, 0))
+                deltas[row['place_id']] = (count + 1, total + row['rating'])
+            self.place_repo.add_rating_deltas(deltas)
+            self.search_repo.index_many('review', [(review_id, '', row['text'])
+                                                   for index, review_id, row in inserted])
+
+        return self._insert_bulk(self.review_repo, rows, results, update_places)
+
+    def create_users_bulk(self, records, batch_size=1000, on_progress=None):
+        """
+        Create many users, committing every batch_size users.
+
+        Plain passwords are hashed a batch at a time across the hashing pool;
+        bcrypt or argon2 hashes (users migrated from another system) are
+        stored as they are. A failed batch is rolled back, the batches before
+        it stay committed.
+
+        :param on_progress: Called with (users created, users to create) after each batch.
+        """
+        results, pending = [None] * len(records), []
+        for index, record in enumerate(records):
+            try:
+                data = check_record(record, ('first_name', 'last_name', 'email', 'password'), ('is_admin',))
+                pending.append((index, self._prepare_user_row(data)))
+            except ValueError as e:
+                results[index] = {'index': index, 'error': str(e)}
+
+        taken = self.user_repo.get_existing_emails({row['email'] for _, row in pending})
+        rows = []
+        for index, row in pending:
+            if row['email'] in taken:
+                results[index] = {'index': index, 'error': "Email already registered"}
+            else:
+                taken.add(row['email'])  # Also catches duplicates within the request
+                rows.append((index, row))
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            self._hash_passwords([row for _, row in batch])
+            self._insert_bulk(self.user_repo, batch, results)
+            if on_progress:
+                on_progress(start + len(batch), len(rows))
+        return results
+
+    def _prepare_user_row(self, data):
+        """Validate the fields of a new user, return its row (password not hashed yet)"""
+        User.validate(SimpleNamespace(is_valid_email=User.is_valid_email, **data))
+        User.validate_email(None, 'email', data['email'])
+        if not isinstance(data['password'], str) or not data['password'].strip():
+            raise ValueError("Password must not be empty")
+        return {'first_name': data['first_name'], 'last_name': data['last_name'], 'email': data['email'],
+                'password': data['password'], 'is_admin': bool(data['is_admin'])}
+
+    def _hash_passwords(self, rows):
+        """Replace the plain passwords of rows with their hashes, computed in the pool"""
+        plain = [row for row in rows if not is_password_hash(row['password'])]
+        for row, hashed in zip(plain, hasher.hash_many([row['password'] for row in plain])):
+            row['password'] = hashed
+
+    def _insert_bulk(self, repo, rows, results, after_insert=None):
+        """Insert the (index, row) pairs that passed validation and commit, or roll everything back"""
+        try:
+            ids = repo.insert_many([row for _, row in rows])
+            inserted = [(index, obj_id, row) for (index, row), obj_id in zip(rows, ids)]
+            if after_insert:
+                after_insert(inserted)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for index, obj_id, _ in inserted:
+            results[index] = {'index': index, 'id': obj_id}
+        logger.info("Bulk insert into %s: %s created, %s rejected", repo.model.__tablename__, len(ids),
+                    sum(1 for result in results if result and 'error' in result))
+        return results
+
+    def export_dataset(self, entities=None, batch_size=1000):
+        """
+        Export tables as JSON Lines, one {"entity": ..., "data": {...}} object per
+        row, in foreign key order. A generator: rows are read and serialized as
+        they are consumed, so exporting any amount of data uses constant memory.
+
+        :param entities: Names of the tables to export (see ENTITY_TABLES), None for all.
+        """
+        entities = parse_entities(entities)  # Validated before the first line is produced
+
+        def lines():
+            for entity in entities:
+                count = 0
+                for row in self.dataset_repo.stream_rows(entity, batch_size):
+                    yield json.dumps({'entity': entity, 'data': row}, separators=(',', ':')) + '\n'
+                    count += 1
+                logger.info("Exported %s %s", count, entity)
+        return lines()
+
+    # Import: the same steps as the bulk creation (validation without ORM
+    # objects, IN (...) lookups, executemany), one transaction per batch.
+    # Rows whose primary key already exists are skipped, so importing a file
+    # again, or resuming after a crash, never duplicates anything.
+
+    def import_dataset(self, path, entity=None, batch_size=5000, checkpoint=None, on_error=None,
+                       on_progress=None):
+        """
+        Import a JSON Lines file (as written by export_dataset) or a CSV file,
+        committing every batch_size records. The file is read as it goes, so
+        its size doesn't matter.
+
+        :param entity: Table of the rows of single-entity files (see read_records).
+        :param checkpoint: A Checkpoint: the records it says were consumed are skipped,
+            it is saved after each commit and removed once the file is done.
+        :param on_error: Called with (line number, entity, message) for each rejected record.
+        :param on_progress: Called with (records consumed, counters) after each commit.
+        :return: Counters per entity: {'inserted': ..., 'skipped': ..., 'rejected': ...}.
+        :raises ValueError: If the file is malformed (the batches before are kept).
+        """
+        start, stats = checkpoint.load() if checkpoint else (0, None)
+        stats = stats or {name: {'inserted': 0, 'skipped': 0, 'rejected': 0} for name in ENTITY_TABLES}
+        consumed = start
+        batch, batch_entity = [], None
+
+        def flush():
+            self._import_batch(batch_entity, batch, stats[batch_entity], on_error)
+            if checkpoint:
+                checkpoint.save(consumed, stats)
+            if on_progress:
+                on_progress(consumed, stats)
+
+        for line, record_entity, data in read_records(path, entity, start):
+            if batch and (record_entity != batch_entity or len(batch) >= batch_size):
+                flush()
+                batch = []
+            batch_entity = record_entity
+            batch.append((line, data))
+            consumed += 1
+        if batch:
+            flush()
+        if checkpoint:
+            checkpoint.clear()
+        logger.info("Imported %s: %s records", path, consumed - start)
+        return stats
+
+    def _import_batch(self, entity, records, counters, on_error=None):
+        """Validate, check and insert the (line, data) records of one entity, then commit"""
+        now = datetime.utcnow()
+        pending, rejected = [], []
+        for line, data in records:
+            try:
+                pending.append((line, self._prepare_import_row(entity, data, now)))
+            except ValueError as e:
+                rejected.append((line, str(e)))
+
+        # Rows already in the table (imported by a previous run) are skipped
+        if entity == 'place_amenity_association':
+            def key(row):
+                return row['place_id'], row['amenity_id']
+            present = self.place_repo.get_existing_links({key(row) for _, row in pending})
+        else:
+            repo = {'users': self.user_repo, 'amenities': self.amenity_repo,
+                    'places': self.place_repo, 'reviews': self.review_repo}[entity]
+
+            def key(row):
+                return row.get('id')
+            present = repo.get_existing_ids({row['id'] for _, row in pending if 'id' in row})
+        rows, seen = [], set()
+        for line, row in pending:
+            if key(row) in present:
+                counters['skipped'] += 1
+            elif key(row) in seen:
+                rejected.append((line, "Duplicate key in the file"))
+            else:
+                if key(row) is not None:
+                    seen.add(key(row))
+                rows.append((line, row))
+
+        rows, invalid = self._check_import_rows(entity, rows)
+        for line, error in sorted(rejected + invalid):
+            counters['rejected'] += 1
+            if on_error:
+                on_error(line, entity, error)
+
+        try:
+            if entity == 'place_amenity_association':
+                self.place_repo.add_amenity_links([key(row) for row in rows])
+                # Core INSERT into a bare table: no ORM event bumps the versions
+                bump_table_versions(db.session.connection(), 'place_amenity_association', 'places')
+            else:
+                if entity == 'users':
+                    self._hash_passwords(rows)
+                # Rows with and without an ID can't share an executemany
+                new_ids = iter(repo.insert_many([row for row in rows if 'id' not in row]))
+                repo.insert_many([row for row in rows if 'id' in row])
+                ids = [row['id'] if 'id' in row else next(new_ids) for row in rows]
+                if entity == 'places':
+                    self.search_repo.index_many('place', [(place_id, row['title'], row['description'])
+                                                          for place_id, row in zip(ids, rows)])
+                elif entity == 'reviews':
+                    deltas = {}
+                    for row in rows:
+                        count, total = deltas.get(row['place_id'], (0, 0))
+                        deltas[row['place_id']] = (count + 1, total + row['rating'])
+                    self.place_repo.add_rating_deltas(deltas)
+                    self.search_repo.index_many('review', [(review_id, '', row['text'])
+                                                           for review_id, row in zip(ids, rows)])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        counters['inserted'] += len(rows)
+
+    def _prepare_import_row(self, entity, data, now):
+        """Convert and validate one imported record, return the row to insert"""
+        data = check_record(coerce_row(entity, data), *IMPORT_FIELDS[entity])
+        if entity == 'place_amenity_association':
+            return {'place_id': to_id(data['place_id'], 'place_id'),
+                    'amenity_id': to_id(data['amenity_id'], 'amenity_id')}
+
+        if entity == 'users':
+            row = self._prepare_user_row(data)
+        elif entity == 'amenities':
+            Amenity.validate(SimpleNamespace(**data))
+            row = {'name': data['name']}
+        elif entity == 'places':
+            data['description'] = data['description'] or ''
+            Place.validate_attributes(SimpleNamespace(**data))
+            if len(data['title']) > 100:
+                raise ValueError("Title must be 100 characters or less")
+            row = {'title': data['title'], 'description': data['description'],
+                   'price': float(data['price']), 'latitude': float(data['latitude']),
+                   'longitude': float(data['longitude']), 'owner_id': to_id(data['owner_id'], 'owner_id'),
+                   'geohash': geohash_encode(data['latitude'], data['longitude']),
+                   'review_count': 0, 'rating_sum': 0}
+        else:
+            Review.validate_attributes(SimpleNamespace(place=None, user=None, **data))
+            row = {'text': data['text'], 'rating': data['rating'],
+                   'place_id': to_id(data['place_id'], 'place_id'), 'user_id': to_id(data['user_id'], 'user_id')}
+
+        # Every row gets the same keys (one executemany), except the optional ID
+        row['created_at'] = data['created_at'] or now
+        row['updated_at'] = data['updated_at'] or row['created_at']
+        if data['id'] is not None:
+            row['id'] = to_id(data['id'], 'id')
+        return row
+
+    def _check_import_rows(self, entity, rows):
+        """
+        Check the unique and foreign keys of a batch of (line, row) against the
+        database and within the batch.
+
+        :return: A tuple (accepted rows, [(line, error) of the rejected rows]).
+        """
+        if entity == 'users':
+            taken = self.user_repo.get_existing_emails({row['email'] for _, row in rows})
+        elif entity == 'places':
+            users = self.user_repo.get_existing_ids({row['owner_id'] for _, row in rows})
+        elif entity == 'place_amenity_association':
+            places = self.place_repo.get_existing_ids({row['place_id'] for _, row in rows})
+            amenities = self.amenity_repo.get_existing_ids({row['amenity_id'] for _, row in rows})
+        elif entity == 'reviews':
+            owners = self.place_repo.get_owner_ids({row['place_id'] for _, row in rows})
+            users = self.user_repo.get_existing_ids({row['user_id'] for _, row in rows})
+            reviewed = self.review_repo.get_existing_pairs({(row['user_id'], row['place_id']) for _, row in rows})
+
+        accepted, rejected = [], []
+        for line, row in rows:
+            error = None
+            if entity == 'users':
+                if row['email'] in taken:
+                    error = "Email already registered"
+                taken.add(row['email'])
+            elif entity == 'places':
+                if row['owner_id'] not in users:
+                    error = f"User with id {row['owner_id']} not found"
+            elif entity == 'place_amenity_association':
+                if row['place_id'] not in places:
+                    error = f"Place with id {row['place_id']} not found"
+                elif row['amenity_id'] not in amenities:
+                    error = f"Amenity with id {row['amenity_id']} not found"
+            elif entity == 'reviews':
+                pair = (row['user_id'], row['place_id'])
+                if row['place_id'] not in owners:
+                    error = f"Place with id {row['place_id']} not found"
+                elif row['user_id'] not in users:
+                    error = f"User with id {row['user_id']} not found"
+                elif owners[row['place_id']] == row['user_id']:
+                    error = "You cannot review your own place"
+                elif pair in reviewed:
+                    error = "You have already reviewed this place"
+                reviewed.add(pair)
+            if error:
+                rejected.append((line, error))
+            else:
+                accepted.append(row)
+        return accepted, rejected
+
+    def get_collection_version(self, name):
+        """Get the version of a collection ('users', 'places', 'amenities' or 'reviews')"""
+        repositories = {'users': self.user_repo, 'places': self.place_repo,
+                        'amenities': self.amenity_repo, 'reviews': self.review_repo}
+        return repositories[name].get_version()
 
     def is_valid_email(self, email):
         """Validate email format"""
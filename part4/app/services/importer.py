@@ -0,0 +1,144 @@
+import csv
+import json
+import os
+from datetime import datetime
+from app.persistence.dataset_repository import ENTITY_TABLES
+
+
+def read_records(path, entity=None, start=0):
+    """
+    Read the records of a JSON Lines or CSV file, one at a time.
+
+    JSON Lines files are either in the format written by export (one
+    {"entity": ..., "data": {...}} object per line) or hold bare rows of a
+    single entity. CSV files hold the rows of a single entity under a header
+    line of column names. The entity of single-entity files is the entity
+    argument or, by default, the file name (users.csv, reviews.jsonl...).
+
+    :param start: Number of records to skip (already imported); they are not parsed.
+    :return: A generator of (line number, entity, dict of values) tuples.
+    :raises ValueError: On a malformed line or an unknown entity.
+    """
+    if entity is not None and entity not in ENTITY_TABLES:
+        raise ValueError(f"Unknown entity: {entity} (expected one of {', '.join(ENTITY_TABLES)})")
+    stem = os.path.splitext(os.path.basename(path))[0]
+    default = entity or (stem if stem in ENTITY_TABLES else None)
+    if path.lower().endswith('.csv'):
+        if default is None:
+            raise ValueError(f"{path}: unknown entity, name the file after its table or give the entity")
+        return _read_csv(path, default, start)
+    return _read_jsonl(path, default, start)
+
+
+def _read_jsonl(path, default, start):
+    count = 0
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            count += 1
+            if count <= start:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}, line {number}: invalid JSON ({e.msg})")
+            if isinstance(record, dict) and set(record) == {'entity', 'data'}:
+                entity, data = record['entity'], record['data']
+            else:
+                entity, data = default, record
+            if entity not in ENTITY_TABLES:
+                raise ValueError(f"{path}, line {number}: unknown entity {entity!r}")
+            if not isinstance(data, dict):
+                raise ValueError(f"{path}, line {number}: a row must be an object")
+            yield number, entity, data
+
+
+def _read_csv(path, entity, start):
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for count, row in enumerate(reader, 1):
+            if count <= start:
+                continue
+            if None in row:
+                raise ValueError(f"{path}, line {reader.line_num}: more values than columns")
+            yield reader.line_num, entity, row
+
+
+def coerce_row(entity, data):
+    """
+    Convert the string values of a record to the Python types of its table's
+    columns (CSV only holds strings, JSON has no dates). Empty strings and
+    nulls count as missing values and are dropped; unknown keys are kept for
+    the validation to report.
+
+    :raises ValueError: If a value can't be converted.
+    """
+    columns = ENTITY_TABLES[entity].columns
+    row = {}
+    for key, value in data.items():
+        if value is None or value == '':
+            continue
+        if isinstance(value, str) and key in columns:
+            value = _parse(columns[key], value)
+        row[key] = value
+    return row
+
+
+def _parse(column, value):
+    python_type = column.type.python_type
+    try:
+        if python_type is str:
+            return value
+        if python_type is bool:
+            if value.lower() in ('1', 'true', 'yes'):
+                return True
+            if value.lower() in ('0', 'false', 'no'):
+                return False
+            raise ValueError(value)
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        return python_type(value)
+    except ValueError:
+        raise ValueError(f"Invalid value for {column.name}: {value!r}")
+
+
+class Checkpoint:
+    """
+    Progress of the import of a file: the number of records consumed (imported,
+    skipped or rejected) and the counters so far. Saved after each committed
+    batch, so an interrupted import resumes after the last committed record.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = os.path.abspath(source)
+
+    def load(self):
+        """
+        :return: A tuple (records consumed, counters), (0, None) without a checkpoint.
+        :raises ValueError: If the checkpoint was written for another file.
+        """
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return 0, None
+        if state.get('source') != self.source:
+            raise ValueError(f"Checkpoint {self.path} was written for {state.get('source')}")
+        return state['records'], state['stats']
+
+    def save(self, records, stats):
+        # Write then rename: a crash while saving leaves the previous checkpoint intact
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'source': self.source, 'records': records, 'stats': stats}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -72,8 +72,14 @@ function checkAuthentication() {
     fetchPlaces(token);
 }
 
-async function fetchPlaces(token) {
-    const apiUrl = 'http://127.0.0.1:5000/api/v1/places';
+async function fetchPlaces(token, maxPrice = 'all') {
+    // Le filtrage est fait par l'API : on ne télécharge que les annonces à afficher
+    const params = new URLSearchParams();
+    if (maxPrice !== 'all') {
+        params.set('max_price', maxPrice);
+    }
+    const query = params.toString();
+    const apiUrl = 'http://127.0.0.1:5000/api/v1/places/' + (query ? `?${query}` : '');
     
     try {
         const headers = {
@@ -94,8 +100,6 @@ async function fetchPlaces(token) {
         if (response.ok) {
             const data = await response.json();
             displayPlaces(data);
-            // Store places data for filtering
-            window.allPlaces = data;
         } else {
             console.error('Failed to fetch places:', response.statusText);
         }
@@ -145,49 +149,8 @@ function handlePriceFilter(event) {
     const maxPrice = typeof event === 'object' && event.target ? event.target.value : event;
     console.log('Filtrage par prix activé. Prix maximum sélectionné:', maxPrice);
     
-    // Utiliser les classes correctes qui correspondent à votre HTML
-    const places = document.querySelectorAll('.place-card');
-    console.log('Nombre d\'annonces trouvées:', places.length);
-    
-    let visibleCount = 0;
-    let hiddenCount = 0;
-    
-    places.forEach(place => {
-        // Extraire le prix du texte de l'élément avec la classe 'price'
-        const priceElement = place.querySelector('.price');
-        if (!priceElement) {
-            console.log('Élément de prix non trouvé pour une place');
-            return;
-        }
-        
-        // Format attendu: "$120 per night" - extraire seulement le nombre
-        const priceText = priceElement.textContent;
-        const priceMatch = priceText.match(/\$(\d+)/);
-        
-        if (!priceMatch) {
-            console.log('Format de prix non reconnu:', priceText);
-            return;
-        }
-        
-        const price = parseInt(priceMatch[1], 10);
-        console.log(`Annonce: prix=${price}, limite=${maxPrice}`);
-        
-        if (maxPrice === 'all') {
-            place.style.display = 'flex'; // ou 'block' selon votre CSS
-            visibleCount++;
-        } else {
-            const priceLimit = parseInt(maxPrice, 10);
-            if (price <= priceLimit) {
-                place.style.display = 'flex'; // ou 'block' selon votre CSS
-                visibleCount++;
-            } else {
-                place.style.display = 'none';
-                hiddenCount++;
-            }
-        }
-    });
-    
-    console.log(`Résultat du filtrage: ${visibleCount} annonces visibles, ${hiddenCount} annonces masquées`);
+    // Redemander la liste à l'API avec le filtre max_price
+    fetchPlaces(getCookie('token'), maxPrice);
 }
 
 async function loginUser(email, password) {
@@ -270,68 +233,3 @@ async function loginUser(email, password) {
         throw error;
     }
 }
-
-// Fonction séparée pour appliquer le filtre de prix
-function applyPriceFilter(maxPrice) {
-    console.log('Applying price filter with max price:', maxPrice);
-    const places = document.querySelectorAll('.place');
-    console.log('Found places:', places.length);
-    
-    let visibleCount = 0;
-    let hiddenCount = 0;
-    
-    places.forEach(place => {
-        const priceStr = place.getAttribute('data-price');
-        const price = parseInt(priceStr, 10);
-        console.log(`Place price=${price}, limit=${maxPrice}`);
-        
-        if (maxPrice === 'all') {
-            place.style.display = 'block';
-            visibleCount++;
-        } else {
-            const priceLimit = parseInt(maxPrice, 10);
-            if (price <= priceLimit) {
-                place.style.display = 'block';
-                visibleCount++;
-            } else {
-                place.style.display = 'none';
-                hiddenCount++;
-            }
-        }
-    });
-    
-    console.log(`Filter result: ${visibleCount} visible, ${hiddenCount} hidden`);
-}
-
-// Fonction simple de filtrage par prix - Corrigée
-function filterPlacesByPrice(maxPrice) {
-    console.log('Filtering places with max price:', maxPrice);
-    const places = document.querySelectorAll('.place');
-    console.log('Number of places found:', places.length);
-    
-    let visibleCount = 0;
-    let hiddenCount = 0;
-    
-    places.forEach(place => {
-        const priceStr = place.getAttribute('data-price');
-        console.log(`Place price attribute: ${priceStr}`);
-        const price = parseInt(priceStr, 10);
-        
-        if (maxPrice === 'all') {
-            place.style.display = 'block';
-            visibleCount++;
-        } else {
-            const priceLimit = parseInt(maxPrice, 10);
-            console.log(`Comparing price ${price} with limit ${priceLimit}`);
-            if (price <= priceLimit) {
-                place.style.display = 'block';
-                visibleCount++;
-            } else {
-                place.style.display = 'none';
-                hiddenCount++;
-            }
-        }
-    });
-    
-    console.log(`Filter results: ${visibleCount} places visible, ${hiddenCount} places hidden`);
-}
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""
+Throughput of the Flask-RESTX app (threaded WSGI server) against the ASGI app (uvicorn), same database.
+
+Both servers run in their own process on a copy of the same SQLite
+database, one at a time, and get the same requests from --concurrency
+clients sharing an asyncio loop (so thousands of clients cost no threads on
+the client side). The Flask app gets --threads worker threads, like a
+gunicorn worker with --threads (0: one thread per connection).
+
+Slow clients: the body of each POST arrives in two parts --upload-time ms
+apart, like a phone on a bad network. A WSGI thread waits for the whole
+body, the ASGI app waits without a thread.
+
+Needs uvicorn and httpx besides the ASGI app's dependencies.
+
+Usage (from part4/):
+    python -m benchmarks.asgi_throughput --concurrency 100 1000 --requests 4000 --upload-time 500
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import statistics
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+from app import create_app, db
+from app.models.user import User
+from app.models.place import Place
+from config import ProductionConfig
+
+
+def build_config(path):
+    class BenchmarkConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        SQLALCHEMY_ENGINE_OPTIONS = dict(ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS, pool_size=10, max_overflow=10)
+        BCRYPT_LOG_ROUNDS = 4
+        PASSWORD_HASH_POOL_SIZE = 0
+        REPOSITORY_CACHE_BACKEND = None  # Compare the request handling, not the cache
+        RESPONSE_CACHE_SIZE = 0
+    return BenchmarkConfig
+
+
+def populate(config, users=200, places=200):
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [{'first_name': 'Load', 'last_name': 'Test', 'email': f'u{i}@example.com',
+                                           'password': 'x'} for i in range(users)])
+        db.session.execute(insert(Place), [{'title': f"Place {i}", 'description': "Benchmark", 'price': 100.0,
+                                            'latitude': 0.0, 'longitude': 0.0, 'owner_id': 1 + i % users,
+                                            'review_count': 0, 'rating_sum': 0} for i in range(places)])
+        db.session.commit()
+        tokens = [create_access_token(identity=str(i), additional_claims={'is_admin': False})
+                  for i in range(1, users + 1)]
+        db.session.remove()
+        db.engine.dispose()
+    return tokens, places
+
+
+def serve_flask(config, sock, threads):
+    from werkzeug.serving import BaseWSGIServer, make_server
+    app = create_app(config)
+    if not threads:
+        make_server('127.0.0.1', 0, app, threaded=True, fd=sock.fileno()).serve_forever()
+        return
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """Werkzeug's server with a fixed number of worker threads"""
+        pool = ThreadPoolExecutor(threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self.process_request_thread, request, client_address)
+
+        def process_request_thread(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    PooledWSGIServer('127.0.0.1', 0, app, fd=sock.fileno()).serve_forever()
+
+
+def serve_asgi(config, sock, threads):
+    import uvicorn
+    from app.asgi import create_asgi_app
+    server = uvicorn.Server(uvicorn.Config(create_asgi_app(config), log_level='warning',
+                                           backlog=4096, limit_concurrency=None))
+    server.run(sockets=[sock])
+
+
+def start_server(target, config, threads):
+    # IPPROTO_TCP spelled out: asyncio only sets TCP_NODELAY on sockets created with it
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(4096)  # Don't let the accept backlog refuse clients
+    process = multiprocessing.get_context('fork').Process(target=target, args=(config, sock, threads),
+                                                          daemon=True)
+    process.start()
+    base = f"http://127.0.0.1:{sock.getsockname()[1]}/api/v1"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base}/amenities/", timeout=1)
+            return process, base
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+
+def make_plan(count, writes, tokens, places):
+    rng = random.Random(42)
+    plan = []
+    for i in range(count):
+        if rng.random() < writes:
+            body = {'text': "Busy place", 'rating': rng.randint(1, 5), 'place_id': str(1 + rng.randrange(places))}
+            plan.append(('POST', "/reviews/", body, rng.choice(tokens)))
+        else:
+            plan.append(('GET', rng.choice(["/places/?limit=20", "/amenities/",
+                                            f"/places/{1 + rng.randrange(places)}"]), None, None))
+    return plan
+
+
+async def slow_body(body, upload_time):
+    raw = json.dumps(body).encode()
+    yield raw[:len(raw) // 2]
+    await asyncio.sleep(upload_time / 1000)
+    yield raw[len(raw) // 2:]
+
+
+async def run_clients(base, plan, concurrency, upload_time):
+    results = []
+    queue = iter(plan)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=0)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=120) as client:
+        async def worker():
+            for method, path, body, token in queue:
+                headers = {'Authorization': f"Bearer {token}"} if token else {}
+                content = None
+                if body is not None:
+                    headers['Content-Type'] = 'application/json'
+                    content = slow_body(body, upload_time) if upload_time else json.dumps(body)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, content=content, headers=headers)
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                results.append((status, time.perf_counter() - started))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - started
+
+
+def report(label, results, elapsed):
+    statuses = Counter(status for status, _ in results)
+    latencies = sorted(latency * 1000 for _, latency in results)
+    failures = sum(count for status, count in statuses.items() if not isinstance(status, int) or status >= 500)
+    print(f"{label}: {len(results) / elapsed:,.0f} req/s, median {statistics.median(latencies):.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms, failures {failures}, "
+          f"statuses {dict(sorted(statuses.items(), key=str))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--writes', type=float, default=0.1, help="share of requests that post a review")
+    parser.add_argument('--threads', type=int, default=16, help="worker threads of the Flask app")
+    parser.add_argument('--upload-time', type=float, default=0, help="ms each POST body takes to arrive")
+    args = parser.parse_args()
+    # Per-request debug logging would dominate both servers' timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed = os.path.join(tmp, 'seed.db')
+        tokens, places = populate(build_config(seed))
+        for concurrency in args.concurrency:
+            for label, target in ((f"Flask-RESTX, WSGI, {args.threads or 'unbounded'} threads", serve_flask),
+                                  ("Starlette, uvicorn", serve_asgi)):
+                path = os.path.join(tmp, 'bench.db')
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+                shutil.copy(seed, path)
+                process, base = start_server(target, build_config(path), args.threads)
+                try:
+                    plan = make_plan(args.requests, args.writes, tokens, places)
+                    results, elapsed = asyncio.run(run_clients(base, plan, concurrency, args.upload_time))
+                finally:
+                    process.terminate()
+                    process.join()
+                report(f"{label}, {concurrency} clients", results, elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark the /bulk endpoints against one POST per record.
+
+Usage (from part4/):
+    python -m benchmarks.bulk_import --rows 100000 --batch 10000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+from app import create_app, db
+from app.models.amenity import Amenity
+from app.models.user import User
+from config import TestingConfig
+
+
+def build_config(path):
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+    return BenchmarkConfig
+
+
+def place(rng, amenities):
+    return {'title': f"Place {rng.randrange(10 ** 6)}", 'description': "Imported", 'price': rng.uniform(20, 500),
+            'latitude': rng.uniform(-60, 70), 'longitude': rng.uniform(-180, 180),
+            'amenities': rng.sample(amenities, 2)}
+
+
+def post_all(client, url, items, batch, headers):
+    started = time.perf_counter()
+    for start in range(0, len(items), batch):
+        response = client.post(url, json=items[start:start + batch], headers=headers)
+        assert response.status_code == 201, response.get_json()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch', type=int, default=10000)
+    parser.add_argument('--single', type=int, default=1000, help="records sent one POST each, for comparison")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(build_config(os.path.join(tmp, 'bench.db')))
+        client = app.test_client()
+        rng = random.Random(42)
+        with app.app_context():
+            db.create_all()
+            reviewers = -(-args.rows // 1000)
+            db.session.execute(insert(User), [{'first_name': 'Bench', 'last_name': 'Mark', 'password': 'x',
+                                               'email': f'u{i}@example.com', 'is_admin': i == 0}
+                                              for i in range(reviewers + 1)])
+            db.session.execute(insert(Amenity), [{'name': f"Amenity {i}"} for i in range(50)])
+            db.session.commit()
+            headers = {'Authorization': f"Bearer {create_access_token(identity='1', additional_claims={'is_admin': True})}"}
+
+        amenities = list(range(1, 51))
+        single = [place(rng, amenities) for _ in range(args.single)]
+        started = time.perf_counter()
+        for item in single:
+            assert client.post('/api/v1/places/', json=dict(item, owner_id='1', amenities=[str(a) for a in item['amenities']]), headers=headers).status_code == 201
+        per_record = (time.perf_counter() - started) / args.single
+        print(f"One POST per place: {1 / per_record:,.0f} rows/s "
+              f"(~{per_record * args.rows:.0f}s for {args.rows:,} rows)")
+
+        places = [place(rng, amenities) for _ in range(args.rows)]
+        elapsed = post_all(client, '/api/v1/places/bulk', places, args.batch, headers)
+        print(f"/places/bulk: {args.rows:,} places in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+        # Reviewers 2.. each review 1000 distinct places
+        reviews = [{'text': "Lovely stay", 'rating': rng.randint(1, 5), 'user_id': 2 + i // 1000,
+                    'place_id': args.single + 1 + i % 1000} for i in range(args.rows)]
+        elapsed = post_all(client, '/api/v1/reviews/bulk', reviews, args.batch, headers)
+        print(f"/reviews/bulk: {args.rows:,} reviews in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
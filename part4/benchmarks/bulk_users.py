@@ -0,0 +1,69 @@
+"""
+Benchmark user import: one create_user per user against create_users_bulk.
+
+Usage (from part4/):
+    python -m benchmarks.bulk_users --users 500 --rounds 12 --batch 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+from app import create_app, db, hasher
+from app.hashing import _bcrypt_hash
+from app.services import facade
+from config import TestingConfig
+
+
+def build_config(path, rounds, pool_size):
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        BCRYPT_LOG_ROUNDS = rounds
+        PASSWORD_HASH_POOL_SIZE = pool_size
+    return BenchmarkConfig
+
+
+def records(count, password=None):
+    return [{'first_name': 'Bench', 'last_name': 'Mark', 'email': f'u{i}@example.com',
+             'password': password or f'secret{i}'} for i in range(count)]
+
+
+def run(path, rounds, pool_size, label, create):
+    app = create_app(build_config(path, rounds, pool_size))
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        count = create()
+        elapsed = time.perf_counter() - started
+    hasher.shutdown()
+    print(f"{label}: {count / elapsed:,.1f} users/s ({count:,} in {elapsed:.1f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    def one_by_one():
+        for record in records(args.users):
+            facade.create_user(record)
+        return args.users
+
+    def bulk(password=None):
+        results = facade.create_users_bulk(records(args.users, password), args.batch)
+        assert all('id' in result for result in results)
+        return len(results)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        run(path, args.rounds, 0, "create_user, one at a time", one_by_one)
+        run(path, args.rounds, 0, "create_users_bulk, inline hashing", bulk)
+        run(path, args.rounds, None, f"create_users_bulk, pool ({os.cpu_count()} workers)", bulk)
+        run(path, args.rounds, None, "create_users_bulk, pre-hashed passwords",
+            lambda: bulk(_bcrypt_hash('secret', args.rounds)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark the geohash-indexed radius search against a full table scan.
+
+Usage (from part4/):
+    python -m benchmarks.geo_search --places 1000000 --queries 200
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import insert, select
+from app import create_app, db
+from app.geo import geohash_encode, haversine_km
+from app.models.user import User
+from app.models.place import Place
+from app.services import facade
+from config import TestingConfig
+
+
+def build_config(path):
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+    return BenchmarkConfig
+
+
+def populate(count, batch_size=50000):
+    owner_id = db.session.execute(insert(User).values(
+        first_name='Bench', last_name='Mark', email='bench@example.com', password='x'
+    )).inserted_primary_key[0]
+    rng = random.Random(42)
+    for start in range(0, count, batch_size):
+        rows = []
+        for _ in range(min(batch_size, count - start)):
+            lat, lng = rng.uniform(-60, 70), rng.uniform(-180, 180)
+            rows.append({'title': 'Place', 'description': '', 'price': 100.0, 'latitude': lat,
+                         'longitude': lng, 'geohash': geohash_encode(lat, lng), 'owner_id': owner_id,
+                         'review_count': 0, 'rating_sum': 0})
+        db.session.execute(insert(Place), rows)
+        db.session.commit()
+
+
+def full_scan(lat, lng, radius_km):
+    rows = db.session.execute(select(Place.id, Place.latitude, Place.longitude))
+    return sorted((haversine_km(lat, lng, r.latitude, r.longitude), r.id) for r in rows
+                  if haversine_km(lat, lng, r.latitude, r.longitude) <= radius_km)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--places', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--radius-km', type=float, default=10)
+    parser.add_argument('--scan-queries', type=int, default=3, help='full scans are slow, run only a few')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(build_config(os.path.join(tmp, 'bench.db')))
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            populate(args.places)
+            print(f"Inserted {args.places} places in {time.perf_counter() - started:.1f}s")
+
+            rng = random.Random(7)
+            points = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(args.queries)]
+
+            found = 0
+            started = time.perf_counter()
+            for lat, lng in points:
+                found += len(facade.get_places_near(lat, lng, args.radius_km))
+                db.session.remove()
+            indexed = (time.perf_counter() - started) / len(points)
+            print(f"Indexed search: {indexed * 1000:.2f} ms/query ({found} results over {len(points)} queries)")
+
+            started = time.perf_counter()
+            for lat, lng in points[:args.scan_queries]:
+                full_scan(lat, lng, args.radius_km)
+            scan = (time.perf_counter() - started) / args.scan_queries
+            print(f"Full scan:      {scan * 1000:.2f} ms/query ({scan / indexed:.0f}x slower)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Load test: many concurrent clients against a threaded server, to check the connection pool.
+
+Runs the app with the production engine profile (on SQLite unless
+--database is given) and a deliberately small pool, then fires requests
+from --concurrency client threads. Requests beyond the pool capacity must
+wait for a connection (pool_timeout), not fail: any 5xx is reported.
+
+Usage (from part4/):
+    python -m benchmarks.load_test --concurrency 200 --requests 4000 --pool-size 5 --max-overflow 5
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+from werkzeug.serving import make_server
+from app import create_app, db
+from app.models.user import User
+from app.models.place import Place
+from config import ProductionConfig
+
+
+def build_config(uri, pool_size, max_overflow):
+    class LoadTestConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = uri
+        SQLALCHEMY_ENGINE_OPTIONS = dict(ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS,
+                                         pool_size=pool_size, max_overflow=max_overflow)
+        BCRYPT_LOG_ROUNDS = 4
+        PASSWORD_HASH_POOL_SIZE = 0
+    return LoadTestConfig
+
+
+def populate(users=200, places=200):
+    db.session.execute(insert(User), [{'first_name': 'Load', 'last_name': 'Test', 'email': f'u{i}@example.com',
+                                       'password': 'x'} for i in range(users)])
+    db.session.execute(insert(Place), [{'title': f"Place {i}", 'description': "Load test", 'price': 100.0,
+                                        'latitude': 0.0, 'longitude': 0.0, 'owner_id': 1 + i % users,
+                                        'review_count': 0, 'rating_sum': 0} for i in range(places)])
+    db.session.commit()
+    return users, places
+
+
+class PoolSampler(threading.Thread):
+    """Records the highest number of connections checked out of the pool."""
+
+    def __init__(self, engine):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.peak = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.peak = max(self.peak, self.engine.pool.checkedout())
+            time.sleep(0.001)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--pool-size', type=int, default=5)
+    parser.add_argument('--max-overflow', type=int, default=5)
+    parser.add_argument('--writes', type=float, default=0.1, help="share of requests that post a review")
+    parser.add_argument('--database', help="database URI (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = args.database or f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        app = create_app(build_config(uri, args.pool_size, args.max_overflow))
+        with app.app_context():
+            db.create_all()
+            users, places = populate()
+            tokens = [create_access_token(identity=str(i), additional_claims={'is_admin': False})
+                      for i in range(1, users + 1)]
+            engine = db.engine
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        server.socket.listen(args.concurrency * 2)  # Don't let the accept backlog refuse clients
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}/api/v1"
+
+        rng = random.Random(42)
+        plan = []
+        for i in range(args.requests):
+            if rng.random() < args.writes:
+                user = rng.randrange(users)
+                body = {'text': "Busy place", 'rating': rng.randint(1, 5), 'place_id': str(1 + rng.randrange(places))}
+                plan.append(('POST', f"{base}/reviews/", body, tokens[user]))
+            else:
+                plan.append(('GET', rng.choice([f"{base}/places/?limit=20", f"{base}/amenities/",
+                                                f"{base}/places/{1 + rng.randrange(places)}"]), None, None))
+
+        def send(item):
+            method, url, body, token = item
+            headers = {'Content-Type': 'application/json'}
+            if token:
+                headers['Authorization'] = f"Bearer {token}"
+            request = urllib.request.Request(url, json.dumps(body).encode() if body else None, headers,
+                                             method=method)
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=120) as response:
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError as e:
+                status = type(e).__name__
+            return status, time.perf_counter() - started
+
+        sampler = PoolSampler(engine)
+        sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as executor:
+            results = list(executor.map(send, plan))
+        elapsed = time.perf_counter() - started
+        sampler.running = False
+        server.shutdown()
+
+        statuses = Counter(status for status, _ in results)
+        latencies = sorted(latency * 1000 for _, latency in results)
+        failures = sum(count for status, count in statuses.items() if not isinstance(status, int) or status >= 500)
+        print(f"{args.requests} requests, {args.concurrency} concurrent clients, pool {args.pool_size} "
+              f"+ {args.max_overflow} overflow: {args.requests / elapsed:,.0f} req/s")
+        print(f"Statuses: {dict(sorted(statuses.items(), key=str))}")
+        print(f"Latency: median {statistics.median(latencies):.1f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms, max {latencies[-1]:.1f} ms")
+        print(f"Peak connections checked out: {sampler.peak}; failed requests (5xx or network): {failures}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Request latency under load with each logging setup, logs going to a slow sink.
+
+Modes:
+- debug, inline: every DEBUG record formatted and written by the request
+  thread (how the app logged before LOG_* settings existed)
+- debug, sampled + queue: DEBUG with LOG_SAMPLE_RATES, written by the
+  listener thread
+- info + queue: the production setup, DEBUG records are never created
+
+The sink takes --sink-delay ms per write, like stderr piped to a busy log
+collector. --concurrency threads send GET requests through the test client.
+
+Usage (from part4/):
+    python -m benchmarks.logging_overhead --requests 2000 --concurrency 8 --sink-delay 0.2
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import insert
+from app import create_app, db
+from app.logs import stop_logging
+from app.models.user import User
+from app.models.place import Place
+from config import TestingConfig
+
+MODES = (
+    ("debug, inline", {'LOG_LEVEL': 'DEBUG', 'LOG_SAMPLE_RATES': {}, 'LOG_QUEUE': False}),
+    ("debug, sampled + queue", {'LOG_LEVEL': 'DEBUG', 'LOG_QUEUE': True}),
+    ("info + queue", {'LOG_LEVEL': 'INFO', 'LOG_QUEUE': True}),
+)
+
+
+class SlowSink(io.TextIOBase):
+    """A stream that takes delay seconds per write and counts the lines written"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.lines = 0
+
+    def write(self, text):
+        time.sleep(self.delay)
+        self.lines += text.count('\n')
+        return len(text)
+
+
+def build_config(path, settings):
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        REPOSITORY_CACHE_BACKEND = None  # Every lookup reaches the repositories, and their logs
+        RESPONSE_CACHE_SIZE = 0
+        QUERY_BUDGET_ENFORCE = False
+        LOG_SAMPLE_RATES = TestingConfig.LOG_SAMPLE_RATES
+    for name, value in settings.items():
+        setattr(BenchmarkConfig, name, value)
+    return BenchmarkConfig
+
+
+def run(path, settings, requests, concurrency, sink):
+    stderr, sys.stderr = sys.stderr, sink
+    try:
+        app = create_app(build_config(path, settings))
+    finally:
+        sys.stderr = stderr
+    urls = [f'/api/v1/places/{1 + i % 50}' if i % 2 else f'/api/v1/users/{1 + i % 50}' for i in range(requests)]
+
+    def get(url):
+        with app.test_client() as client:
+            started = time.perf_counter()
+            response = client.get(url)
+            assert response.status_code == 200, response.get_json()
+            return time.perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(get, urls[:concurrency]))  # warm up
+        started = time.perf_counter()
+        latencies = sorted(executor.map(get, urls))
+        elapsed = time.perf_counter() - started
+    queued = time.perf_counter()
+    stop_logging()  # Wait for the listener to write what is left in the queue
+    return requests / elapsed, latencies, time.perf_counter() - queued
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--sink-delay', type=float, default=0.2, help="ms per write to the log sink")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        app = create_app(build_config(path, {}))
+        with app.app_context():
+            db.create_all()
+            db.session.execute(insert(User), [{'first_name': 'Bench', 'last_name': 'Mark', 'password': 'x',
+                                               'email': f'u{i}@example.com'} for i in range(50)])
+            db.session.execute(insert(Place), [{'title': f"Place {i}", 'description': "Benchmark", 'price': 100.0,
+                                                'latitude': 0.0, 'longitude': 0.0, 'owner_id': 1 + i,
+                                                'review_count': 0, 'rating_sum': 0} for i in range(50)])
+            db.session.commit()
+            db.session.remove()
+
+        for label, settings in MODES:
+            sink = SlowSink(args.sink_delay / 1000)
+            rate, latencies, drain = run(path, settings, args.requests, args.concurrency, sink)
+            print(f"{label}: {rate:,.0f} req/s, median {statistics.median(latencies) * 1000:.2f} ms, "
+                  f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.2f} ms, "
+                  f"{sink.lines} lines logged ({drain * 1000:.0f} ms to drain the queue)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark login throughput with bcrypt run inline or in the hashing pool.
+
+Usage (from part4/):
+    python -m benchmarks.login_throughput --logins 200 --concurrency 16 --rounds 12
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app import create_app, db, hasher
+from app.models.user import User
+from config import TestingConfig
+
+
+def build_config(path, rounds, pool_size):
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        BCRYPT_LOG_ROUNDS = rounds
+        PASSWORD_HASH_POOL_SIZE = pool_size
+    return BenchmarkConfig
+
+
+def run(path, rounds, pool_size, logins, concurrency, users=20):
+    app = create_app(build_config(path, rounds, pool_size))
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([User(first_name='Bench', last_name='Mark', email=f'u{i}@example.com',
+                                 password='secret') for i in range(users)])
+        db.session.commit()
+
+    def login(i):
+        with app.test_client() as client:
+            response = client.post('/api/v1/auth/login',
+                                   json={'email': f'u{i % users}@example.com', 'password': 'secret'})
+            assert response.status_code == 200, response.get_json()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(login, range(concurrency)))  # warm up the pool workers
+        started = time.perf_counter()
+        list(executor.map(login, range(logins)))
+        elapsed = time.perf_counter() - started
+    hasher.shutdown()
+    return logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        for label, pool_size in (("inline", 0), (f"pool ({os.cpu_count()} workers)", None)):
+            rate = run(path, args.rounds, pool_size, args.logins, args.concurrency)
+            print(f"{label}: {rate:.1f} logins/s")
+
+
+if __name__ == '__main__':
+    main()
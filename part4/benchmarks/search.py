@@ -0,0 +1,97 @@
+"""
+Benchmark full-text search latency over a synthetic review corpus.
+
+Usage (from part4/):
+    python -m benchmarks.search --reviews 500000 --queries 500
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from sqlalchemy import insert
+from app import create_app, db
+from app.models.user import User
+from app.models.place import Place
+from app.models.review import Review
+from app.services import facade
+from config import TestingConfig
+
+# Synthetic vocabulary with a Zipf-like frequency distribution, as in real text
+SYLLABLES = ("ba be bi bo bu da de di do du ka ke ki ko ku la le li lo lu "
+             "ma me mi mo mu na ne ni no nu ra re ri ro ru").split()
+WORDS = sorted({a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES[:8]})
+random.Random(1).shuffle(WORDS)
+WEIGHTS = [1 / rank for rank in range(1, len(WORDS) + 1)]
+STOPWORDS = 100
+
+
+def build_config(path):
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+    return BenchmarkConfig
+
+
+def sentence(rng):
+    return ' '.join(rng.choices(WORDS, WEIGHTS, k=rng.randint(8, 30)))
+
+
+def populate(review_count, places=500, batch_size=50000):
+    rng = random.Random(42)
+    users = -(-review_count // places)
+    db.session.execute(insert(User), [{'first_name': 'Bench', 'last_name': 'Mark', 'email': f'u{i}@example.com',
+                                       'password': 'x'} for i in range(users)])
+    db.session.execute(insert(Place), [{'title': f"{rng.choice(WORDS)} {rng.choice(WORDS)} place {i}",
+                                        'description': sentence(rng), 'price': 100.0, 'latitude': 0.0,
+                                        'longitude': 0.0, 'owner_id': 1, 'review_count': 0, 'rating_sum': 0}
+                                       for i in range(places)])
+    pairs = ((user_id, place_id) for user_id in range(1, users + 1) for place_id in range(1, places + 1))
+    remaining = review_count
+    while remaining:
+        batch = [next(pairs) for _ in range(min(batch_size, remaining))]
+        db.session.execute(insert(Review), [{'text': sentence(rng), 'rating': rng.randint(1, 5),
+                                             'user_id': u, 'place_id': p} for u, p in batch])
+        remaining -= len(batch)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--reviews', type=int, default=500000)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(build_config(os.path.join(tmp, 'bench.db')))
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            populate(args.reviews)
+            indexed = facade.rebuild_search_index()
+            print(f"Loaded and indexed {indexed} rows in {time.perf_counter() - started:.1f}s")
+
+            rng = random.Random(7)
+            # The most frequent words behave like stopwords and are reported apart
+            typical = [' '.join(word if rng.random() < 0.8 else word[:4]
+                                for word in rng.sample(WORDS[STOPWORDS:], rng.randint(1, 3)))
+                       for _ in range(args.queries)]
+            stopwords = [rng.choice(WORDS[:STOPWORDS]) for _ in range(max(1, args.queries // 10))]
+            report("Typical queries", typical)
+            report("Stopword queries", stopwords)
+
+
+def report(label, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        facade.search(query, limit=20)
+        timings.append((time.perf_counter() - started) * 1000)
+        db.session.remove()
+    timings.sort()
+    print(f"{label} ({len(queries)}): median {statistics.median(timings):.2f} ms, "
+          f"p95 {timings[max(0, int(len(timings) * 0.95) - 1)]:.2f} ms, max {timings[-1]:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Cold start of a worker: interpreter, imports, create_app and first request, in fresh processes.
+
+Each run starts a new Python process that imports the libraries (Flask,
+SQLAlchemy, Flask-RESTX...), then the app package, calls create_app with
+the production config and serves one request. The app's part (import app
++ create_app) is compared to --target; the libraries can be imported
+once before forking the workers (gunicorn --preload).
+
+--top lists the slowest modules to import (self time, from -X importtime).
+
+Usage (from part4/):
+    python -m benchmarks.startup --runs 10 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PART4 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import bcrypt, flask, flask_cors, flask_jwt_extended, flask_restx, flask_sqlalchemy, sqlalchemy.orm
+libraries = time.perf_counter()
+import app
+package = time.perf_counter()
+from config import ProductionConfig
+class StartupConfig(ProductionConfig):
+    SQLALCHEMY_DATABASE_URI = {uri!r}
+    LOG_LEVEL = 'WARNING'
+application = app.create_app(StartupConfig)
+created = time.perf_counter()
+assert application.test_client().get('/api/v1/amenities/').status_code == 200
+served = time.perf_counter()
+print(json.dumps({{'libraries': libraries - started, 'import app': package - libraries,
+                  'create_app': created - package, 'first request': served - created}}))
+"""
+
+
+def run_child(code, *options):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, *options, '-c', code], cwd=PART4, capture_output=True, text=True,
+                            check=True)
+    return result, time.perf_counter() - started
+
+
+def slowest_imports(code, count):
+    result, _ = run_child(code, '-X', 'importtime')
+    modules = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line and 'self' not in line:
+            self_us, _, name = line[len('import time:'):].split('|')
+            modules.append((int(self_us), name.strip()))
+    return sorted(modules, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--target', type=float, default=200, help="ms allowed for import app + create_app")
+    parser.add_argument('--top', type=int, default=0, help="list the N slowest modules to import")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        code = CHILD.format(uri=uri)
+        # The schema is created once, like a deployment would before starting the workers
+        subprocess.run([sys.executable, '-m', 'flask', '--app', f"app:create_app('config.ProductionConfig')",
+                        'hbnb', 'init-db'], cwd=PART4, check=True, capture_output=True,
+                       env=dict(os.environ, PROD_DATABASE_URI=uri, LOG_LEVEL='WARNING'))
+
+        phases, totals = {}, []
+        for _ in range(args.runs):
+            result, total = run_child(code)
+            for name, seconds in json.loads(result.stdout.splitlines()[-1]).items():
+                phases.setdefault(name, []).append(seconds)
+            totals.append(total)
+
+        for name, values in phases.items():
+            print(f"{name:>14}: {statistics.median(values) * 1000:7.1f} ms")
+        print(f"{'process total':>14}: {statistics.median(totals) * 1000:7.1f} ms (interpreter included)")
+        app_time = statistics.median([a + b for a, b in zip(phases['import app'], phases['create_app'])]) * 1000
+        verdict = "within" if app_time <= args.target else "over"
+        print(f"import app + create_app: {app_time:.1f} ms, {verdict} the {args.target:.0f} ms target")
+
+        if args.top:
+            print("\nSlowest imports (self time):")
+            for self_us, name in slowest_imports(code, args.top):
+                print(f"{self_us / 1000:7.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
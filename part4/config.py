@@ -1,21 +1,123 @@
 import os
 
+
+def replica_binds():
+    """Binds of the read replicas listed in READ_REPLICA_URIS (comma separated)"""
+    uris = [uri for uri in os.getenv('READ_REPLICA_URIS', '').split(',') if uri]
+    return {f'replica_{number}': uri for number, uri in enumerate(uris, 1)}
+
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
-    JWT_SECRET_KEY = SECRET_KEY
+    # Signs the access tokens of the Flask and ASGI apps (a token from one works on the other)
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key')
     DEBUG = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Cursor pagination for collection endpoints (?limit=&after=)
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    # Password hashing: scheme ('bcrypt' or 'argon2id', which needs argon2-cffi),
+    # cost parameters and hashing processes (None = one per core).
+    # Stored hashes with another scheme or cost are upgraded at the next login.
+    PASSWORD_HASH_SCHEME = os.getenv('PASSWORD_HASH_SCHEME', 'bcrypt')
+    BCRYPT_LOG_ROUNDS = 12
+    ARGON2_TIME_COST = 3
+    ARGON2_MEMORY_COST = 65536  # KiB
+    ARGON2_PARALLELISM = 4
+    PASSWORD_HASH_POOL_SIZE = None
+    # Read-through cache of rows fetched by ID ('memory', 'redis' or None).
+    # 'memory' is private to a process: a write handled by one worker leaves
+    # the copies of the other workers stale for up to REPOSITORY_CACHE_TTL,
+    # so only set it when a single process serves the app. Off by default,
+    # 'redis' (shared by the workers) when REPOSITORY_CACHE_REDIS_URL is set.
+    REPOSITORY_CACHE_BACKEND = os.getenv('REPOSITORY_CACHE_BACKEND',
+                                         'redis' if os.getenv('REPOSITORY_CACHE_REDIS_URL') else None)
+    REPOSITORY_CACHE_SIZE = 1024
+    REPOSITORY_CACHE_TTL = 60  # seconds
+    REPOSITORY_CACHE_REDIS_URL = os.getenv('REPOSITORY_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    # Maximum number of items per request to the /bulk endpoints
+    BULK_MAX_ITEMS = 10000
+    # Rows fetched per round trip by the streaming export
+    EXPORT_BATCH_SIZE = 1000
+    # Rendered list responses, validated by the table_versions counters (0 disables)
+    RESPONSE_CACHE_SIZE = 256
+    RESPONSE_CACHE_TTL = 300  # seconds
+    # Database engine: SQLALCHEMY_ENGINE_OPTIONS go to create_engine (pool
+    # settings), SQLITE_PRAGMAS are run on each new SQLite connection.
+    # WAL lets readers work while a write is in progress, synchronous=NORMAL
+    # only syncs at checkpoints (safe with WAL), mmap_size serves reads from
+    # the page cache, busy_timeout (ms) waits for the write lock instead of
+    # failing with "database is locked".
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+    }
+    # Read replicas: during GET requests, the repositories' reads go to one of
+    # these binds (see app/routing.py). SQLITE_REPLICA_SYNC copies the primary
+    # SQLite file into replica files after each write, for local testing.
+    SQLALCHEMY_BINDS = replica_binds()
+    READ_REPLICA_BINDS = list(SQLALCHEMY_BINDS)
+    SQLITE_REPLICA_SYNC = False
+    # SQL instrumentation (app/instrumentation.py): statements and database
+    # time of each request in a Server-Timing header, statements slower than
+    # SLOW_QUERY_MS logged with their endpoint (None disables), and endpoints
+    # over their @query_budget failing instead of logging a warning.
+    SERVER_TIMING = True
+    SLOW_QUERY_MS = 200
+    QUERY_BUDGET_ENFORCE = False
+    # Prometheus metrics (app/metrics.py) served at METRICS_PATH (None
+    # disables). With several worker processes (gunicorn -w), METRICS_DIR
+    # must name a directory emptied at each start: workers write their
+    # values to memory-mapped files there and /metrics sums them.
+    METRICS_PATH = '/metrics'
+    METRICS_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    # Logging (app/logs.py): root level, 'text' or 'json' lines, share of the
+    # DEBUG records kept for chatty loggers (every repository lookup logs
+    # one), and a background thread writing the records.
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+    LOG_SAMPLE_RATES = {'app.persistence': 0.01, 'app.services': 0.1}
+    LOG_QUEUE = True
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+    BCRYPT_LOG_ROUNDS = 10
     SQLALCHEMY_DATABASE_URI = os.getenv('DEV_DATABASE_URI', 'sqlite:///development.db')
 
 class ProductionConfig(Config):
     DEBUG = False
+    BCRYPT_LOG_ROUNDS = 12
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    # e.g. mysql+pymysql://hbnb:<password>@localhost/hbnb_db?charset=utf8mb4 (schema of setup.sql)
     SQLALCHEMY_DATABASE_URI = os.getenv('PROD_DATABASE_URI', 'sqlite:///production.db')
+    # Per worker process: up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so
+    # workers x 20 must stay under MySQL's max_connections (151 by default).
+    # Requests beyond that wait up to pool_timeout seconds for a connection.
+    # Connections are recycled before MySQL's wait_timeout closes them, and
+    # pinged at checkout to survive server restarts.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': 30,
+        'pool_recycle': 280,
+        'pool_pre_ping': True,
+    }
 
 class TestingConfig(Config):
     TESTING = True
+    PASSWORD_HASH_SCHEME = 'bcrypt'
+    BCRYPT_LOG_ROUNDS = 4  # Fast hashing, test passwords don't need protecting
+    ARGON2_TIME_COST = 1
+    ARGON2_MEMORY_COST = 1024
+    ARGON2_PARALLELISM = 1
+    PASSWORD_HASH_POOL_SIZE = 0  # Hash inline
+    QUERY_BUDGET_ENFORCE = True  # An endpoint over its query budget fails the test
+    LOG_LEVEL = 'WARNING'
+    LOG_QUEUE = False  # Records written before the test checks them
     SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URI', 'sqlite:///testing.db')
 
 config = {
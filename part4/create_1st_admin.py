@@ -1,11 +1,14 @@
+import sys
 from app import create_app, db
 from app.models.user import User
-from app.extensions import bcrypt
 import sqlalchemy
 
 app = create_app()
 
 with app.app_context():
+    # Le schéma vient des migrations : une base sans historique Alembic n'est pas prête
+    if 'alembic_version' not in sqlalchemy.inspect(db.engine).get_table_names():
+        sys.exit("La base n'est pas initialisée : lancez d'abord `flask --app run hbnb init-db`")
     try:
         # Supprimer l'utilisateur s'il existe déjà
         db.session.query(User).filter_by(email="admin@hbnb.io").delete()
@@ -27,16 +30,9 @@ with app.app_context():
         user_check = db.session.query(User).filter_by(email="admin@hbnb.io").first()
         if user_check:
             print(f"Utilisateur admin créé avec succès: {user_check.email}")
-            # Essayer la vérification du mot de passe
-            test_password = "admin123"
-            # Vérifier avec bcrypt directement
-            password_matches = bcrypt.check_password_hash(user_check.password, test_password)
-            print(f"Vérification du mot de passe avec bcrypt: {'Succès' if password_matches else 'Échec'}")
-            
-            # Essayer également avec la méthode du modèle si elle existe
-            if hasattr(user_check, 'check_password'):
-                model_check = user_check.check_password(test_password)
-                print(f"Vérification avec la méthode du modèle: {'Succès' if model_check else 'Échec'}")
+            # Vérifier le mot de passe avec le schéma de hachage configuré
+            password_matches = user_check.verify_password("admin123")
+            print(f"Vérification du mot de passe: {'Succès' if password_matches else 'Échec'}")
         else:
             print("ERREUR: L'utilisateur n'a pas été créé correctement")
     
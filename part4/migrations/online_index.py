@@ -0,0 +1,72 @@
+"""
+Index and unique constraint operations that don't block writes to the
+table while the index is built, for the revisions run on live databases.
+
+- PostgreSQL: CREATE [UNIQUE] INDEX CONCURRENTLY, outside of the
+  migration's transaction (it can't run in one). If it fails, it leaves an
+  INVALID index behind: drop it and run the upgrade again.
+- MySQL (InnoDB): ALGORITHM=INPLACE, LOCK=NONE, which fails rather than
+  falling back to a locking copy of the table.
+- SQLite: plain DDL (a single writer at a time anyway); unique constraints
+  go through a batch copy of the table, the only way SQLite adds them.
+
+Imported by the revisions as `online_index` (alembic.ini puts this
+directory on sys.path).
+"""
+from alembic import op
+
+
+def _dialect():
+    return op.get_context().dialect.name
+
+
+def create_index_online(name, table, columns, unique=False, **kw):
+    """kw: dialect options of op.create_index, e.g. postgresql_using='gin'"""
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True, **kw)
+    elif dialect == 'mysql':
+        op.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({', '.join(columns)}) "
+                   f"ALGORITHM=INPLACE LOCK=NONE")
+    else:
+        op.create_index(name, table, columns, unique=unique, **kw)
+
+
+def drop_index_online(name, table):
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    elif dialect == 'mysql':
+        op.execute(f"DROP INDEX {name} ON {table} ALGORITHM=INPLACE LOCK=NONE")
+    else:
+        op.drop_index(name, table_name=table)
+
+
+def create_unique_constraint_online(name, table, columns):
+    """
+    Add a unique constraint, building its index online. On PostgreSQL the
+    index built concurrently then becomes the constraint (a quick catalog
+    change); on MySQL a unique index is the constraint.
+    """
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        create_index_online(name, table, columns, unique=True)
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+    elif dialect == 'mysql':
+        create_index_online(name, table, columns, unique=True)
+    else:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_unique_constraint(name, columns)
+
+
+def drop_unique_constraint_online(name, table):
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        op.drop_constraint(name, table, type_='unique')  # Drops its index too
+    elif dialect == 'mysql':
+        drop_index_online(name, table)
+    else:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(name, type_='unique')
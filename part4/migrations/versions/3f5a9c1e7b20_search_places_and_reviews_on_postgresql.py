@@ -0,0 +1,38 @@
+"""Search places and reviews on PostgreSQL
+
+GIN indexes on the text search vectors of places and reviews, which the
+search of PostgreSQL databases uses instead of scanning the tables with
+LIKE '%...%'. Built online; the other databases have nothing to do (SQLite
+has its FTS5 table, the others page an unranked LIKE search in SQL).
+
+Revision ID: 3f5a9c1e7b20
+Revises: 677353494d84
+Create Date: 2026-10-18 23:48:31.604127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.persistence.search_repository import PG_INDEXES
+from online_index import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision = '3f5a9c1e7b20'
+down_revision = '677353494d84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for name, table, vector in PG_INDEXES:
+        create_index_online(name, table, [sa.text(f'({vector})')], postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for name, table, _vector in reversed(PG_INDEXES):
+        drop_index_online(name, table)
@@ -0,0 +1,39 @@
+"""Index reviews by place and id online
+
+Databases created by db.create_all() before the migrations, stamped by
+`flask hbnb init-db`, have ix_reviews_place_id_created_at where
+eeb726c19bb3 creates ix_reviews_place_id_id: the reviews of a place are
+listed and paged in id order, which (place_id, created_at) can't give
+without a sort. Replace it on those databases, online, the new index
+first so the lookups by place stay indexed; the others have nothing to do.
+
+Revision ID: 677353494d84
+Revises: accc6ea2a4f1
+Create Date: 2026-10-18 23:12:05.318254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from online_index import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision = '677353494d84'
+down_revision = 'accc6ea2a4f1'
+branch_labels = None
+depends_on = None
+
+OLD_INDEX = 'ix_reviews_place_id_created_at'
+
+
+def upgrade():
+    if op.get_context().as_sql:
+        return  # No database to inspect: the scripts are for databases made by the migrations
+    if OLD_INDEX in {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('reviews')}:
+        create_index_online('ix_reviews_place_id_id', 'reviews', ['place_id', 'id'])
+        drop_index_online(OLD_INDEX, 'reviews')
+
+
+def downgrade():
+    pass  # eeb726c19bb3 owns ix_reviews_place_id_id
@@ -0,0 +1,41 @@
+"""Index foreign keys online
+
+Indexes places.owner_id and the reverse (amenity_id) side of
+place_amenity_association, without blocking writes to the tables while
+the indexes are built (online_index.py). On MySQL, the index InnoDB
+created for the foreign key can then be dropped by the server.
+
+reviews.place_id and reviews.user_id are already covered, by
+ix_reviews_place_id_id and uq_reviews_user_place.
+
+Revision ID: accc6ea2a4f1
+Revises: eeb726c19bb3
+Create Date: 2026-10-18 20:44:33.442094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from online_index import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision = 'accc6ea2a4f1'
+down_revision = 'eeb726c19bb3'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_places_owner_id', 'places', ['owner_id']),
+    ('ix_place_amenity_association_amenity_id', 'place_amenity_association', ['amenity_id']),
+)
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        create_index_online(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        drop_index_online(name, table)
@@ -0,0 +1,110 @@
+"""Rating aggregates, geohashes, search index and table versions
+
+Brings the initial schema to what the listing, search and cache code
+needs, and fills the new columns and tables from the existing rows (what
+`flask hbnb rebuild-ratings`, `rebuild-geohashes` and `rebuild-search` do):
+
+- places.review_count, places.rating_sum (from the reviews) and
+  places.geohash (from the coordinates), indexes on price and geohash
+- reviews: index on (place_id, id), one review per user and place
+  (uq_reviews_user_place: remove duplicate reviews before upgrading a
+  database that has some, the upgrade fails otherwise)
+- table_versions, with a row per table
+- the SQLite full-text search table (search_index)
+
+It runs on databases created before the migrations, which serve traffic:
+the indexes and the unique constraint are built without blocking writes
+(online_index.py), after the columns they cover are filled.
+
+Revision ID: eeb726c19bb3
+Revises: 1b7e4c2d9a05
+Create Date: 2026-10-18 20:44:18.594775
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.geo import geohash_encode
+from online_index import (create_index_online, create_unique_constraint_online, drop_index_online,
+                          drop_unique_constraint_online)
+
+
+# revision identifiers, used by Alembic.
+revision = 'eeb726c19bb3'
+down_revision = '1b7e4c2d9a05'
+branch_labels = None
+depends_on = None
+
+# Tables with a row in table_versions
+TABLES = ('users', 'amenities', 'places', 'place_amenity_association', 'reviews')
+BATCH_SIZE = 1000
+
+
+def backfill_geohashes(connection):
+    places = sa.table('places', sa.column('id'), sa.column('latitude'), sa.column('longitude'),
+                      sa.column('geohash'))
+    last_id = None
+    while True:
+        query = sa.select(places.c.id, places.c.latitude, places.c.longitude)
+        if last_id is not None:
+            query = query.where(places.c.id > last_id)
+        rows = connection.execute(query.order_by(places.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        connection.execute(places.update().where(places.c.id == sa.bindparam('place_id'))
+                           .values(geohash=sa.bindparam('hash')),
+                           [{'place_id': row.id, 'hash': geohash_encode(row.latitude, row.longitude)}
+                            for row in rows])
+        last_id = rows[-1].id
+
+
+def upgrade():
+    with op.batch_alter_table('places', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+        batch_op.add_column(sa.Column('review_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'))
+
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.bulk_insert(table_versions, [{'table_name': name, 'version': 0} for name in TABLES])
+
+    # Agrégats des avis et geohashes des lieux existants
+    op.execute("UPDATE places SET "
+               "review_count = (SELECT count(*) FROM reviews WHERE reviews.place_id = places.id), "
+               "rating_sum = (SELECT coalesce(sum(rating), 0) FROM reviews WHERE reviews.place_id = places.id)")
+    if not op.get_context().as_sql:
+        backfill_geohashes(op.get_bind())
+
+    # Index plein texte (SQLite seulement, cf. app/persistence/search_repository.py)
+    if op.get_context().dialect.name == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+                   "USING fts5(title, body, tokenize='unicode61 remove_diacritics 2')")
+        op.execute("INSERT INTO search_index (rowid, title, body) "
+                   "SELECT id * 2, title, coalesce(description, '') FROM places")
+        op.execute("INSERT INTO search_index (rowid, title, body) SELECT id * 2 + 1, '', text FROM reviews")
+
+    # Index construits sans bloquer les écritures, une fois les colonnes remplies
+    create_index_online('ix_places_price', 'places', ['price'])
+    create_index_online('ix_places_geohash', 'places', ['geohash'])
+    create_index_online('ix_reviews_place_id_id', 'reviews', ['place_id', 'id'])
+    create_unique_constraint_online('uq_reviews_user_place', 'reviews', ['user_id', 'place_id'])
+
+
+def downgrade():
+    drop_unique_constraint_online('uq_reviews_user_place', 'reviews')
+    drop_index_online('ix_reviews_place_id_id', 'reviews')
+    drop_index_online('ix_places_geohash', 'places')
+    drop_index_online('ix_places_price', 'places')
+
+    if op.get_context().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS search_index")
+
+    op.drop_table('table_versions')
+
+    with op.batch_alter_table('places', schema=None) as batch_op:
+        batch_op.drop_column('rating_sum')
+        batch_op.drop_column('review_count')
+        batch_op.drop_column('geohash')
@@ -0,0 +1,29 @@
+import unittest
+from app import create_app, db
+from config import TestingConfig
+
+
+class InMemoryConfig(TestingConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+
+class AppTestCase(unittest.TestCase):
+    """
+    Each test gets an app on a new in-memory database: setUp creates the
+    app (self.app, self.client), pushes an app context and creates the
+    tables, tearDown drops them. Set config_class to change the settings.
+    """
+
+    config_class = InMemoryConfig
+
+    def setUp(self):
+        self.app = create_app(self.config_class)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
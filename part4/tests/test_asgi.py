@@ -0,0 +1,215 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.user import User
+from config import TestingConfig
+
+try:
+    from starlette.testclient import TestClient
+    from app.asgi import create_asgi_app
+except ImportError:  # starlette and aiosqlite are only needed by the ASGI serving mode
+    TestClient = None
+
+
+# Served by the Flask app only, see the docstring of app/asgi.py
+FLASK_ONLY = {
+    ('/api/v1/amenities/bulk', 'POST'), ('/api/v1/places/bulk', 'POST'), ('/api/v1/reviews/bulk', 'POST'),
+    ('/api/v1/export', 'GET'), ('/api/v1/protector/protected', 'GET'),
+}
+
+
+def api_routes(rules):
+    """(path, method) pairs of (path, methods) API routes, path parameters written {}, without the Swagger UI"""
+    return {(re.sub(r'<[^>]*>|\{[^}]*\}', '{}', path), method) for path, methods in rules
+            if path.startswith('/api/v1/') and path not in ('/api/v1/', '/api/v1/swagger.json')
+            for method in methods - {'HEAD', 'OPTIONS'}}
+
+
+@unittest.skipIf(TestClient is None, "starlette is not installed")
+class TestAsgiApp(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        path = os.path.join(self.tmp, 'hbnb.db')
+
+        class FileConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+            REPOSITORY_CACHE_BACKEND = None
+        self.config = FileConfig
+
+        # The Flask app creates the schema and the first admin, the ASGI app serves the same file
+        self.flask_app = create_app(FileConfig)
+        with self.flask_app.app_context():
+            db.create_all()
+            db.session.add(User(first_name="Ad", last_name="Min", email="admin@example.com", password="secret",
+                                is_admin=True))
+            db.session.commit()
+            self.flask_token = create_access_token(identity='1', additional_claims={'is_admin': True})
+            db.session.remove()
+            db.engine.dispose()
+
+        self.client = TestClient(create_asgi_app(FileConfig))
+        self.client.__enter__()
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+        shutil.rmtree(self.tmp)
+
+    def login(self, email, password):
+        response = self.client.post('/api/v1/auth/login', json={'email': email, 'password': password})
+        self.assertEqual(response.status_code, 200)
+        return {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+    def test_users_places_and_reviews(self):
+        admin = self.login("admin@example.com", "secret")
+        for email in ("host@example.com", "guest@example.com"):
+            response = self.client.post('/api/v1/users/', headers=admin, json={
+                'first_name': "Jo", 'last_name': "Doe", 'email': email, 'password': "pw"})
+            self.assertEqual(response.status_code, 201)
+        response = self.client.post('/api/v1/users/', headers=admin, json={
+            'first_name': "Jo", 'last_name': "Doe", 'email': "guest@example.com", 'password': "pw"})
+        self.assertEqual(response.json(), {'error': 'Email already registered'})
+        amenity = self.client.post('/api/v1/amenities/', headers=admin, json={'name': "Wi-Fi"}).json()
+
+        host, guest = self.login("host@example.com", "pw"), self.login("guest@example.com", "pw")
+        response = self.client.post('/api/v1/places/', headers=host, json={
+            'title': "Loft", 'description': "Sunny", 'price': 80.0, 'latitude': 48.85, 'longitude': 2.35,
+            'owner_id': "1", 'amenities': [str(amenity['id'])]})
+        self.assertEqual(response.status_code, 201)
+        place = response.json()
+        self.assertEqual(place['owner_id'], 2)  # Not an admin: owner_id is ignored
+        self.assertEqual(place['amenities'], [amenity['id']])
+
+        review = {'text': "Great", 'rating': 4, 'place_id': str(place['id'])}
+        self.assertEqual(self.client.post('/api/v1/reviews/', headers=host, json=review).status_code, 403)
+        response = self.client.post('/api/v1/reviews/', headers=guest, json=review)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['user_id'], 3)
+        response = self.client.post('/api/v1/reviews/', headers=guest, json=review)
+        self.assertEqual(response.json(), {'error': "You have already reviewed this place"})
+
+        place = self.client.get(f"/api/v1/places/{place['id']}").json()
+        self.assertEqual((place['review_count'], place['average_rating']), (1, 4.0))
+        reviews = self.client.get(f"/api/v1/reviews/places/{place['id']}/reviews").json()
+        self.assertEqual([review['text'] for review in reviews], ["Great"])
+
+        response = self.client.put(f"/api/v1/places/{place['id']}", headers=guest, json={'title': "Mine"})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.put(f"/api/v1/places/{place['id']}", headers=host,
+                                   json={'title': "Attic", 'amenities': []})
+        self.assertEqual((response.json()['title'], response.json()['amenities']), ("Attic", []))
+
+        self.assertEqual(self.client.delete(f"/api/v1/reviews/{reviews[0]['id']}", headers=guest).status_code, 200)
+        place = self.client.get(f"/api/v1/places/{place['id']}").json()
+        self.assertEqual((place['review_count'], place['average_rating']), (0, None))
+        self.assertEqual(self.client.delete(f"/api/v1/places/{place['id']}", headers=host).status_code, 200)
+        self.assertEqual(self.client.get(f"/api/v1/places/{place['id']}").status_code, 404)
+
+    def test_pagination_matches_the_flask_app(self):
+        headers = {'Authorization': f"Bearer {self.flask_token}"}  # Tokens work on both apps
+        for name in ("Wi-Fi", "Pool", "Parking"):
+            self.assertEqual(self.client.post('/api/v1/amenities/', headers=headers, json={'name': name})
+                             .status_code, 201)
+
+        response = self.client.get('/api/v1/amenities/?limit=2')
+        self.assertEqual([amenity['name'] for amenity in response.json()], ["Wi-Fi", "Pool"])
+        with self.flask_app.test_client() as flask_client:
+            flask_response = flask_client.get('/api/v1/amenities/?limit=2')
+        self.assertEqual(response.headers['X-Next-Cursor'], flask_response.headers['X-Next-Cursor'])
+        response = self.client.get(f"/api/v1/amenities/?limit=2&after={response.headers['X-Next-Cursor']}")
+        self.assertEqual([amenity['name'] for amenity in response.json()], ["Parking"])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+        self.assertEqual(self.client.get('/api/v1/amenities/?limit=0').status_code, 400)
+
+    def test_place_filters_match_the_flask_app(self):
+        headers = {'Authorization': f"Bearer {self.flask_token}"}
+        for title, price, latitude, longitude in (("Loft", 80.0, 48.85, 2.35), ("Castle", 400.0, 48.80, 2.12),
+                                                  ("Cabin", 50.0, 45.90, 6.87)):
+            response = self.client.post('/api/v1/places/', headers=headers, json={
+                'title': title, 'description': "Nice", 'price': price, 'latitude': latitude, 'longitude': longitude,
+                'owner_id': "1", 'amenities': []})
+            self.assertEqual(response.status_code, 201)
+
+        with self.flask_app.test_client() as flask_client:
+            for query in ('max_price=100', 'sort=rating', 'bbox=2,48,3,49&limit=1', 'near=48.85,2.35&radius_km=30'):
+                response = self.client.get(f'/api/v1/places/?{query}')
+                self.assertEqual(response.status_code, 200, query)
+                self.assertEqual(response.json(), flask_client.get(f'/api/v1/places/?{query}').get_json(), query)
+        response = self.client.get('/api/v1/places/?near=48.85,2.35&radius_km=30')
+        self.assertEqual([place['title'] for place in response.json()], ["Loft", "Castle"])
+        self.assertEqual(response.json()[0]['distance_km'], 0)
+
+        for query in ('max_price=cheap', 'sort=stars', 'near=48.85,2.35&bbox=2,48,3,49', 'limit=2&sort=rating'):
+            response = self.client.get(f'/api/v1/places/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('error', response.json())
+
+    def test_authentication_errors(self):
+        self.assertEqual(self.client.post('/api/v1/amenities/', json={'name': "Pool"}).status_code, 401)
+        response = self.client.post('/api/v1/amenities/', json={'name': "Pool"},
+                                    headers={'Authorization': "Bearer not-a-token"})
+        self.assertEqual(response.status_code, 422)
+        response = self.client.post('/api/v1/auth/login', json={'email': "admin@example.com", 'password': "nope"})
+        self.assertEqual(response.status_code, 401)
+        user = self.login("admin@example.com", "secret")
+        response = self.client.post('/api/v1/users/', headers=user, json={'first_name': "Jo"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json()['errors'])
+
+    def test_routes_match_the_flask_app(self):
+        flask_routes = api_routes((rule.rule, rule.methods) for rule in self.flask_app.url_map.iter_rules())
+        asgi_routes = api_routes((route.path, {method.upper() for method in ('get', 'post', 'put', 'delete')
+                                               if hasattr(route.endpoint, method)})
+                                 for route in self.client.app.routes)
+        self.assertLessEqual(FLASK_ONLY, flask_routes)
+        self.assertEqual(asgi_routes, flask_routes - FLASK_ONLY)
+
+    def test_conditional_gets_match_the_flask_app(self):
+        headers = {'Authorization': f"Bearer {self.flask_token}"}
+        amenity = self.client.post('/api/v1/amenities/', headers=headers, json={'name': "Pool"}).json()
+
+        with self.flask_app.test_client() as flask_client:
+            for url in ('/api/v1/amenities/', '/api/v1/amenities/?limit=1', f"/api/v1/amenities/{amenity['id']}"):
+                response = self.client.get(url)
+                etag = response.headers['ETag']
+                self.assertEqual(etag, flask_client.get(url).headers['ETag'], url)
+                self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304, url)
+                # Served again from the response cache or the database: same body
+                self.assertEqual(self.client.get(url).json(), response.json(), url)
+
+        etag = self.client.get('/api/v1/amenities/').headers['ETag']
+        self.client.post('/api/v1/amenities/', headers=headers, json={'name': "Sauna"})
+        response = self.client.get('/api/v1/amenities/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([amenity['name'] for amenity in response.json()], ["Pool", "Sauna"])
+
+    def test_search_and_user_deletion(self):
+        admin = self.login("admin@example.com", "secret")
+        self.client.post('/api/v1/places/', headers=admin, json={
+            'title': "Sunny loft in Paris", 'description': "Close to the Louvre", 'price': 80.0,
+            'latitude': 48.85, 'longitude': 2.35, 'owner_id': "1", 'amenities': []})
+        self.client.post('/api/v1/places/', headers=admin, json={
+            'title': "Paris attic", 'description': "", 'price': 60.0,
+            'latitude': 48.85, 'longitude': 2.35, 'owner_id': "1", 'amenities': []})
+        response = self.client.get('/api/v1/search/?q=louv')
+        self.assertEqual([(result['type'], result['id']) for result in response.json()], [('place', 1)])
+        response = self.client.get('/api/v1/search/?q=paris&limit=1')
+        self.assertEqual(len(response.json()), 1)
+        response = self.client.get(f"/api/v1/search/?q=paris&after={response.headers['X-Next-Cursor']}")
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(self.client.get('/api/v1/search/?q=paris&type=user').status_code, 400)
+
+        self.client.post('/api/v1/users/', headers=admin, json={
+            'first_name': "Jo", 'last_name': "Doe", 'email': "jo@example.com", 'password': "pw"})
+        jo = self.login("jo@example.com", "pw")
+        self.assertEqual(self.client.delete('/api/v1/users/2', headers=jo).status_code, 403)
+        self.assertEqual(self.client.delete('/api/v1/users/2', headers=admin).status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/users/2').status_code, 404)
+        self.assertEqual(self.client.delete('/api/v1/users/2', headers=admin).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest import mock
+from app import db, hasher
+from app.hashing import argon2, _bcrypt_hash
+from app.models.user import User
+from app.services import facade
+from tests.base import AppTestCase
+
+
+class TestAuth(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = facade.create_user({'first_name': "John", 'last_name': "Doe",
+                                        'email': "john.doe@example.com", 'password': "secret"})
+
+    def login(self, password):
+        return self.client.post('/api/v1/auth/login', json={'email': "john.doe@example.com", 'password': password})
+
+    def test_password_is_hashed_once(self):
+        self.assertTrue(self.user.password.startswith('$2b$04$'))
+        self.assertTrue(self.user.verify_password("secret"))
+
+    def test_login_verifies_password_once(self):
+        with mock.patch.object(hasher, 'verify', wraps=hasher.verify) as verify:
+            response = self.login("secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.get_json())
+        self.assertEqual(verify.call_count, 1)
+
+    def test_invalid_credentials(self):
+        self.assertEqual(self.login("wrong").status_code, 401)
+        response = self.client.post('/api/v1/auth/login', json={'email': "nobody@example.com", 'password': "secret"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_password_update_is_hashed(self):
+        facade.update_user(self.user.id, {'password': "changed"})
+        self.assertNotEqual(self.user.password, "changed")
+        self.assertEqual(self.login("changed").status_code, 200)
+
+    def stored_hash(self):
+        db.session.expire_all()
+        return db.session.get(User, self.user.id).password
+
+    def test_stale_cost_is_upgraded_after_login(self):
+        self.user.password = _bcrypt_hash("secret", 5)
+        db.session.commit()
+        self.assertTrue(hasher.needs_rehash(self.user.password))
+
+        self.assertEqual(self.login("secret").status_code, 200)
+        hasher.wait()
+        self.assertTrue(self.stored_hash().startswith('$2b$04$'))
+        self.assertEqual(self.login("secret").status_code, 200)
+
+    def test_rehash_does_not_overwrite_a_new_password(self):
+        old_hash = self.user.password
+        facade.update_user(self.user.id, {'password': "changed"})
+        self.assertFalse(facade.user_repo.replace_password_hash(self.user.id, old_hash, hasher.hash("secret")))
+        self.assertEqual(self.login("changed").status_code, 200)
+
+    def test_hash_many_in_the_pool(self):
+        passwords = [f"secret{i}" for i in range(6)]
+        with mock.patch.object(hasher, 'pool_size', 2):
+            try:
+                hashes = hasher.hash_many(passwords)
+            finally:
+                hasher.shutdown()
+        self.assertEqual(len(set(hashes)), 6)
+        self.assertTrue(all(hasher.verify(hashed, password) for hashed, password in zip(hashes, passwords)))
+
+    @unittest.skipIf(argon2 is None, "argon2-cffi is not installed")
+    def test_switch_to_argon2id(self):
+        with mock.patch.object(hasher, 'scheme', 'argon2id'):
+            self.assertEqual(self.login("secret").status_code, 200)
+            hasher.wait()
+            self.assertTrue(self.stored_hash().startswith('$argon2id$'))
+            self.assertEqual(self.login("secret").status_code, 200)
+            self.assertEqual(self.login("wrong").status_code, 401)
+        # Switching back keeps the argon2 hashes valid until the next login
+        self.assertEqual(self.login("secret").status_code, 200)
+        hasher.wait()
+        self.assertTrue(self.stored_hash().startswith('$2b$04$'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+from unittest import mock
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, insert
+from sqlalchemy.dialects import mysql, postgresql
+from app import db
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.persistence.repository import _insert_statement
+from app.services import facade
+from tests.base import AppTestCase
+
+
+class TestBulkEndpoints(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User(first_name="Ad", last_name="Min", email="admin@example.com", password="secret",
+                          is_admin=True)
+        self.owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        self.guest = User(first_name="Jane", last_name="Roe", email="jane.roe@example.com", password="secret")
+        self.wifi = Amenity(name="Wi-Fi")
+        db.session.add_all([self.admin, self.owner, self.guest, self.wifi])
+        db.session.commit()
+
+    def post(self, url, items, user):
+        token = create_access_token(identity=str(user.id), additional_claims={'is_admin': user.is_admin})
+        return self.client.post(url, json=items, headers={'Authorization': f'Bearer {token}'})
+
+    def test_amenities_are_admin_only(self):
+        self.assertEqual(self.post('/api/v1/amenities/bulk', [{'name': "Pool"}], self.owner).status_code, 403)
+        response = self.post('/api/v1/amenities/bulk', [{'name': "Pool"}, {'name': ""}, {'nom': "Spa"}], self.admin)
+        self.assertEqual(response.status_code, 207)
+        body = response.get_json()
+        self.assertEqual((body['created'], body['failed']), (1, 2))
+        self.assertEqual(body['results'][1], {'index': 1, 'error': "Name must be a non-empty string"})
+        self.assertEqual(body['results'][2]['error'], "Missing field(s): name")
+        self.assertEqual(db.session.get(Amenity, body['results'][0]['id']).name, "Pool")
+
+    def test_places_with_amenities_in_constant_queries(self):
+        items = [{'title': f"Place {i}", 'price': 100 + i, 'latitude': 48.85, 'longitude': 2.35,
+                  'amenities': [self.wifi.id]} for i in range(200)]
+        items.append({'title': "Broken", 'price': -1, 'latitude': 0, 'longitude': 0})
+        items.append({'title': "Ghost amenity", 'price': 1, 'latitude': 0, 'longitude': 0, 'amenities': [999]})
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response = self.post('/api/v1/places/bulk', items, self.owner)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(response.status_code, 207)
+        body = response.get_json()
+        self.assertEqual((body['created'], body['failed']), (200, 2))
+        self.assertEqual(body['results'][201]['error'], "Amenity 999 not found")
+        self.assertLess(len(statements), 15)
+
+        self.assertEqual(db.session.get(Place, body['results'][150]['id']).title, "Place 150")
+        place = db.session.get(Place, body['results'][0]['id'])
+        self.assertEqual(place.owner_id, self.owner.id)
+        self.assertEqual([a.id for a in place.amenities], [self.wifi.id])
+        self.assertIsNotNone(place.geohash)
+        # Visible to the list endpoint and to search
+        self.assertEqual(len(self.client.get('/api/v1/places/').get_json()), 200)
+        self.assertEqual(len(facade.search("Place", kind='place', limit=300)), 200)
+
+    def test_only_admins_choose_the_owner(self):
+        items = [{'title': "Loft", 'price': 1, 'latitude': 0, 'longitude': 0, 'owner_id': self.guest.id}]
+        result = self.post('/api/v1/places/bulk', items, self.owner).get_json()['results'][0]
+        self.assertEqual(db.session.get(Place, result['id']).owner_id, self.owner.id)
+        result = self.post('/api/v1/places/bulk', items, self.admin).get_json()['results'][0]
+        self.assertEqual(db.session.get(Place, result['id']).owner_id, self.guest.id)
+        items[0]['owner_id'] = 999
+        result = self.post('/api/v1/places/bulk', items, self.admin).get_json()['results'][0]
+        self.assertEqual(result['error'], "User with id 999 not found")
+
+    def test_reviews_update_aggregates_and_reject_duplicates(self):
+        places = [Place(title=f"Place {i}", description="", price=1, latitude=0, longitude=0, owner=self.owner)
+                  for i in range(2)]
+        db.session.add_all(places)
+        db.session.commit()
+        etag = self.client.get(f'/api/v1/places/{places[0].id}').headers['ETag']
+
+        response = self.post('/api/v1/reviews/bulk', [
+            {'text': "Great", 'rating': 5, 'place_id': places[0].id},
+            {'text': "Again", 'rating': 1, 'place_id': places[0].id},
+            {'text': "Fine", 'rating': 3, 'place_id': places[1].id},
+            {'text': "Nope", 'rating': 9, 'place_id': places[1].id},
+            {'text': "Where?", 'rating': 4, 'place_id': 999},
+        ], self.guest)
+        errors = [result.get('error') for result in response.get_json()['results']]
+        self.assertEqual(errors, [None, "You have already reviewed this place", None,
+                                  "Rating must be an integer between 1 and 5", "Place not found"])
+        own = self.post('/api/v1/reviews/bulk', [{'text': "Mine", 'rating': 5, 'place_id': places[0].id}],
+                        self.owner)
+        self.assertEqual(own.status_code, 400)
+        self.assertEqual(own.get_json()['results'][0]['error'], "You cannot review your own place")
+
+        details = self.client.get(f'/api/v1/places/{places[0].id}', headers={'If-None-Match': etag})
+        self.assertEqual(details.status_code, 200)
+        self.assertEqual((details.get_json()['review_count'], details.get_json()['average_rating']), (1, 5.0))
+        self.assertEqual(Review.query.count(), 2)
+        self.assertEqual(facade.search("great", kind='review')[0]['type'], 'review')
+
+    def test_invalid_body(self):
+        self.assertEqual(self.post('/api/v1/amenities/bulk', {'name': "Pool"}, self.admin).status_code, 400)
+        self.app.config['BULK_MAX_ITEMS'] = 1
+        response = self.post('/api/v1/amenities/bulk', [{'name': "A"}, {'name': "B"}], self.admin)
+        self.assertEqual(response.status_code, 400)
+
+    def test_users_with_plain_and_hashed_passwords(self):
+        hashed = self.guest.password
+        records = [{'first_name': "User", 'last_name': str(i), 'email': f"user{i}@example.com",
+                    'password': f"secret{i}"} for i in range(5)]
+        records += [{'first_name': "Migrated", 'last_name': "User", 'email': "migrated@example.com",
+                     'password': hashed, 'is_admin': True},
+                    {'first_name': "Dup", 'last_name': "User", 'email': "user0@example.com", 'password': "x"},
+                    {'first_name': "Taken", 'last_name': "User", 'email': "admin@example.com", 'password': "x"},
+                    {'first_name': "", 'last_name': "User", 'email': "empty@example.com", 'password': "x"}]
+        progress = []
+
+        results = facade.create_users_bulk(records, batch_size=4,
+                                           on_progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(progress, [(4, 6), (6, 6)])
+        self.assertEqual([result.get('error') for result in results[6:]],
+                         ["Email already registered", "Email already registered",
+                          "First name must be between 1 and 50 characters"])
+        user = db.session.get(User, results[3]['id'])
+        self.assertTrue(user.verify_password("secret3"))
+        # A bcrypt hash is stored as it is, not hashed again
+        migrated = db.session.get(User, results[5]['id'])
+        self.assertEqual(migrated.password, hashed)
+        self.assertTrue(migrated.verify_password("secret") and migrated.is_admin)
+
+    def test_insert_statement_per_dialect(self):
+        # MySQL has no INSERT ... RETURNING (the server rejects it): the rows are inserted one at a time
+        self.assertFalse(mysql.dialect().insert_returning)
+        self.assertIsNone(_insert_statement(Amenity, mysql.dialect()))
+        self.assertNotIn("RETURNING", str(insert(Amenity).compile(dialect=mysql.dialect())))
+        statement = _insert_statement(Amenity, postgresql.dialect())
+        self.assertIn("RETURNING amenities.id", str(statement.compile(dialect=postgresql.dialect())))
+
+    def test_ids_without_returning(self):
+        with mock.patch('app.persistence.repository._insert_statement', return_value=None):
+            response = self.post('/api/v1/amenities/bulk', [{'name': "Pool"}, {'name': ""}, {'name': "Spa"}],
+                                 self.admin)
+        self.assertEqual(response.status_code, 207)
+        ids = [result.get('id') for result in response.get_json()['results']]
+        self.assertEqual([db.session.get(Amenity, ids[0]).name, ids[1], db.session.get(Amenity, ids[2]).name],
+                         ["Pool", None, "Spa"])
+
+
+if __name__ == '__main__':
+    unittest.main()
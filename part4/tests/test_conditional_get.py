@@ -0,0 +1,79 @@
+import unittest
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.services import facade
+from tests.base import AppTestCase
+
+
+class TestConditionalGet(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        self.wifi = Amenity(name="Wi-Fi")
+        self.place = Place(title="Loft", description="", price=100, latitude=0, longitude=0, owner=self.owner)
+        self.place.add_amenity(self.wifi)
+        db.session.add_all([self.owner, self.wifi, self.place])
+        db.session.commit()
+        self.url = f'/api/v1/places/{self.place.id}'
+
+    def test_entity_etag_and_last_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, headers={'If-Modified-Since': last_modified}).status_code, 304)
+
+        facade.update_place(self.place.id, {'title': "Penthouse"})
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_amenity_change_changes_etag(self):
+        etag = self.client.get(self.url).headers['ETag']
+        facade.update_place(self.place.id, {'amenities': []})
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_not_modified_skips_relationships(self):
+        etag = self.client.get(self.url).headers['ETag']
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertFalse([s for s in statements if 'place_amenity' in s])
+
+    def test_other_resources(self):
+        for url in (f'/api/v1/users/{self.owner.id}', f'/api/v1/amenities/{self.wifi.id}'):
+            etag = self.client.get(url).headers['ETag']
+            self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_collection_etag(self):
+        response = self.client.get('/api/v1/places/')
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.get('/api/v1/places/', headers={'If-None-Match': etag}).status_code, 304)
+        # Another filter is another resource
+        filtered = self.client.get('/api/v1/places/?max_price=50', headers={'If-None-Match': etag})
+        self.assertEqual(filtered.status_code, 200)
+
+        facade.create_place({'title': "Villa", 'description': "", 'price': 300, 'latitude': 0,
+                             'longitude': 0, 'owner_id': self.owner.id})
+        response = self.client.get('/api/v1/places/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 2)
+
+        etag = response.headers['ETag']
+        facade.delete_place(self.place.id)
+        self.assertEqual(self.client.get('/api/v1/places/', headers={'If-None-Match': etag}).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import text
+from app import create_app, db
+from config import ProductionConfig, TestingConfig
+
+
+class TestEngineConfiguration(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def make_app(self, base):
+        class FileConfig(base):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.tmp, 'hbnb.db')}"
+        return create_app(FileConfig)
+
+    def pragma(self, name):
+        return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+    def test_sqlite_pragmas_on_every_connection(self):
+        app = self.make_app(TestingConfig)
+        with app.app_context():
+            self.assertEqual(self.pragma('journal_mode'), 'wal')
+            self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+            self.assertEqual(self.pragma('busy_timeout'), 5000)
+            self.assertEqual(self.pragma('mmap_size'), 256 * 1024 * 1024)
+            db.session.remove()
+            db.engine.dispose()
+
+    def test_production_pool(self):
+        app = self.make_app(ProductionConfig)
+        with app.app_context():
+            self.assertEqual(db.engine.pool.size(), ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS['pool_size'])
+            self.assertEqual(db.engine.pool._max_overflow, ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS['max_overflow'])
+            self.assertTrue(db.engine.pool._pre_ping)
+            db.engine.dispose()
+
+    def test_pragmas_can_be_disabled(self):
+        class NoPragmas(TestingConfig):
+            SQLITE_PRAGMAS = {}
+        app = self.make_app(NoPragmas)
+        with app.app_context():
+            self.assertEqual(self.pragma('journal_mode'), 'delete')
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import unittest
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from tests.base import AppTestCase, InMemoryConfig
+
+
+class ExportConfig(InMemoryConfig):
+    EXPORT_BATCH_SIZE = 2
+
+
+class TestExport(AppTestCase):
+    config_class = ExportConfig
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User(first_name="Ad", last_name="Min", email="admin@example.com", password="secret",
+                          is_admin=True)
+        self.guest = User(first_name="Jane", last_name="Roe", email="jane.roe@example.com", password="secret")
+        wifi = Amenity(name="Wi-Fi")
+        places = [Place(title=f"Place {i}", description="", price=10, latitude=0, longitude=0, owner=self.admin)
+                  for i in range(5)]
+        places[0].add_amenity(wifi)
+        review = Review(text="Nice", rating=4, place=places[0], user=self.guest)
+        db.session.add_all([self.admin, self.guest, wifi, review] + places)
+        db.session.commit()
+
+    def export(self, query='', user=None):
+        user = user or self.admin
+        token = create_access_token(identity=str(user.id), additional_claims={'is_admin': user.is_admin})
+        return self.client.get(f'/api/v1/export{query}', headers={'Authorization': f'Bearer {token}'})
+
+    def test_streams_every_entity_in_foreign_key_order(self):
+        response = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line['entity'] for line in lines],
+                         ['users'] * 2 + ['amenities'] + ['places'] * 5 + ['place_amenity_association', 'reviews'])
+        place = lines[3]['data']
+        self.assertEqual((place['title'], place['owner_id']), ("Place 0", self.admin.id))
+        self.assertIsInstance(place['created_at'], str)
+
+    def test_entities_filter(self):
+        lines = self.export('?entities=reviews,amenities').get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)['entity'] for line in lines], ['amenities', 'reviews'])
+        self.assertEqual(self.export('?entities=passwords').status_code, 400)
+
+    def test_admin_only(self):
+        self.assertEqual(self.export(user=self.guest).status_code, 403)
+        self.assertEqual(self.client.get('/api/v1/export').status_code, 401)
+
+    def test_cli(self):
+        result = self.app.test_cli_runner().invoke(args=['hbnb', 'export', '--entities', 'places'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(result.output.splitlines()), 5)
+        result = self.app.test_cli_runner().invoke(args=['hbnb', 'export', '--entities', 'nope'])
+        self.assertNotEqual(result.exit_code, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
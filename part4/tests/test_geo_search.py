@@ -0,0 +1,79 @@
+import unittest
+from app import db
+from app.geo import bounding_box, covering_cells, geohash_encode, haversine_km
+from app.models.user import User
+from app.models.place import Place
+from tests.base import AppTestCase
+
+
+class TestGeo(unittest.TestCase):
+    def test_geohash_encode(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_haversine(self):
+        # Paris - London
+        self.assertAlmostEqual(haversine_km(48.8566, 2.3522, 51.5074, -0.1278), 343.5, delta=1)
+
+    def test_covering_cells_contain_points_of_the_box(self):
+        south, west, north, east = bounding_box(48.8566, 2.3522, 5)
+        cells = covering_cells(south, west, north, east)
+        self.assertLessEqual(len(cells), 16)
+        for lat, lng in [(south, west), (north, east), (48.8566, 2.3522)]:
+            self.assertTrue(any(geohash_encode(lat, lng).startswith(cell) for cell in cells))
+
+
+class TestPlaceGeoSearch(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        coordinates = {
+            'Louvre': (48.8606, 2.3376),
+            'Eiffel Tower': (48.8584, 2.2945),
+            'Versailles': (48.8049, 2.1204),
+            'London': (51.5074, -0.1278),
+            'Fiji East': (-17.7134, 179.9),
+            'Fiji West': (-17.7134, -179.9),
+        }
+        db.session.add(owner)
+        for title, (lat, lng) in coordinates.items():
+            db.session.add(Place(title=title, description="", price=100, latitude=lat, longitude=lng, owner=owner))
+        db.session.commit()
+
+    def titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [place['title'] for place in response.get_json()]
+
+    def test_geohash_is_maintained(self):
+        place = Place.query.filter_by(title='Louvre').one()
+        self.assertEqual(place.geohash, geohash_encode(48.8606, 2.3376))
+        place.latitude = 51.5074
+        place.longitude = -0.1278
+        db.session.commit()
+        self.assertTrue(place.geohash.startswith('gcpv'))
+
+    def test_near_orders_by_distance(self):
+        results = self.client.get('/api/v1/places/?near=48.8566,2.3522&radius_km=30').get_json()
+        self.assertEqual([r['title'] for r in results], ['Louvre', 'Eiffel Tower', 'Versailles'])
+        self.assertLess(results[0]['distance_km'], results[1]['distance_km'])
+        self.assertEqual(self.titles('/api/v1/places/?near=48.8566,2.3522&radius_km=5'), ['Louvre', 'Eiffel Tower'])
+        self.assertEqual(self.titles('/api/v1/places/?near=48.8566,2.3522&radius_km=30&limit=1'), ['Louvre'])
+
+    def test_near_across_antimeridian(self):
+        self.assertEqual(self.titles('/api/v1/places/?near=-17.7134,179.99&radius_km=50'), ['Fiji East', 'Fiji West'])
+
+    def test_bbox(self):
+        self.assertEqual(self.titles('/api/v1/places/?bbox=2.2,48.85,2.4,48.87'), ['Louvre', 'Eiffel Tower'])
+        self.assertEqual(self.titles('/api/v1/places/?bbox=179,-18,-179,-17'), ['Fiji East', 'Fiji West'])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/v1/places/?near=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/places/?near=48,2&radius_km=5000').status_code, 400)
+        response = self.client.get('/api/v1/places/?near=48.8,2.3&bbox=2,48,3,49')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("bbox", response.get_json()['error'])
+        self.assertEqual(self.client.get('/api/v1/places/?bbox=1,2,3').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import db
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.services import facade
+from app.services.importer import Checkpoint
+from tests.base import AppTestCase
+
+
+class Crash(Exception):
+    pass
+
+
+class TestImport(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def seed(self):
+        owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        guest = User(first_name="Jane", last_name="Roe", email="jane.roe@example.com", password="secret")
+        wifi = Amenity(name="Wi-Fi")
+        places = [Place(title=f"Loft {i}", description="Close to the Louvre", price=100, latitude=48.86,
+                        longitude=2.34, owner=owner) for i in range(3)]
+        places[0].add_amenity(wifi)
+        review = Review(text="Great view", rating=4, place=places[0], user=guest)
+        db.session.add_all([owner, guest, wifi, review] + places)
+        db.session.commit()
+
+    def test_round_trip_of_an_export(self):
+        self.seed()
+        path = self.write('dump.jsonl', ''.join(facade.export_dataset()))
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+
+        stats = facade.import_dataset(path, batch_size=2)
+        self.assertEqual(stats['places'], {'inserted': 3, 'skipped': 0, 'rejected': 0})
+        self.assertEqual(stats['reviews']['inserted'], 1)
+        place = db.session.get(Place, 1)
+        self.assertEqual(([a.name for a in place.amenities], place.review_count, place.rating_sum),
+                         (["Wi-Fi"], 1, 4))
+        self.assertIsNotNone(place.geohash)
+        # Password hashes are kept as they are, not hashed again
+        self.assertTrue(db.session.get(User, 1).verify_password("secret"))
+        self.assertEqual(len(self.client.get('/api/v1/search/?q=louvre').get_json()), 3)
+
+        # Importing the same file again changes nothing
+        stats = facade.import_dataset(path)
+        self.assertEqual(stats['places'], {'inserted': 0, 'skipped': 3, 'rejected': 0})
+        self.assertEqual(db.session.get(Place, 1).review_count, 1)
+
+    def test_csv_values_are_converted_and_invalid_rows_reported(self):
+        users = self.write('users.csv', "first_name,last_name,email,password,is_admin\n"
+                                        "John,Doe,john.doe@example.com,secret,true\n"
+                                        "Jane,Roe,not-an-email,secret,false\n"
+                                        "Jim,Poe,john.doe@example.com,secret,\n")
+        places = self.write('places.csv', "id,title,price,latitude,longitude,owner_id\n"
+                                          "10,Loft,99.5,48.86,2.34,1\n"
+                                          "11,Cabin,80,91,2.34,1\n"
+                                          "12,Hut,abc,0,0,1\n"
+                                          "13,Barn,10,0,0,42\n")
+        errors = []
+
+        def on_error(line, entity, message):
+            errors.append((line, entity, message))
+
+        stats = facade.import_dataset(users, on_error=on_error)
+        self.assertEqual(stats['users'], {'inserted': 1, 'skipped': 0, 'rejected': 2})
+        user = db.session.get(User, 1)
+        self.assertTrue(user.is_admin)
+        self.assertTrue(user.verify_password("secret"))
+
+        facade.import_dataset(places, on_error=on_error)
+        place = db.session.get(Place, 10)
+        self.assertEqual((place.title, place.price, place.owner_id), ("Loft", 99.5, 1))
+        self.assertEqual(errors, [
+            (3, 'users', "Invalid email format"),
+            (4, 'users', "Email already registered"),
+            (3, 'places', "Latitude must be a number between -90 and 90"),
+            (4, 'places', "Invalid value for price: 'abc'"),
+            (5, 'places', "User with id 42 not found"),
+        ])
+
+    def test_resumes_from_the_checkpoint(self):
+        users = ''.join(f'{{"first_name":"U","last_name":"{i}","email":"u{i}@example.com",'
+                        f'"password":"secret"}}\n' for i in range(5))
+        path = self.write('users.jsonl', users)
+        checkpoint = Checkpoint(path + '.checkpoint', path)
+
+        def crash(records, counters):
+            raise Crash()
+
+        with self.assertRaises(Crash):
+            facade.import_dataset(path, batch_size=2, checkpoint=checkpoint, on_progress=crash)
+        self.assertEqual(checkpoint.load()[0], 2)
+        self.assertEqual(User.query.count(), 2)
+
+        stats = facade.import_dataset(path, batch_size=2, checkpoint=checkpoint)
+        self.assertEqual(stats['users']['inserted'], 5)
+        self.assertEqual(User.query.count(), 5)
+        self.assertFalse(os.path.exists(checkpoint.path))
+
+    def test_cli(self):
+        path = self.write('amenities.csv', "name\nWi-Fi\nPool\n\n" + "x" * 60 + "\n")
+        result = self.app.test_cli_runner().invoke(args=['hbnb', 'import', path, '--batch-size', '1'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("amenities: 2 inserted, 0 already present, 1 rejected", result.output)
+        self.assertEqual(Amenity.query.count(), 2)
+
+        bad = self.write('dump.jsonl', '{"entity": "users", "data": {}}\n{"entity": "owners", "data": {}}\n')
+        result = self.app.test_cli_runner().invoke(args=['hbnb', 'import', bad])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("line 2: unknown entity 'owners'", result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from sqlalchemy import text
+from app import db
+from app.instrumentation import QueryBudgetExceeded, query_budget
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place
+from tests.base import AppTestCase, InMemoryConfig
+
+
+class UncachedConfig(InMemoryConfig):
+    REPOSITORY_CACHE_BACKEND = None
+    RESPONSE_CACHE_SIZE = 0
+
+
+class TestQueryInstrumentation(AppTestCase):
+    config_class = UncachedConfig
+
+    def setUp(self):
+        super().setUp()
+
+        @self.app.route('/n-plus-one')
+        @query_budget(1)
+        def n_plus_one():
+            for _ in range(3):
+                db.session.execute(text("SELECT 1"))
+            return {}
+
+    def server_timing(self, response):
+        return dict(value.split(';', 1) for value in response.headers.getlist('Server-Timing'))
+
+    def query_count(self, response):
+        return int(self.server_timing(response)['db'].split('"')[1].split()[0])
+
+    def test_server_timing_header(self):
+        db.session.add(User(first_name="Jo", last_name="Doe", email="jo@example.com", password="pw"))
+        db.session.commit()
+        response = self.client.get('/api/v1/users/1')
+        self.assertEqual(self.query_count(response), 1)
+        self.assertRegex(self.server_timing(response)['total'], r'^dur=[\d.]+$')
+
+    def test_list_budget_does_not_grow_with_rows(self):
+        owner = User(first_name="Jo", last_name="Doe", email="jo@example.com", password="pw")
+        amenities = [Amenity(name=f"Amenity {i}") for i in range(3)]
+        for i in range(30):
+            place = Place(title=f"Place {i}", description="", price=10, latitude=0, longitude=0, owner=owner)
+            place.amenities = amenities
+            db.session.add(place)
+        db.session.commit()
+        db.session.expunge_all()
+        for url in ('/api/v1/places/', '/api/v1/places/?limit=20', '/api/v1/places/?min_price=5'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(self.query_count(response), 2)  # Table version, then the page
+
+    def test_budget_exceeded_fails(self):
+        with self.assertRaises(QueryBudgetExceeded) as error:
+            self.client.get('/n-plus-one')
+        self.assertIn("n_plus_one issued 3 SQL statements, budget is 1", str(error.exception))
+
+    def test_slow_queries_are_logged_with_their_endpoint(self):
+        self.app.config['SLOW_QUERY_MS'] = 0
+        with self.assertLogs('app.instrumentation', 'WARNING') as logs:
+            self.client.get('/api/v1/amenities/')
+        self.assertIn("in GET amenities_amenity_list: SELECT", logs.output[0])
+
+
+class TestQueryBudgetNotEnforced(TestQueryInstrumentation):
+    config_class = type('NotEnforcedConfig', (UncachedConfig,), {'QUERY_BUDGET_ENFORCE': False})
+
+    def test_budget_exceeded_fails(self):
+        with self.assertLogs('app.instrumentation', 'WARNING') as logs:
+            self.assertEqual(self.client.get('/n-plus-one').status_code, 200)
+        self.assertIn("budget is 1", logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import io
+import json
+import logging
+import threading
+import unittest
+from unittest import mock
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.logs import SamplingFilter, configure_logging, stop_logging
+from tests.base import AppTestCase, InMemoryConfig
+
+
+class ThreadRecorder:
+    """Logged as an argument: remembers the thread that formatted the message"""
+
+    def __init__(self):
+        self.thread = None
+
+    def __str__(self):
+        self.thread = threading.current_thread()
+        return "recorded"
+
+
+class ThreadStream(io.StringIO):
+    """Remembers the thread that wrote to it last"""
+
+    thread = None
+
+    def write(self, text):
+        self.thread = threading.current_thread()
+        return super().write(text)
+
+
+class TestLogging(unittest.TestCase):
+    def setUp(self):
+        self.stream = ThreadStream()
+        self.logger = logging.getLogger('app.tests')
+
+    def tearDown(self):
+        configure_logging({'LOG_LEVEL': InMemoryConfig.LOG_LEVEL, 'LOG_QUEUE': False})
+
+    def configure(self, **settings):
+        with mock.patch('sys.stderr', self.stream):
+            configure_logging(settings)
+
+    def lines(self):
+        stop_logging()
+        return self.stream.getvalue().splitlines()
+
+    def test_queue_renders_the_arguments_when_logging(self):
+        self.configure(LOG_LEVEL='INFO', LOG_QUEUE=True)
+        recorder, skipped = ThreadRecorder(), ThreadRecorder()
+        place_data = {'title': "Loft", 'owner_id': 1}
+        self.logger.info("Value: %s %s", recorder, place_data)
+        place_data.pop('owner_id')  # Changed right after, like HBnBFacade.create_place does
+        self.logger.debug("Not created: %s", skipped)
+        lines = self.lines()
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].endswith("INFO [app.tests] Value: recorded {'title': 'Loft', 'owner_id': 1}"))
+        self.assertIs(recorder.thread, threading.current_thread())
+        self.assertIsNone(skipped.thread)
+        # Written by the listener thread
+        self.assertIsNotNone(self.stream.thread)
+        self.assertIsNot(self.stream.thread, threading.current_thread())
+
+    def test_json_lines_with_the_request(self):
+        app = create_app(InMemoryConfig)
+        self.configure(LOG_LEVEL='INFO', LOG_FORMAT='json', LOG_QUEUE=True)
+        with app.test_request_context('/api/v1/places/7', method='PUT'):
+            self.logger.warning("Place %s not found", 7, extra={'place_id': 7})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("Failed")
+        first, second = map(json.loads, self.lines())
+        self.assertEqual((first['level'], first['logger'], first['message']),
+                         ('WARNING', 'app.tests', "Place 7 not found"))
+        self.assertEqual(first['request'], {'method': 'PUT', 'path': '/api/v1/places/7',
+                                            'endpoint': 'places_place_resource'})
+        self.assertEqual(first['place_id'], 7)
+        self.assertNotIn('request', second)
+        self.assertIn("ValueError: boom", second['exception'])
+
+    def test_debug_records_are_sampled(self):
+        sampling = SamplingFilter({'app': 1.0, 'app.persistence': 0.0})
+        record = lambda name, level: logging.LogRecord(name, level, __file__, 1, "message", (), None)
+        self.assertFalse(sampling.filter(record('app.persistence.repository', logging.DEBUG)))
+        self.assertTrue(sampling.filter(record('app.persistence.repository', logging.WARNING)))
+        self.assertTrue(sampling.filter(record('app.services.facade', logging.DEBUG)))
+        self.assertTrue(sampling.filter(record('sqlalchemy.engine', logging.DEBUG)))
+
+    def test_reconfiguring_replaces_the_handler(self):
+        self.configure(LOG_LEVEL='INFO', LOG_QUEUE=False)
+        self.configure(LOG_LEVEL='INFO', LOG_QUEUE=False)
+        self.logger.info("Once")
+        self.assertEqual(len(self.lines()), 1)
+        with self.assertRaises(ValueError):
+            configure_logging({'LOG_FORMAT': 'xml'})
+
+
+class TestNoPrints(AppTestCase):
+    def test_user_creation_logs_nothing_on_stdout(self):
+        with mock.patch('sys.stdout', io.StringIO()) as stdout:
+            token = create_access_token(identity='1', additional_claims={'is_admin': True})
+            response = self.client.post('/api/v1/users/', headers={'Authorization': f"Bearer {token}"},
+                                        json={'first_name': "Jo", 'last_name': "Doe",
+                                              'email': "jo@example.com", 'password': "pw"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(stdout.getvalue(), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
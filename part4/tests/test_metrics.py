@@ -0,0 +1,116 @@
+import multiprocessing
+import shutil
+import tempfile
+import unittest
+from datetime import timedelta
+from flask_jwt_extended import create_access_token
+from app import db
+from app.metrics import MmapStore, Registry, Counter, Gauge, Histogram
+from app.models.user import User
+from tests.base import AppTestCase, InMemoryConfig
+
+
+class MetricsConfig(InMemoryConfig):
+    REPOSITORY_CACHE_BACKEND = 'memory'
+    METRICS_DIR = None
+
+
+class TestMetricsEndpoint(AppTestCase):
+    config_class = MetricsConfig
+
+    def setUp(self):
+        super().setUp()
+        db.session.add(User(first_name="Jo", last_name="Doe", email="jo@example.com", password="secret"))
+        db.session.commit()
+
+    def metrics(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        samples = {}
+        for line in response.get_data(as_text=True).splitlines():
+            if not line.startswith('#'):
+                key, value = line.rsplit(' ', 1)
+                samples[key] = float(value)
+        return samples
+
+    def test_requests_by_route(self):
+        for user_id in (1, 1, 42):
+            self.client.get(f'/api/v1/users/{user_id}')
+        samples = self.metrics()
+        route = 'method="GET",route="/api/v1/users/<id>"'
+        self.assertEqual(samples[f'hbnb_http_requests_total{{{route},status="200"}}'], 2)
+        self.assertEqual(samples[f'hbnb_http_requests_total{{{route},status="404"}}'], 1)
+        self.assertEqual(samples[f'hbnb_http_request_duration_seconds_count{{{route}}}'], 3)
+        self.assertEqual(samples[f'hbnb_http_request_duration_seconds_bucket{{{route},le="+Inf"}}'], 3)
+        self.assertEqual(samples['hbnb_http_requests_in_progress'], 1)  # The scrape itself
+
+    def test_cache_password_and_pool_metrics(self):
+        self.client.get('/api/v1/users/1')
+        self.client.get('/api/v1/users/1')
+        self.client.post('/api/v1/auth/login', json={'email': "jo@example.com", 'password': "secret"})
+        samples = self.metrics()
+        self.assertEqual(samples['hbnb_cache_lookups_total{cache="repository",result="hit"}'], 1)
+        self.assertEqual(samples['hbnb_cache_lookups_total{cache="repository",result="miss"}'], 1)
+        self.assertEqual(samples['hbnb_password_hash_seconds_count{operation="verify",scheme="bcrypt"}'], 1)
+        self.assertGreater(samples['hbnb_db_pool_checkout_seconds_count{engine="default"}'], 0)
+        # The session of the test client's app context may still hold its connection
+        self.assertLessEqual(samples['hbnb_db_pool_checked_out{engine="default"}'], 1)
+
+    def test_jwt_decode_failures(self):
+        expired = create_access_token(identity='1', expires_delta=timedelta(seconds=-1))
+        for token, status in (("not-a-token", 422), (expired, 401)):
+            response = self.client.post('/api/v1/amenities/', json={'name': "Pool"},
+                                        headers={'Authorization': f"Bearer {token}"})
+            self.assertEqual(response.status_code, status)
+        self.assertEqual(response.json, {'msg': "Token has expired"})
+        samples = self.metrics()
+        self.assertEqual(samples['hbnb_jwt_decode_failures_total{reason="invalid"}'], 1)
+        self.assertEqual(samples['hbnb_jwt_decode_failures_total{reason="expired"}'], 1)
+
+
+class TestMmapStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.registry = Registry()
+        self.registry.store = MmapStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_workers_are_summed(self):
+        counter = Counter('jobs_total', "Jobs", ('kind',), registry=self.registry)
+        gauge = Gauge('busy', "Busy", registry=self.registry)
+        counter.inc(5, kind='a')
+        gauge.inc()
+
+        def work():  # In a forked worker, like gunicorn's: writes to its own files
+            for _ in range(1000):
+                counter.inc(kind='a')
+            gauge.inc()
+
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=work) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        values = self.registry.store.collect()
+        # Counters of exited workers still count, their gauges don't
+        self.assertEqual(values['jobs_total{kind="a"}'], 2005)
+        self.assertEqual(values['busy'], 1)
+
+    def test_histogram_and_growth(self):
+        histogram = Histogram('latency_seconds', "Latency", ('route',), buckets=(0.1, 1), registry=self.registry)
+        for i in range(2000):  # Enough keys to grow the file past its first mapping
+            histogram.observe(0.05, route=f"/r{i}")
+        histogram.observe(0.5, route="/r0")
+        lines = self.registry.render().splitlines()
+        self.assertIn('latency_seconds_bucket{route="/r0",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="/r0",le="1.0"} 2', lines)
+        self.assertIn('latency_seconds_bucket{route="/r0",le="+Inf"} 2', lines)
+        self.assertIn('latency_seconds_count{route="/r1999"} 1', lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import importlib.util
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import inspect, select, text
+from app import create_app, db
+from app.extensions import migrate, table_versions
+from app.schema import CREATE_ALL_SCHEMAS, MIGRATIONS_DIR, create_all_revision, unindexed_foreign_keys
+from config import TestingConfig
+
+PART4 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FK_INDEXES_REVISION, SERIES_REVISION, INITIAL_REVISION = (revision for revision, _, _ in CREATE_ALL_SCHEMAS)
+FK_INDEXES = {('places', ('owner_id',)), ('place_amenity_association', ('amenity_id',))}
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        path = os.path.join(self.tmp, 'hbnb.db')
+
+        class FileConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        self.app = create_app(FileConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.flask_migrate = migrate.load(self.app)
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        shutil.rmtree(self.tmp)
+
+    def cli(self, *args):
+        return self.app.test_cli_runner().invoke(args=list(args))
+
+    def revision(self):
+        with db.engine.connect() as connection:
+            return MigrationContext.configure(connection).get_current_revision()
+
+    def test_upgrade_matches_the_models(self):
+        self.flask_migrate.upgrade()
+        with db.engine.connect() as connection:
+            context = MigrationContext.configure(connection, opts={
+                'include_name': lambda name, type_, parents: type_ != 'table' or not name.startswith('search_index')})
+            self.assertEqual(compare_metadata(context, db.metadata), [])
+        self.assertEqual(unindexed_foreign_keys(db.engine), [])
+        names = db.session.execute(select(table_versions.c.table_name)).scalars().all()
+        self.assertEqual(set(names), {table.name for table in db.metadata.sorted_tables} - {'table_versions'})
+        self.assertIn('search_index', inspect(db.engine).get_table_names())
+
+    def test_check_flags_foreign_keys_without_index(self):
+        self.flask_migrate.upgrade(revision=SERIES_REVISION)
+        self.assertEqual(set(unindexed_foreign_keys(db.engine)), FK_INDEXES)
+        result = self.cli('hbnb', 'check-indexes')
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("places (owner_id): foreign key without an index", result.output)
+
+        self.flask_migrate.upgrade()
+        result = self.cli('hbnb', 'check-indexes')
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.flask_migrate.downgrade(revision=SERIES_REVISION)
+        self.assertEqual(set(unindexed_foreign_keys(db.engine)), FK_INDEXES)
+        self.flask_migrate.downgrade(revision='base')
+        self.assertEqual(inspect(db.engine).get_table_names(), ['alembic_version'])
+
+    def test_init_db_upgrades_a_database_from_before_the_migrations(self):
+        self.flask_migrate.upgrade(revision=INITIAL_REVISION)
+        with db.engine.begin() as connection:  # As db.create_all() made it, with some rows
+            connection.execute(text("DROP TABLE alembic_version"))
+            connection.execute(text("INSERT INTO users (id, first_name, last_name, email, password) "
+                                    "VALUES (1, 'Jo', 'Doe', 'jo@example.com', 'x')"))
+            connection.execute(text("INSERT INTO places (id, title, description, price, latitude, longitude, "
+                                    "owner_id) VALUES (1, 'Loft', 'Near the canal', 80, 48.87, 2.36, 1)"))
+            connection.execute(text("INSERT INTO reviews (id, text, rating, place_id, user_id) "
+                                    "VALUES (1, 'Lovely terrace', 4, 1, 1)"))
+        result = self.cli('hbnb', 'init-db')
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("up to date", result.output)
+        self.assertEqual(unindexed_foreign_keys(db.engine), [])
+
+        response = self.app.test_client().get('/api/v1/places/')
+        self.assertEqual(response.status_code, 200, response.get_json())
+        place = db.session.execute(text("SELECT review_count, rating_sum, geohash FROM places")).one()
+        self.assertEqual((place.review_count, place.rating_sum), (1, 4))
+        self.assertTrue(place.geohash.startswith('u09w'))
+        response = self.app.test_client().get('/api/v1/search/?q=terrace')
+        self.assertEqual([hit['type'] for hit in response.get_json()], ['review'])
+
+    def init_db(self):
+        result = self.cli('hbnb', 'init-db')
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(unindexed_foreign_keys(db.engine), [])
+        self.assertEqual(create_all_revision(db.engine, db.metadata), 'head')  # Same tables and indexes as the models
+        revision = self.revision()
+        db.session.remove()
+        db.drop_all()
+        db.session.execute(text("DROP TABLE alembic_version"))
+        db.session.commit()
+        return revision
+
+    def test_init_db_stamps_a_database_made_by_create_all(self):
+        # A database from the current models is already at the head
+        db.create_all()
+        self.assertEqual(create_all_revision(db.engine, db.metadata), 'head')
+        head = self.init_db()
+        self.assertNotIn(head, (FK_INDEXES_REVISION, SERIES_REVISION, None))
+
+        # As the models made it at these revisions: init-db brings it to the head
+        for revision, dropped in ((FK_INDEXES_REVISION, ()),
+                                  (SERIES_REVISION, ('ix_places_owner_id', 'ix_place_amenity_association_amenity_id'))):
+            db.create_all()
+            with db.engine.begin() as connection:
+                connection.execute(text("DROP INDEX ix_reviews_place_id_id"))
+                connection.execute(text("CREATE INDEX ix_reviews_place_id_created_at "
+                                        "ON reviews (place_id, created_at)"))
+                for index in dropped:
+                    connection.execute(text(f"DROP INDEX {index}"))
+            self.assertEqual(create_all_revision(db.engine, db.metadata), revision)
+            self.assertEqual(self.init_db(), head)
+
+    def test_init_db_refuses_an_unknown_schema(self):
+        with db.engine.begin() as connection:
+            connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR(50))"))
+        result = self.cli('hbnb', 'init-db')
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("don't match a known schema", result.output)
+        self.assertNotIn('alembic_version', inspect(db.engine).get_table_names())
+
+    def test_create_app_does_not_import_alembic(self):
+        code = ("import sys, app; app.create_app('config.TestingConfig'); "
+                "print('flask_migrate' in sys.modules, 'alembic' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], cwd=PART4, capture_output=True, text=True,
+                                check=True).stdout
+        self.assertEqual(output.split(), ['False', 'False'])
+        result = subprocess.run([sys.executable, '-m', 'flask', '--app', 'app:create_app("config.TestingConfig")',
+                                 'db', '--help'], cwd=PART4, capture_output=True, text=True, check=True).stdout
+        self.assertIn('upgrade', result)
+
+    def test_online_ddl_per_dialect(self):
+        spec = importlib.util.spec_from_file_location('online_index', os.path.join(MIGRATIONS_DIR, 'online_index.py'))
+        online_index = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(online_index)
+        scripts = {}
+        for dialect in ('postgresql', 'mysql'):
+            output = io.StringIO()
+            context = MigrationContext.configure(dialect_name=dialect, opts={'as_sql': True, 'output_buffer': output})
+            with Operations.context(context), context.begin_transaction():
+                online_index.create_index_online('ix_places_price', 'places', ['price'])
+                online_index.create_unique_constraint_online('uq_reviews_user_place', 'reviews',
+                                                             ['user_id', 'place_id'])
+            scripts[dialect] = output.getvalue()
+        self.assertIn("CREATE INDEX CONCURRENTLY ix_places_price", scripts['postgresql'])
+        self.assertIn("CREATE UNIQUE INDEX CONCURRENTLY uq_reviews_user_place", scripts['postgresql'])
+        self.assertIn("ADD CONSTRAINT uq_reviews_user_place UNIQUE USING INDEX uq_reviews_user_place",
+                      scripts['postgresql'])
+        self.assertIn("CREATE INDEX ix_places_price ON places (price) ALGORITHM=INPLACE LOCK=NONE", scripts['mysql'])
+        self.assertIn("CREATE UNIQUE INDEX uq_reviews_user_place ON reviews (user_id, place_id) "
+                      "ALGORITHM=INPLACE LOCK=NONE", scripts['mysql'])
+
+
+if __name__ == '__main__':
+    unittest.main()
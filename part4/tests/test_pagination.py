@@ -0,0 +1,70 @@
+import base64
+import unittest
+from sqlalchemy import insert
+from app import db
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place, place_amenity_association
+from app.persistence.repository import decode_cursor, encode_cursor
+from tests.base import AppTestCase
+
+
+class TestCursorPagination(AppTestCase):
+    def fetch_all_pages(self, url):
+        items, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            items.extend(response.get_json())
+            pages += 1
+            cursor = response.headers.get('X-Next-Cursor')
+            url = f"{url.split('?')[0]}?limit=10&after={cursor}" if cursor else None
+        return items, pages
+
+    def test_amenity_pages_cover_collection_once(self):
+        db.session.add_all([Amenity(name=f"Amenity {i}") for i in range(25)])
+        db.session.commit()
+
+        items, pages = self.fetch_all_pages('/api/v1/amenities/?limit=10')
+        self.assertEqual(pages, 3)
+        self.assertEqual([item['name'] for item in items], [f"Amenity {i}" for i in range(25)])
+
+    def test_place_pages_count_places_not_joined_rows(self):
+        owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        amenities = [Amenity(name="Wi-Fi"), Amenity(name="Pool"), Amenity(name="Sauna")]
+        db.session.add_all([owner] + amenities)
+        db.session.commit()
+        db.session.execute(insert(Place), [{
+            'id': i, 'title': f"Place {i}", 'description': "", 'price': 50.0,
+            'latitude': 0.0, 'longitude': 0.0, 'owner_id': owner.id
+        } for i in range(1, 16)])
+        db.session.execute(insert(place_amenity_association), [
+            {'place_id': i, 'amenity_id': amenity.id} for i in range(1, 16) for amenity in amenities
+        ])
+        db.session.commit()
+
+        items, pages = self.fetch_all_pages('/api/v1/places/?limit=10')
+        self.assertEqual(pages, 2)
+        self.assertEqual([item['id'] for item in items], list(range(1, 16)))
+        self.assertTrue(all(len(item['amenities']) == 3 for item in items))
+
+    def test_unpaginated_request_returns_whole_collection(self):
+        db.session.add_all([Amenity(name=f"Amenity {i}") for i in range(3)])
+        db.session.commit()
+        response = self.client.get('/api/v1/amenities/')
+        self.assertEqual(len(response.get_json()), 3)
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/v1/reviews/?limit=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/reviews/?limit=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/users/?after=not-a-cursor').status_code, 400)
+        # Well-formed JSON, but not a cursor of encode_cursor
+        for payload in (b'[{}]', b'[[1]]', b'{"a":1}', b'[true]', b'[1,2]'):
+            cursor = base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+            self.assertEqual(self.client.get(f'/api/v1/users/?limit=2&after={cursor}').status_code, 400, payload)
+        self.assertEqual(decode_cursor(encode_cursor(3)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from sqlalchemy import text
+from app import db
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place
+from tests.base import AppTestCase
+
+
+class TestPlaceFilters(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User(first_name="Alice", last_name="Doe", email="alice@example.com", password="secret")
+        self.bob = User(first_name="Bob", last_name="Doe", email="bob@example.com", password="secret")
+        self.wifi, self.pool = Amenity(name="Wi-Fi"), Amenity(name="Pool")
+        db.session.add_all([self.alice, self.bob, self.wifi, self.pool])
+        for title, price, owner, amenities in [
+            ('Studio', 50, self.alice, [self.wifi]),
+            ('Loft', 120, self.alice, [self.wifi, self.pool]),
+            ('Villa', 300, self.bob, [self.pool]),
+        ]:
+            place = Place(title=title, description="", price=price, latitude=0, longitude=0, owner=owner)
+            for amenity in amenities:
+                place.add_amenity(amenity)
+            db.session.add(place)
+        db.session.commit()
+
+    def titles(self, query):
+        response = self.client.get(f'/api/v1/places/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [place['title'] for place in response.get_json()]
+
+    def test_price_range(self):
+        self.assertEqual(self.titles('max_price=150'), ['Studio', 'Loft'])
+        self.assertEqual(self.titles('min_price=100&max_price=150'), ['Loft'])
+
+    def test_amenities_use_and_semantics(self):
+        self.assertEqual(self.titles(f'amenities={self.pool.id}'), ['Loft', 'Villa'])
+        self.assertEqual(self.titles(f'amenities={self.wifi.id},{self.pool.id}'), ['Loft'])
+
+    def test_owner_and_pagination(self):
+        self.assertEqual(self.titles(f'owner_id={self.bob.id}'), ['Villa'])
+        first = self.client.get(f'/api/v1/places/?owner_id={self.alice.id}&limit=1')
+        self.assertEqual([p['title'] for p in first.get_json()], ['Studio'])
+        cursor = first.headers['X-Next-Cursor']
+        self.assertEqual(self.titles(f'owner_id={self.alice.id}&limit=1&after={cursor}'), ['Loft'])
+
+    def test_price_filter_can_use_index(self):
+        plan = db.session.execute(text("EXPLAIN QUERY PLAN SELECT id FROM places WHERE price <= 150")).fetchall()
+        self.assertIn('ix_places_price', ' '.join(str(row) for row in plan))
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/v1/places/?max_price=cheap').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/places/?amenities=a,b').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
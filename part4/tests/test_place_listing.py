@@ -0,0 +1,76 @@
+import unittest
+from sqlalchemy import event, insert
+from app import db
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place, place_amenity_association
+from tests.base import AppTestCase
+
+
+class TestPlaceListing(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        wifi = Amenity(name="Wi-Fi")
+        pool = Amenity(name="Pool")
+        db.session.add_all([owner, wifi, pool])
+        db.session.commit()
+        self.owner_id = owner.id
+        self.amenity_ids = [wifi.id, pool.id]
+        self.place_count = 0
+
+    def add_places(self, count):
+        """Bulk insert places, each one linked to every amenity"""
+        start = self.place_count + 1
+        db.session.execute(insert(Place), [{
+            'id': i,
+            'title': f"Place {i}",
+            'description': "A nice place to stay",
+            'price': 100.0,
+            'latitude': 37.7749,
+            'longitude': -122.4194,
+            'owner_id': self.owner_id,
+        } for i in range(start, start + count)])
+        db.session.execute(insert(place_amenity_association), [
+            {'place_id': i, 'amenity_id': amenity_id}
+            for i in range(start, start + count)
+            for amenity_id in self.amenity_ids
+        ])
+        db.session.commit()
+        self.place_count += count
+
+    def count_statements(self, url):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        db.session.remove()
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(response.status_code, 200)
+        return len(statements), response.get_json()
+
+    def test_place_list_payload(self):
+        self.add_places(3)
+        _, places = self.count_statements('/api/v1/places/')
+        self.assertEqual(len(places), 3)
+        self.assertEqual(places[0]['owner_id'], self.owner_id)
+        self.assertEqual(sorted(places[0]['amenities']), sorted(self.amenity_ids))
+
+    def test_statement_count_is_constant(self):
+        self.add_places(10)
+        small, places = self.count_statements('/api/v1/places/')
+        self.assertEqual(len(places), 10)
+
+        self.add_places(10000 - 10)
+        large, places = self.count_statements('/api/v1/places/')
+        self.assertEqual(len(places), 10000)
+        self.assertEqual(small, large)
+
+
+if __name__ == '__main__':
+    unittest.main()
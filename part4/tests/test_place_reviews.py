@@ -0,0 +1,73 @@
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+from app import db
+from app.models.user import User
+from app.models.place import Place
+from app.models.review import Review
+from tests.base import AppTestCase
+
+
+class TestPlaceReviews(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        guests = [User(first_name="Jane", last_name="Roe", email=f"jane.roe{i}@example.com", password="secret")
+                  for i in range(5)]
+        self.place = Place(title="Cozy Apartment", description="", price=100, latitude=0, longitude=0, owner=owner)
+        self.other = Place(title="Beach House", description="", price=200, latitude=0, longitude=0, owner=owner)
+        db.session.add_all([owner, self.place, self.other] + guests)
+        db.session.add_all([Review(text=f"Review {i}", rating=4, place=self.place, user=guest)
+                            for i, guest in enumerate(guests)])
+        db.session.add(Review(text="Other place", rating=2, place=self.other, user=guests[0]))
+        db.session.commit()
+        self.guest_id = guests[0].id
+
+    def test_only_reviews_of_the_place_are_returned(self):
+        response = self.client.get(f'/api/v1/reviews/places/{self.place.id}/reviews')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['text'] for r in response.get_json()], [f"Review {i}" for i in range(5)])
+
+    def test_reviews_of_a_place_are_paginated(self):
+        url = f'/api/v1/reviews/places/{self.place.id}/reviews'
+        first = self.client.get(f'{url}?limit=3')
+        self.assertEqual(len(first.get_json()), 3)
+        cursor = first.headers['X-Next-Cursor']
+        second = self.client.get(f'{url}?limit=3&after={cursor}')
+        self.assertEqual([r['text'] for r in second.get_json()], ["Review 3", "Review 4"])
+        self.assertNotIn('X-Next-Cursor', second.headers)
+
+    def test_unknown_place(self):
+        self.assertEqual(self.client.get('/api/v1/reviews/places/999/reviews').status_code, 404)
+
+    def test_lookup_uses_place_index(self):
+        # The query of a page after the first one: the index gives the rows in order, without a sort
+        plan = ' '.join(str(row) for row in db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM reviews WHERE place_id = :place_id AND id > :after ORDER BY id LIMIT 3"
+        ), {'place_id': self.place.id, 'after': 0}))
+        self.assertIn('ix_reviews_place_id_id', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+    def test_duplicate_review_is_rejected_by_constraint(self):
+        reviewer = User(first_name="Max", last_name="Poe", email="max.poe@example.com", password="secret")
+        db.session.add(reviewer)
+        db.session.commit()
+        headers = {'Authorization': f"Bearer {create_access_token(identity=str(reviewer.id))}"}
+        payload = {'text': "Lovely", 'rating': 5, 'place_id': str(self.place.id)}
+
+        first = self.client.post('/api/v1/reviews/', json=payload, headers=headers)
+        self.assertEqual(first.status_code, 201)
+        second = self.client.post('/api/v1/reviews/', json=payload, headers=headers)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(second.get_json()['error'], "You have already reviewed this place")
+        self.assertEqual(Review.query.filter_by(user_id=reviewer.id).count(), 1)
+
+    def test_has_already_reviewed(self):
+        from app.services import facade
+        self.assertTrue(facade.has_already_reviewed(self.guest_id, self.place.id))
+        self.assertFalse(facade.has_already_reviewed(self.guest_id, 999))
+
+
+if __name__ == '__main__':
+    unittest.main()
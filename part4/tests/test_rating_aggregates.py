@@ -0,0 +1,67 @@
+import unittest
+from app import db
+from app.models.user import User
+from app.models.place import Place
+from app.models.review import Review
+from app.services import facade
+from tests.base import AppTestCase
+
+
+class TestRatingAggregates(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        self.guests = [User(first_name="Jane", last_name="Roe", email=f"jane.roe{i}@example.com", password="secret")
+                       for i in range(3)]
+        self.place = Place(title="Cozy Apartment", description="", price=100, latitude=0, longitude=0, owner=owner)
+        self.other = Place(title="Beach House", description="", price=200, latitude=0, longitude=0, owner=owner)
+        db.session.add_all([owner, self.place, self.other] + self.guests)
+        db.session.commit()
+
+    def review(self, guest, place, rating):
+        return facade.create_review({'text': "Nice", 'rating': rating,
+                                     'user_id': guest.id, 'place_id': place.id})
+
+    def test_aggregates_follow_review_changes(self):
+        first = self.review(self.guests[0], self.place, 5)
+        self.review(self.guests[1], self.place, 2)
+        self.assertEqual((self.place.review_count, self.place.rating_sum), (2, 7))
+        self.assertEqual(self.place.average_rating, 3.5)
+
+        facade.update_review(first.id, {'rating': 3})
+        self.assertEqual((self.place.review_count, self.place.rating_sum), (2, 5))
+
+        facade.delete_review(first.id)
+        self.assertEqual((self.place.review_count, self.place.rating_sum), (1, 2))
+
+    def test_duplicate_review_leaves_aggregates_untouched(self):
+        self.review(self.guests[0], self.place, 4)
+        with self.assertRaises(ValueError):
+            self.review(self.guests[0], self.place, 1)
+        self.assertEqual((self.place.review_count, self.place.rating_sum), (1, 4))
+
+    def test_min_rating_filter_and_sort(self):
+        self.review(self.guests[0], self.place, 3)
+        self.review(self.guests[0], self.other, 5)
+
+        places = self.client.get('/api/v1/places/?min_rating=4').get_json()
+        self.assertEqual([p['id'] for p in places], [self.other.id])
+        self.assertEqual(places[0]['average_rating'], 5)
+
+        places = self.client.get('/api/v1/places/?sort=rating').get_json()
+        self.assertEqual([p['id'] for p in places], [self.other.id, self.place.id])
+        self.assertEqual(self.client.get('/api/v1/places/?min_rating=9').status_code, 400)
+
+    def test_rebuild_command(self):
+        db.session.add(Review(text="Imported", rating=4, place=self.place, user=self.guests[2]))
+        db.session.commit()
+        self.assertEqual(self.place.review_count, 0)
+
+        result = self.app.test_cli_runner().invoke(args=['hbnb', 'rebuild-ratings'])
+        self.assertIn("Rebuilt rating aggregates for 2 places", result.output)
+        db.session.refresh(self.place)
+        self.assertEqual((self.place.review_count, self.place.rating_sum), (1, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app, db
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.routing import SQLiteReplicator
+from app.services import facade
+from config import TestingConfig
+
+
+class TestReadReplicas(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.app = create_app(self.config())
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.replicator = self.app.extensions.get('sqlite_replicator') or \
+            SQLiteReplicator(db.engine, [db.engines['replica_1']])
+        self.client = self.app.test_client()
+
+        self.admin = User(first_name="Ad", last_name="Min", email="admin@example.com", password="secret",
+                          is_admin=True)
+        db.session.add_all([self.admin, Amenity(name="Wi-Fi")])
+        db.session.commit()
+        self.replicator.sync()
+        self.token = create_access_token(identity=str(self.admin.id), additional_claims={'is_admin': True})
+        self.engines = dict(db.engines)
+        # Each test request then gets its own app context and session, as in production
+        db.session.remove()
+        self.ctx.pop()
+
+    def tearDown(self):
+        for engine in self.engines.values():
+            engine.dispose()
+        # Flask-SQLAlchemy keeps a metadata per bind key, shared by every app
+        db.metadatas.pop('replica_1', None)
+        shutil.rmtree(self.tmp)
+
+    def config(self, sync=False):
+        tmp = self.tmp
+
+        class ReplicaConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'primary.db')}"
+            SQLALCHEMY_BINDS = {'replica_1': f"sqlite:///{os.path.join(tmp, 'replica.db')}"}
+            READ_REPLICA_BINDS = ['replica_1']
+            SQLITE_REPLICA_SYNC = sync
+            REPOSITORY_CACHE_BACKEND = None
+            RESPONSE_CACHE_SIZE = 0
+        return ReplicaConfig
+
+    def amenity_names(self):
+        response = self.client.get('/api/v1/amenities/')
+        self.assertEqual(response.status_code, 200)
+        return [amenity['name'] for amenity in response.get_json()]
+
+    def test_get_requests_read_from_the_replica(self):
+        queries = []
+        event.listen(self.engines['replica_1'], 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: queries.append(statement))
+        response = self.client.post('/api/v1/amenities/', json={'name': "Pool"},
+                                    headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(queries, [])  # Writes, and the reads of write requests, use the primary
+
+        # The replica hasn't caught up yet
+        self.assertEqual(self.amenity_names(), ["Wi-Fi"])
+        self.assertTrue(queries)
+        self.replicator.sync()
+        self.assertEqual(self.amenity_names(), ["Wi-Fi", "Pool"])
+
+    def test_read_after_write_sticks_to_the_primary(self):
+        with self.app.test_request_context('/', method='GET'):
+            self.assertEqual(len(facade.get_all_amenities()), 1)
+            self.assertEqual(db.session().info['replica'], 'replica_1')
+            amenity = facade.create_amenity({'name': "Pool"})
+            db.session.expunge_all()
+            self.assertEqual(facade.get_amenity(amenity.id).name, "Pool")
+            self.assertEqual(len(facade.get_all_amenities()), 2)
+
+    def test_no_replica_outside_requests(self):
+        with self.app.app_context():
+            facade.create_amenity({'name': "Pool"})
+            db.session.remove()
+            self.assertEqual(len(facade.get_all_amenities()), 2)
+
+
+class TestReplicationStandIn(TestReadReplicas):
+    def config(self):
+        return super().config(sync=True)
+
+    def test_get_requests_read_from_the_replica(self):
+        response = self.client.post('/api/v1/amenities/', json={'name': "Pool"},
+                                    headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.amenity_names(), ["Wi-Fi", "Pool"])
+
+
+if __name__ == '__main__':
+    unittest.main()
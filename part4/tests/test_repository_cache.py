@@ -0,0 +1,115 @@
+import unittest
+from unittest import mock
+from sqlalchemy import event
+from app import db, repository_cache
+from app.cache import LRUCache
+from app.models.user import User
+from app.models.place import Place
+from app.services import facade
+from tests.base import AppTestCase, InMemoryConfig
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction_and_ttl(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)  # 'b' is the least recently used
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+        with mock.patch('app.cache.time.monotonic', return_value=10 ** 9):
+            self.assertIsNone(cache.get('a'))
+        cache.delete_prefix('c')
+        self.assertEqual(len(cache), 0)
+
+
+class MemoryCacheConfig(InMemoryConfig):
+    REPOSITORY_CACHE_BACKEND = 'memory'
+
+
+class TestRepositoryCache(AppTestCase):
+    config_class = MemoryCacheConfig
+
+    def setUp(self):
+        super().setUp()
+        owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        place = Place(title="Loft", description="", price=100, latitude=0, longitude=0, owner=owner)
+        db.session.add_all([owner, place])
+        db.session.commit()
+        self.owner_id, self.place_id = owner.id, place.id
+        db.session.remove()
+
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.count)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.count)
+        super().tearDown()
+
+    def count(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def get_place(self):
+        """Fetch the place in a fresh session, as a new request would"""
+        db.session.remove()
+        return facade.get_place(self.place_id)
+
+    def test_second_lookup_is_served_from_cache(self):
+        self.assertEqual(self.get_place().title, "Loft")
+        queries = len(self.statements)
+        place = self.get_place()
+        self.assertEqual(len(self.statements), queries)
+        self.assertEqual(place.title, "Loft")
+        self.assertEqual(repository_cache.stats()['hits'], 1)
+        self.assertEqual(repository_cache.stats()['misses'], 1)
+        # The cached object is attached to the session: relationships still load
+        self.assertEqual(place.owner.email, "john.doe@example.com")
+
+    def test_off_by_default(self):
+        # Each worker process would have its own copy, stale after writes made by the others
+        repository_cache.configure({})
+        self.assertFalse(repository_cache.enabled)
+        self.get_place()
+        queries = len(self.statements)
+        self.get_place()
+        self.assertGreater(len(self.statements), queries)
+
+    def test_writes_invalidate(self):
+        self.get_place()
+        facade.update_place(self.place_id, {'title': "Penthouse"})
+        self.assertEqual(self.get_place().title, "Penthouse")
+
+        # Changes made outside the repositories are seen after the commit too
+        place = self.get_place()
+        place.price = 42
+        db.session.commit()
+        self.assertEqual(self.get_place().price, 42)
+
+        facade.delete_place(self.place_id)
+        self.assertIsNone(self.get_place())
+
+    def test_bulk_update_invalidates(self):
+        self.get_place()
+        facade.rebuild_geohashes()
+        db.session.execute(db.update(Place).values(title="Renamed"))
+        db.session.commit()
+        self.assertEqual(self.get_place().title, "Renamed")
+
+    def test_api_update_is_visible(self):
+        token = self.client.post('/api/v1/auth/login', json={
+            'email': "john.doe@example.com", 'password': "secret"}).get_json()['access_token']
+        self.client.get(f'/api/v1/places/{self.place_id}')
+        response = self.client.put(f'/api/v1/places/{self.place_id}', json={'title': "Studio"},
+                                   headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f'/api/v1/places/{self.place_id}').get_json()['title'], "Studio")
+
+    def test_disabled(self):
+        with mock.patch.object(repository_cache, 'backend', None):
+            self.get_place()
+            self.get_place()
+        self.assertEqual(repository_cache.stats()['hits'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
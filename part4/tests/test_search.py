@@ -0,0 +1,89 @@
+import unittest
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+from app.models.place import Place
+from app.models.review import Review
+from app.persistence.search_repository import build_tsquery, search_result, search_statement
+from app.services import facade
+from tests.base import AppTestCase
+
+
+class TestSearch(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        guest = User(first_name="Jane", last_name="Roe", email="jane.roe@example.com", password="secret")
+        self.loft = Place(title="Sunny loft in Paris", description="Close to the Louvre",
+                          price=100, latitude=0, longitude=0, owner=owner)
+        self.cabin = Place(title="Mountain cabin", description="Quiet, no neighbours",
+                           price=80, latitude=0, longitude=0, owner=owner)
+        self.review = Review(text="Great view of Paris rooftops", rating=5, place=self.cabin, user=guest)
+        db.session.add_all([owner, guest, self.loft, self.cabin, self.review])
+        db.session.commit()
+
+    def search(self, query):
+        response = self.client.get(f'/api/v1/search/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [(result['type'], result['id']) for result in response.get_json()]
+
+    def test_ranking_prefix_and_type(self):
+        # The title match is weighted above the review text match
+        self.assertEqual(self.search('q=paris'), [('place', self.loft.id), ('review', self.review.id)])
+        self.assertEqual(self.search('q=pari&type=review'), [('review', self.review.id)])
+        self.assertEqual(self.search('q=louv'), [('place', self.loft.id)])
+        self.assertEqual(self.search('q=paris+cabin'), [])
+
+    def test_index_follows_orm_changes(self):
+        self.cabin.description = "Sauna and hot tub"
+        db.session.commit()
+        self.assertEqual(self.search('q=sauna'), [('place', self.cabin.id)])
+        self.assertEqual(self.search('q=neighbours'), [])
+
+        db.session.delete(self.review)
+        db.session.commit()
+        self.assertEqual(self.search('q=rooftops'), [])
+
+    def test_pagination(self):
+        first = self.client.get('/api/v1/search/?q=paris&limit=1')
+        self.assertEqual(len(first.get_json()), 1)
+        second = self.client.get(f"/api/v1/search/?q=paris&limit=1&after={first.headers['X-Next-Cursor']}")
+        self.assertEqual([r['type'] for r in second.get_json()], ['review'])
+        self.assertNotIn('X-Next-Cursor', second.headers)
+
+    def test_rebuild(self):
+        self.assertEqual(facade.rebuild_search_index(), 3)
+        self.assertEqual(self.search('q=mountain'), [('place', self.cabin.id)])
+
+    def test_invalid_query(self):
+        self.assertEqual(self.client.get('/api/v1/search/?q=').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/search/?q=paris&type=user').status_code, 400)
+
+    def test_like_fallback_pages_in_sql(self):
+        # The search of the databases with neither FTS5 nor tsvector
+        def search(query, kind, limit, offset):
+            rows = db.session.execute(search_statement('mysql', query, kind, limit, offset))
+            return [(result['type'], result['id'], result['snippet']) for result in map(search_result, rows)]
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            first, second = search('paris', None, 1, 0), search('PARIS', None, 1, 1)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(first + second, [('place', self.loft.id, "Sunny loft in Paris"),
+                                          ('review', self.review.id, "Great view of Paris rooftops")])
+        self.assertEqual(len(statements), 2)
+        self.assertIn('LIMIT', statements[0])
+        self.assertEqual(search('paris cabin', None, 10, 0), [])
+        self.assertEqual(search('view', 'place', 10, 0), [])
+
+    def test_tsquery(self):
+        self.assertEqual(build_tsquery("Paris, l'été"), "'Paris':* & 'l':* & 'été':*")
+        with self.assertRaises(ValueError):
+            build_tsquery("?!")
+
+
+if __name__ == '__main__':
+    unittest.main()
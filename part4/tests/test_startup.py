@@ -0,0 +1,60 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from sqlalchemy import inspect, select
+from app import create_app, db
+from app.extensions import table_versions
+from config import TestingConfig
+
+PART4 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        path = os.path.join(self.tmp, 'hbnb.db')
+
+        class FileConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        self.app = create_app(FileConfig)
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.engine.dispose()
+        shutil.rmtree(self.tmp)
+
+    def tables(self):
+        with self.app.app_context():
+            return set(inspect(db.engine).get_table_names())
+
+    def test_schema_is_created_by_the_command_only(self):
+        self.assertEqual(self.tables(), set())
+        for _ in range(2):  # Running it again changes nothing
+            result = self.app.test_cli_runner().invoke(args=['hbnb', 'init-db'])
+            self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue({'users', 'places', 'reviews', 'amenities', 'table_versions'} <= self.tables())
+        with self.app.app_context():
+            names = db.session.execute(select(table_versions.c.table_name)).scalars().all()
+            self.assertEqual(sorted(names), sorted(set(names)))
+            self.assertIn('places', names)
+
+    def test_one_facade_instance(self):
+        from app.services import facade
+        from app.api.v1 import users, reviews, places
+        self.assertIs(users.facade, facade)
+        self.assertIs(reviews.facade, facade)
+        self.assertIs(places.facade, facade)
+
+    def test_importing_the_package_has_no_side_effects(self):
+        code = ("import logging, sys, app; "
+                "print(bool(logging.getLogger().handlers), 'app.api.v1.users' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], cwd=PART4, capture_output=True, text=True,
+                                check=True).stdout
+        self.assertEqual(output.split(), ['False', 'False'])
+
+
+if __name__ == '__main__':
+    unittest.main()
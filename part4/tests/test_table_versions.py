@@ -0,0 +1,82 @@
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, insert
+from app import db
+from app.extensions import get_table_version
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place
+from tests.base import AppTestCase
+
+
+class TestTableVersions(AppTestCase):
+    def test_flushes_bump_the_version(self):
+        self.assertEqual(get_table_version('amenities'), 0)
+        amenity = Amenity(name="Wi-Fi")
+        db.session.add(amenity)
+        db.session.commit()
+        self.assertEqual(get_table_version('amenities'), 1)
+
+        amenity.name = amenity.name  # No actual change
+        db.session.commit()
+        self.assertEqual(get_table_version('amenities'), 1)
+        amenity.name = "Pool"
+        db.session.commit()
+        db.session.delete(amenity)
+        db.session.commit()
+        self.assertEqual(get_table_version('amenities'), 3)
+        self.assertEqual(get_table_version('users'), 0)
+
+    def test_bulk_statements_bump_the_version(self):
+        db.session.execute(insert(User), [{'first_name': 'A', 'last_name': 'B', 'email': f'u{i}@example.com',
+                                           'password': 'x'} for i in range(3)])
+        db.session.commit()
+        self.assertEqual(get_table_version('users'), 1)
+
+    def test_rollback_discards_the_bump(self):
+        db.session.add(Amenity(name="Wi-Fi"))
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(get_table_version('amenities'), 0)
+
+    def test_unchanged_list_is_served_from_memory(self):
+        db.session.add(Amenity(name="Wi-Fi"))
+        db.session.commit()
+        first = self.client.get('/api/v1/amenities/')
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            second = self.client.get('/api/v1/amenities/')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(len(statements), 1)  # The version lookup only
+        self.assertIn('table_versions', statements[0])
+
+        db.session.add(Amenity(name="Pool"))
+        db.session.commit()
+        third = self.client.get('/api/v1/amenities/')
+        self.assertEqual([a['name'] for a in third.get_json()], ["Wi-Fi", "Pool"])
+        self.assertNotEqual(third.headers['ETag'], first.headers['ETag'])
+
+    def test_reviews_of_a_deleted_place(self):
+        owner = User(first_name="John", last_name="Doe", email="john.doe@example.com", password="secret")
+        place = Place(title="Loft", description="", price=100, latitude=0, longitude=0, owner=owner)
+        db.session.add_all([owner, place])
+        db.session.commit()
+        url = f'/api/v1/reviews/places/{place.id}/reviews'
+        first = self.client.get(url)
+        self.assertEqual((first.status_code, first.get_json()), (200, []))
+
+        headers = {'Authorization': f"Bearer {create_access_token(identity=str(owner.id))}"}
+        self.assertEqual(self.client.delete(f'/api/v1/places/{place.id}', headers=headers).status_code, 200)
+        # The reviews table didn't change, the places table did: neither the cache nor a 304 answers
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()